@@ -0,0 +1,95 @@
+# Compares the original per-vertex loops of GLine/GColor with the edit path they ship with (gline.start, gcolor.start)
+
+from core import layout, transform, undo
+import gline
+import gcolor
+
+import numpy as np
+import argparse
+import tempfile
+import logging
+import timeit
+import os
+
+
+def loop_gline(data: bytearray, stride: int, thickness: int) -> None:
+    for index in range(0, len(data), stride):
+        data[index + 3] = thickness
+
+
+def loop_gcolor(data: bytearray, stride: int, colors: dict) -> None:
+    for index in range(0, len(data), stride):
+        for offset, value in enumerate(colors.values()):
+            if value is not None:
+                data[index + offset] = value
+
+
+def original_start(texcoord: str, edit) -> None:
+    """Reads the whole buffer, loops over it and writes it back like the original tools"""
+    with open(texcoord, 'rb') as file:
+        data = bytearray(file.read())
+        file.close()
+    edit(data)
+    with open(texcoord, 'wb') as file:
+        file.write(data)
+        file.close()
+
+
+def measure(func, reset, repeat: int) -> float:
+    return min(timeit.repeat(func, setup=reset, number=1, repeat=repeat))
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(description='GLine/GColor write benchmark')
+    arg_parser.add_argument('--size', type=int, default=10, help='Buffer size in MB (default 10)')
+    arg_parser.add_argument('--stride', type=int, default=20, help='Vertex stride (default 20)')
+    arg_parser.add_argument('--repeat', type=int, default=5, help='Repeat count, best time is used (default 5)')
+    args = arg_parser.parse_args()
+
+    for logger in (gline.logger, gcolor.logger):
+        logger.setLevel(logging.WARNING)
+
+    size = args.size * 1024 * 1024 // args.stride * args.stride
+    original = np.random.default_rng(0).integers(0, 256, size, dtype=np.uint8).tobytes()
+    colors = {'R': 255, 'G': None, 'B': 128, 'A': 100}
+    channels = {offset: value for offset, value in enumerate(colors.values()) if value is not None}
+    vertex_layout = layout.VertexLayout.default(args.stride)
+    thickness = transform.Transform.constant(100)
+
+    with tempfile.TemporaryDirectory() as folder:
+        ini = os.path.join(folder, 'mod.ini')
+        texcoord = os.path.join(folder, 'Texcoord.buf')
+        with open(ini, 'w', encoding='utf-8') as file:
+            file.write(f'[ResourceTexcoord]\nstride = {args.stride}\nfilename = Texcoord.buf\n')
+            file.close()
+
+        def reset() -> None:
+            with open(texcoord, 'wb') as file:
+                file.write(original)
+                file.close()
+            if os.path.exists(undo.undo_path(texcoord)):
+                os.remove(undo.undo_path(texcoord))
+
+        cases = (
+            ('gline', lambda: original_start(texcoord, lambda data: loop_gline(data, args.stride, 100)),
+             lambda: gline.start(thickness, ini, texcoord),
+             lambda data: gline.apply_thickness(thickness, vertex_layout, data)),
+            ('gcolor', lambda: original_start(texcoord, lambda data: loop_gcolor(data, args.stride, colors)),
+             lambda: gcolor.start(colors, ini, texcoord),
+             lambda data: gcolor.apply_colors(channels, vertex_layout, data))
+        )
+
+        print(f'Buffer: {size} bytes, stride {args.stride}, {size // args.stride} vertices')
+        for name, loop, start, edit in cases:
+            loop_time = measure(loop, reset, args.repeat)
+            start_time = measure(start, reset, args.repeat)
+            # The edit alone, without mapping the file and the undo record
+            data = bytearray(original)
+            edit_time = measure(lambda: edit(data), lambda: data.__setitem__(slice(None), original), args.repeat)
+            print(f'{name:<8} loop {loop_time * 1000:>8.2f}ms  start {start_time * 1000:>8.2f}ms '
+                  f'({loop_time / start_time:>5.1f}x)  edit only {edit_time * 1000:>7.2f}ms '
+                  f'({loop_time / edit_time:>5.1f}x)')
+
+
+if __name__ == '__main__':
+    main()
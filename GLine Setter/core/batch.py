@@ -0,0 +1,92 @@
+from core import layout
+
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Optional, Callable
+import threading
+import logging
+import os
+
+
+def is_disabled(name: str) -> bool:
+    return name.lower().startswith('disabled')
+
+
+def find_pairs(root: str, logger: logging.Logger, recursive: Optional[bool] = True) -> list:
+    """Finds every (ini, Texcoord.buf) pair under the mods folder
+
+    Buffers are found through the Resource sections of each ini, their filename is looked up
+    in an index of every file built in the same walk. Mods with several Texcoord buffers give
+    one pair per buffer. Folders starting with DISABLED are skipped. For merged mods the inis
+    of the child folders are used even though they're disabled, since merged.ini is the one loading them.
+    Without recursive only the mod in root is searched, with the child folders if it's a merged mod.
+    """
+    index = dict()
+    inis = []
+    merged = set()
+    for path, dirs, files in os.walk(root):
+        dirs[:] = sorted(name for name in dirs if not is_disabled(name))
+        if 'merged.ini' in files:
+            merged.add(path)
+        if not recursive and (path != root or root not in merged):
+            dirs[:] = []
+
+        include_disabled = os.path.dirname(path) in merged
+        for file in sorted(files):
+            file_path = os.path.join(path, file)
+            index[layout.path_key(file_path)] = file_path
+            if (file.lower().endswith('.ini') and file != 'merged.ini'
+                    and (include_disabled or not is_disabled(file))):
+                inis.append(file_path)
+
+    pairs = []
+    seen = set()
+    for ini in inis:
+        try:
+            resources = layout.read_resources(ini)
+        except (UnicodeDecodeError, OSError) as e:
+            # Inis saved in a local code page aren't valid utf-8, they're left out instead of stopping the run
+            logger.warning(f'Skipping {ini}, {type(e).__name__} {e}')
+            continue
+        for resource in resources.values():
+            if resource.filename is None or not resource.filename.lower().endswith('texcoord.buf'):
+                continue
+
+            key = layout.path_key(resource.filename)
+            if key not in index:
+                logger.warning(f'{ini}: file of Resource{resource.name} not found -> {resource.filename}')
+                continue
+            elif key in seen:
+                continue
+            seen.add(key)
+            pairs.append((ini, index[key]))
+    return pairs
+
+
+def run(pairs: list, func: Callable, logger: logging.Logger, workers: Optional[int] = None) -> list:
+    """Runs func(ini, texcoord) for every pair on a thread pool
+
+    Buffer writes release the GIL so the pairs are processed in parallel.
+    Returns (ini, texcoord, success) of every pair.
+    """
+    results = []
+    lock = threading.Lock()
+    total = len(pairs)
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(func, ini, texcoord): (ini, texcoord) for ini, texcoord in pairs}
+        for future in as_completed(futures):
+            ini, texcoord = futures[future]
+            try:
+                success = bool(future.result())
+            except Exception as e:
+                logger.error(f'{type(e).__name__} {e} while processing {texcoord}')
+                success = False
+
+            with lock:
+                results.append((ini, texcoord, success))
+                done = len(results)
+            logger.info(f'[{done}/{total}] {"Done" if success else "Failed"} -> {texcoord}')
+
+    failed = sum(1 for _, _, success in results if not success)
+    logger.info(f'Processed {total} buffer(s), {total - failed} succeeded, {failed} failed')
+    return results
@@ -0,0 +1,114 @@
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Iterator, Union, Callable
+import numpy as np
+import contextlib
+import mmap
+import os
+
+Buffer = Union[bytearray, memoryview, np.ndarray]
+
+DEFAULT_CHUNK_SIZE = 16 * 1024 * 1024
+
+
+def vertex_view(data: Buffer, stride: int) -> np.ndarray:
+    """Returns a (vertices, stride) uint8 view of the buffer without copying
+
+    Trailing bytes that don't make up a whole vertex are left out.
+    """
+    if stride <= 0:
+        raise ValueError(f'Invalid stride {stride}')
+
+    array = np.frombuffer(data, dtype=np.uint8) if not isinstance(data, np.ndarray) else data
+    count = len(array) // stride
+    return array[:count * stride].reshape(count, stride)
+
+
+@contextlib.contextmanager
+def map_buffer(filename: str, writable: Optional[bool] = True) -> Iterator[np.ndarray]:
+    """Memory-maps a buffer file as a flat uint8 array
+
+    Changes are made directly on the mapped pages, only the pages that were written
+    to are written back to the file and the file size never changes. The pages are left
+    to the system like the data of a write(), nothing waits for the disk.
+    """
+    if not os.path.getsize(filename):
+        raise ValueError(f'{filename} is empty')
+
+    with open(filename, 'r+b' if writable else 'rb') as file:
+        mapped = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_WRITE if writable else mmap.ACCESS_READ)
+        file.close()
+
+    array = np.frombuffer(mapped, dtype=np.uint8)
+    try:
+        yield array
+    finally:
+        del array
+        try:
+            mapped.close()
+        except BufferError:
+            # A view of the buffer is still referenced, the map is closed once it's released
+            pass
+
+
+def chunk_length(stride: int, chunk_size: Optional[int] = DEFAULT_CHUNK_SIZE) -> int:
+    """Largest multiple of stride that fits in chunk_size, at least one vertex"""
+    if stride <= 0:
+        raise ValueError(f'Invalid stride {stride}')
+    return max(stride, chunk_size // stride * stride)
+
+
+def stream_buffer(filename: str, stride: int, func: Callable[[np.ndarray], bool],
+                  chunk_size: Optional[int] = DEFAULT_CHUNK_SIZE) -> bool:
+    """Runs func over the buffer in stride aligned chunks, memory use doesn't depend on the file size
+
+    func edits the chunk in place and returns True if it changed anything, only those chunks
+    are written back. Two chunk buffers are used so the next chunk is read, and the previous one
+    written, on an io thread while func runs. The chunk passed to func is reused afterwards.
+    Returns True if any chunk was written.
+    """
+    if not os.path.getsize(filename):
+        raise ValueError(f'{filename} is empty')
+
+    length = chunk_length(stride, chunk_size)
+    chunks = (bytearray(length), bytearray(length))
+    views = tuple(memoryview(chunk) for chunk in chunks)
+
+    def read(index: int, position: int) -> int:
+        reader.seek(position)
+        return reader.readinto(views[index])
+
+    def write(index: int, position: int, size: int) -> None:
+        writer.seek(position)
+        writer.write(views[index][:size])
+
+    modified = False
+    # A single io thread keeps the order, the write of a chunk always finishes
+    # before the next read into the same buffer
+    with open(filename, 'rb') as reader, open(filename, 'r+b') as writer, \
+            ThreadPoolExecutor(max_workers=1) as io:
+        index = 0
+        position = 0
+        pending = io.submit(read, index, position)
+        written = None
+        while True:
+            size = pending.result()
+            if not size:
+                break
+
+            pending = io.submit(read, 1 - index, position + size)
+            modified_chunk = func(np.frombuffer(chunks[index], dtype=np.uint8)[:size])
+            # Raises the error of the previous write, it ran while func was busy
+            if written is not None:
+                written.result()
+                written = None
+            if modified_chunk:
+                written = io.submit(write, index, position, size)
+                modified = True
+            position += size
+            index = 1 - index
+
+        if written is not None:
+            written.result()
+        reader.close()
+        writer.close()
+    return modified
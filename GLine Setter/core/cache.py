@@ -0,0 +1,62 @@
+from typing import Optional
+import threading
+import json
+import os
+
+
+class BufferCache(object):
+    """Remembers which settings are already applied to each buffer
+
+    Entries are keyed by the absolute path and only valid while the size and mtime
+    of the file are unchanged, so a rerun with the same setting can skip the buffer
+    without reading it.
+    """
+
+    def __init__(self, filename: Optional[str] = 'buffer_cache.json') -> None:
+        self.filename = filename
+        self._entries = dict()
+        self._lock = threading.Lock()
+
+    def load(self) -> None:
+        self._entries.clear()
+        if not os.path.exists(self.filename):
+            return
+        try:
+            with open(self.filename, 'r', encoding='utf-8') as file:
+                self._entries.update(json.load(file))
+                file.close()
+        except (OSError, ValueError):
+            # Corrupted cache only means every buffer gets checked again
+            self._entries.clear()
+
+    def save(self) -> None:
+        with self._lock:
+            with open(self.filename, 'w', encoding='utf-8') as file:
+                json.dump(self._entries, file, separators=(',', ':'))
+                file.close()
+
+    @staticmethod
+    def _stat(path: str) -> list:
+        stat = os.stat(path)
+        return [stat.st_size, stat.st_mtime_ns]
+
+    def is_current(self, path: str, key: str) -> bool:
+        entry = self._entries.get(os.path.abspath(path))
+        if entry is None or key not in entry['keys']:
+            return False
+        try:
+            return entry['stat'] == self._stat(path)
+        except OSError:
+            return False
+
+    def update(self, path: str, key: str, modified: Optional[bool] = True) -> None:
+        """Records a setting, a modified buffer drops every setting recorded before"""
+        path = os.path.abspath(path)
+        stat = self._stat(path)
+        with self._lock:
+            entry = self._entries.get(path)
+            if modified or entry is None or entry['stat'] != stat:
+                entry = {'stat': stat, 'keys': []}
+                self._entries[path] = entry
+            if key not in entry['keys']:
+                entry['keys'].append(key)
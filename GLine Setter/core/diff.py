@@ -0,0 +1,133 @@
+from core import buffer, layout
+
+from typing import Optional
+import numpy as np
+import json
+
+BLOCK = 1 << 20
+SUB_BLOCK = 4096
+
+
+def find_ranges(mask: np.ndarray) -> np.ndarray:
+    """Returns (start, end) of every run of True in mask, end is exclusive"""
+    edges = np.diff(np.concatenate(([0], mask.view(np.int8), [0])))
+    return np.column_stack((np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)))
+
+
+class BufferDiff(object):
+    """Vertex level comparison of two buffers with the same layout
+
+    Both buffers are mapped read-only and compared in blocks of vertices. Each block is first
+    compared 8 bytes at a time, only the sub-blocks that differ are compared byte by byte
+    and reduced to one flag per vertex for each attribute.
+    Bytes that aren't covered by any attribute of the layout are reported as 'other'.
+    """
+
+    def __init__(self, old: str, new: str, vertex_layout: layout.VertexLayout) -> None:
+        self.old = old
+        self.new = new
+        self.layout = vertex_layout
+        self.old_vertices = 0
+        self.new_vertices = 0
+        self.changed = np.zeros(0, dtype=bool)
+        self.attributes = dict()
+
+    def _groups(self) -> dict:
+        groups = {name: self.layout.byte_offsets(name) for name in self.layout.names}
+        covered = set(offset for offsets in groups.values() for offset in offsets)
+        other = [offset for offset in range(self.layout.stride) if offset not in covered]
+        if other:
+            groups['other'] = other
+        return groups
+
+    @staticmethod
+    def _dirty(old_view: np.ndarray, new_view: np.ndarray, start: int, end: int) -> list:
+        """Starts of the sub-blocks within start-end that have any changed byte"""
+        full = (end - start) // SUB_BLOCK * SUB_BLOCK
+        starts = []
+        if full:
+            # Whole sub-blocks are a multiple of 8 bytes, so they can be compared as uint64
+            old_words = old_view[start:start + full].reshape(-1).view(np.uint64)
+            new_words = new_view[start:start + full].reshape(-1).view(np.uint64)
+            flags = (old_words != new_words).reshape(full // SUB_BLOCK, -1).any(axis=1)
+            starts.extend((start + np.flatnonzero(flags) * SUB_BLOCK).tolist())
+        if start + full < end:
+            starts.append(start + full)
+        return starts
+
+    def compare(self) -> 'BufferDiff':
+        stride = self.layout.stride
+        groups = self._groups()
+        # Contiguous byte spans can be sliced instead of gathered
+        spans = {name: slice(offsets[0], offsets[-1] + 1) if offsets == list(range(offsets[0], offsets[-1] + 1))
+                 else offsets for name, offsets in groups.items()}
+
+        with buffer.map_buffer(self.old, writable=False) as old_data, \
+                buffer.map_buffer(self.new, writable=False) as new_data:
+            old_view = buffer.vertex_view(old_data, stride)
+            new_view = buffer.vertex_view(new_data, stride)
+            self.old_vertices = len(old_view)
+            self.new_vertices = len(new_view)
+            common = min(self.old_vertices, self.new_vertices)
+
+            self.changed = np.zeros(common, dtype=bool)
+            self.attributes = {name: np.zeros(common, dtype=bool) for name in groups}
+            for start in range(0, common, BLOCK):
+                end = min(start + BLOCK, common)
+                for sub_start in self._dirty(old_view, new_view, start, end):
+                    sub_end = min(sub_start + SUB_BLOCK, end)
+                    different = old_view[sub_start:sub_end] != new_view[sub_start:sub_end]
+                    np.any(different, axis=1, out=self.changed[sub_start:sub_end])
+                    for name, span in spans.items():
+                        np.any(different[:, span], axis=1, out=self.attributes[name][sub_start:sub_end])
+            del old_view, new_view
+        return self
+
+    @property
+    def ranges(self) -> np.ndarray:
+        return find_ranges(self.changed)
+
+    def range_attributes(self, ranges: np.ndarray) -> list:
+        """Names of the attributes changed within each range"""
+        if not len(ranges):
+            return []
+        # Reducing over start, end, start, ... gives every range followed by the gap after it
+        indices = ranges.reshape(-1)
+        if indices[-1] == len(self.changed):
+            indices = indices[:-1]
+        changed = {name: np.logical_or.reduceat(mask, indices)[::2] for name, mask in self.attributes.items()}
+        return [[name for name, flags in changed.items() if flags[index]] for index in range(len(ranges))]
+
+    def to_dict(self, limit: Optional[int] = None) -> dict:
+        ranges = self.ranges
+        shown = ranges[:limit] if limit else ranges
+        return {
+            'old': self.old,
+            'new': self.new,
+            'stride': self.layout.stride,
+            'old_vertices': self.old_vertices,
+            'new_vertices': self.new_vertices,
+            'changed_vertices': int(self.changed.sum()),
+            'attributes': {name: int(mask.sum()) for name, mask in self.attributes.items()},
+            'range_count': len(ranges),
+            'ranges': [{'start': int(start), 'end': int(end), 'attributes': names}
+                       for (start, end), names in zip(shown, self.range_attributes(shown))]
+        }
+
+    def dumps(self, format_: Optional[str] = 'text', limit: Optional[int] = 20) -> str:
+        result = self.to_dict(limit)
+        if format_ == 'json':
+            return json.dumps(result, indent=4)
+
+        lines = [f'{self.old} -> {self.new} (stride {self.layout.stride})']
+        if self.old_vertices != self.new_vertices:
+            lines.append(f'Vertex count changed from {self.old_vertices} to {self.new_vertices}')
+        lines.append(f'{result["changed_vertices"]} of {len(self.changed)} vertices changed '
+                     f'in {result["range_count"]} range(s)')
+        for name, count in result['attributes'].items():
+            lines.append(f'    {name:<16} {count:>10} vertices')
+        for item in result['ranges']:
+            lines.append(f'    [{item["start"]}, {item["end"]}) {", ".join(item["attributes"])}')
+        if result['range_count'] > len(result['ranges']):
+            lines.append(f'    ... {result["range_count"] - len(result["ranges"])} more range(s)')
+        return '\n'.join(lines)
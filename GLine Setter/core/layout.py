@@ -0,0 +1,329 @@
+from core import buffer
+
+from typing import Optional, Union, Iterable
+import numpy as np
+import configparser
+import logging
+import regex
+import os
+
+REFORMAT = regex.compile(r'''
+    ^
+    (?:DXGI_FORMAT_)?
+    (?P<channels>(?:[RGBAX]\d+)+)
+    _
+    (?P<type>UNORM|SNORM|UINT|SINT|FLOAT|TYPELESS)
+    $
+''', regex.VERBOSE | regex.IGNORECASE)
+RECHANNEL = regex.compile(r'[RGBAX](\d+)', regex.IGNORECASE)
+REELEMENT = regex.compile(r'^element\[(?P<index>\d+)\]:\s*$', regex.IGNORECASE)
+
+TYPES = {
+    ('UNORM', 8): 'u1', ('UINT', 8): 'u1', ('TYPELESS', 8): 'u1',
+    ('SNORM', 8): 'i1', ('SINT', 8): 'i1',
+    ('UNORM', 16): '<u2', ('UINT', 16): '<u2', ('TYPELESS', 16): '<u2',
+    ('SNORM', 16): '<i2', ('SINT', 16): '<i2', ('FLOAT', 16): '<f2',
+    ('UINT', 32): '<u4', ('TYPELESS', 32): '<u4', ('SINT', 32): '<i4', ('FLOAT', 32): '<f4'
+}
+
+
+def parse_format(format_: str) -> tuple:
+    """Converts a DXGI format into (numpy type, component count, normalized)"""
+    match = REFORMAT.match(format_.strip())
+    if match is None:
+        raise ValueError(f'Unsupported format {format_}')
+
+    widths = set(int(width) for width in RECHANNEL.findall(match.group('channels')))
+    type_ = match.group('type').upper()
+    if len(widths) != 1 or (type_, widths.copy().pop()) not in TYPES:
+        raise ValueError(f'Unsupported format {format_}')
+    count = len(RECHANNEL.findall(match.group('channels')))
+    return TYPES[(type_, widths.pop())], count, type_ in ('UNORM', 'SNORM')
+
+
+def read_config(ini: str) -> configparser.ConfigParser:
+    # Mod configs have commands and duplicated sections that aren't valid for configparser,
+    # everything that can be parsed is still kept
+    config = configparser.ConfigParser(strict=False, interpolation=None, allow_no_value=True)
+    try:
+        config.read(ini, encoding='utf-8')
+    except configparser.ParsingError:
+        pass
+    return config
+
+
+class Resource(object):
+    """Buffer resource declared in a mod ini"""
+
+    def __init__(self, name: str, filename: Optional[str] = None, stride: Optional[int] = None,
+                 format_: Optional[str] = None) -> None:
+        self.name = name
+        self.filename = filename
+        self.stride = stride
+        self.format = format_
+
+    @classmethod
+    def from_section(cls, ini: str, section: configparser.SectionProxy) -> 'Resource':
+        filename = section.get('filename')
+        if filename:
+            filename = os.path.join(os.path.dirname(ini), *filename.strip().replace('\\', '/').split('/'))
+        stride = section.get('stride')
+        return cls(name=section.name[len('Resource'):], filename=filename,
+                   stride=int(stride) if stride else None, format_=section.get('format'))
+
+    def __repr__(self) -> str:
+        return f'{__class__.__name__}({self.name}, stride={self.stride}, filename={self.filename})'
+
+    __str__ = __repr__
+
+
+def path_key(path: str) -> str:
+    """Key used to compare paths, mods are made for Windows so paths are case insensitive"""
+    return os.path.normcase(os.path.abspath(path)).lower()
+
+
+def read_resources(ini: Union[str, configparser.ConfigParser], filename: Optional[str] = None) -> dict:
+    """Returns every Resource* section of the ini as {name: Resource}"""
+    config = read_config(ini) if isinstance(ini, str) else ini
+    resources = dict()
+    for name in config.sections():
+        if not name.lower().startswith('resource'):
+            continue
+        resource = Resource.from_section(filename or ini, config[name])
+        resources[resource.name] = resource
+    return resources
+
+
+def find_resource(ini: str, filename: str) -> Resource:
+    """Returns the Resource section of the ini loading the file, with the filename as found on disk"""
+    key = path_key(filename)
+    for resource in read_resources(ini).values():
+        if resource.filename is not None and path_key(resource.filename) == key:
+            resource.filename = filename
+            return resource
+    raise KeyError(f'No resource of {ini} loads {filename}')
+
+
+def element_runs(elements: list, stride: int) -> list:
+    """Runs of elements following each other without gap whose span is the stride"""
+    elements = sorted(elements, key=lambda element: element.offset)
+    runs = []
+    for first in range(len(elements)):
+        end = elements[first].offset
+        for last in range(first, len(elements)):
+            if elements[last].offset > end:
+                break
+            end = max(end, elements[last].offset + elements[last].size)
+            if end - elements[first].offset == stride:
+                runs.append(elements[first:last + 1])
+                break
+            if end - elements[first].offset > stride:
+                break
+    return runs
+
+
+class Element(object):
+    def __init__(self, name: str, format_: str, offset: int, slot: Optional[int] = 0) -> None:
+        self.name = name
+        self.format = format_
+        self.offset = offset
+        self.slot = slot
+        self.type, self.count, self.normalized = parse_format(format_)
+
+    @property
+    def size(self) -> int:
+        return np.dtype(self.type).itemsize * self.count
+
+    def __repr__(self) -> str:
+        return f'{__class__.__name__}({self.name}, {self.format}, offset={self.offset})'
+
+    __str__ = __repr__
+
+
+class VertexLayout(object):
+    """Describes the attributes of a vertex buffer as a numpy structured dtype
+
+    Attribute names follow the semantic names of the .fmt file with the semantic index
+    appended if it's not 0 (COLOR, TEXCOORD, TEXCOORD1, ...). Bytes that aren't covered
+    by any element are left out of the dtype.
+    """
+
+    def __init__(self, stride: int, elements: Iterable[Element]) -> None:
+        self.stride = stride
+        self.elements = {element.name: element for element in elements}
+        for element in self.elements.values():
+            if element.offset + element.size > stride:
+                raise ValueError(f'{element} is outside of stride {stride}')
+
+        self.dtype = np.dtype({
+            'names': list(self.elements),
+            'formats': [(element.type, (element.count,)) for element in self.elements.values()],
+            'offsets': [element.offset for element in self.elements.values()],
+            'itemsize': stride
+        })
+
+    @classmethod
+    def default(cls, stride: int) -> 'VertexLayout':
+        """Layout assumed by GLine/GColor, a R8G8B8A8 COLOR at the start of each vertex"""
+        return cls(stride, [Element('COLOR', 'R8G8B8A8_UNORM', 0)])
+
+    @classmethod
+    def from_fmt(cls, filename: str, stride: Optional[int] = None) -> 'VertexLayout':
+        """Reads the element layout of a .fmt file
+
+        The .fmt describes the whole vertex while mods split it in several buffers (Position,
+        Blend, Texcoord), the elements of the buffer are the contiguous run of elements spanning
+        the stride, with their offsets made relative to the start of the run. When several runs
+        span the stride a run with COLOR is preferred, then a run at the start or the end of the vertex.
+        """
+        fmt_stride = None
+        elements = []
+        current = None
+
+        with open(filename, 'r', encoding='utf-8') as file:
+            for line in file:
+                line = line.strip()
+                if REELEMENT.match(line):
+                    current = dict()
+                    elements.append(current)
+                    continue
+                elif ':' not in line:
+                    continue
+
+                key, value = (part.strip() for part in line.split(':', 1))
+                if current is None:
+                    if key.lower() == 'stride':
+                        fmt_stride = int(value)
+                    continue
+                current[key.lower()] = value
+            file.close()
+
+        slots = dict()
+        for data in elements:
+            index = int(data.get('semanticindex', 0))
+            name = data['semanticname'].upper() + (str(index) if index else '')
+            element = Element(name, data['format'], int(data.get('alignedbyteoffset', 0)),
+                              int(data.get('inputslot', 0)))
+            slots.setdefault(element.slot, []).append(element)
+
+        stride = stride or fmt_stride
+        if stride is None:
+            raise ValueError(f'Unable to find stride of {filename}')
+
+        runs = []
+        for slot in slots.values():
+            end = max(element.offset + element.size for element in slot)
+            for run in element_runs(slot, stride):
+                color = any(element.name == 'COLOR' for element in run)
+                aligned = run[0].offset == 0 or run[-1].offset + run[-1].size == end
+                runs.append((not color, not aligned, run))
+        if not runs:
+            raise ValueError(f'No elements of {filename} span stride {stride}')
+        run = min(runs, key=lambda item: item[:2])[2]
+        start = run[0].offset
+        for element in run:
+            element.offset -= start
+        return cls(stride, run)
+
+    @classmethod
+    def for_resource(cls, resource: Resource, logger: Optional[logging.Logger] = None) -> 'VertexLayout':
+        """Builds the layout from the .fmt of the buffer, or the default layout if there is none
+
+        Every .fmt next to the buffer is tried, the ones sharing the longest prefix with the buffer
+        first (KeqingTexcoord.fmt, Keqing.fmt, KeqingBody.fmt). A .fmt that doesn't describe this
+        buffer is skipped, falling back to the default layout is logged.
+        """
+        if resource.stride is None:
+            raise ValueError(f'Resource{resource.name} has no stride')
+        if resource.filename is None:
+            return cls.default(resource.stride)
+
+        folder, name = os.path.split(os.path.splitext(resource.filename)[0])
+        candidates = []
+        if os.path.isdir(folder or '.'):
+            candidates = [file for file in os.listdir(folder or '.') if file.lower().endswith('.fmt')]
+        candidates.sort(key=lambda file: (-len(os.path.commonprefix([name.lower(), file[:-4].lower()])), file))
+
+        for fmt in candidates:
+            fmt = os.path.join(folder, fmt)
+            try:
+                return cls.from_fmt(fmt, resource.stride)
+            except (ValueError, KeyError) as e:
+                if logger is not None:
+                    logger.warning(f'Skipping {fmt}, {e}')
+        if candidates and logger is not None:
+            logger.warning(f'No .fmt describes {resource.filename}, COLOR is assumed at the start of each vertex')
+        return cls.default(resource.stride)
+
+    @property
+    def names(self) -> list:
+        return list(self.elements)
+
+    def offset(self, name: str, component: Optional[int] = 0) -> int:
+        element = self[name]
+        return element.offset + component * np.dtype(element.type).itemsize
+
+    def byte_offsets(self, name: str, components: Optional[Union[int, list]] = None) -> list:
+        """Offsets of every byte of the components within a vertex"""
+        element = self[name]
+        if components is None:
+            components = range(element.count)
+        elif isinstance(components, int):
+            components = [components]
+
+        itemsize = np.dtype(element.type).itemsize
+        return [self.offset(name, component) + index for component in components for index in range(itemsize)]
+
+    def view(self, data: buffer.Buffer) -> np.ndarray:
+        """Structured view of every whole vertex of the buffer, no copy is made"""
+        vertices = buffer.vertex_view(data, self.stride)
+        return vertices.reshape(-1).view(self.dtype)
+
+    def read(self, data: buffer.Buffer, name: str) -> np.ndarray:
+        """Returns a (vertices, components) view of an attribute"""
+        return self.view(data)[name]
+
+    def encode(self, name: str, value: Union[int, float, np.ndarray]) -> np.ndarray:
+        """Converts a 0-255 value to the type of the attribute, float attributes are scaled to 0-1"""
+        element = self[name]
+        value = np.asarray(value)
+        if np.dtype(element.type).kind == 'f':
+            value = value / 255
+        return value.astype(element.type)
+
+    def select(self, data: buffer.Buffer, name: str, components: Optional[Union[int, list]] = None) -> np.ndarray:
+        attribute = self.read(data, name)
+        if components is None:
+            return attribute
+        return attribute[:, components]
+
+    def matches(self, data: buffer.Buffer, name: str, value: Union[int, float, np.ndarray],
+                components: Optional[Union[int, list]] = None) -> bool:
+        """Checks if every vertex already has the value, so the write can be skipped"""
+        return bool(np.all(self.select(data, name, components) == self.encode(name, value)))
+
+    def write(self, data: buffer.Buffer, name: str, value: Union[int, float, np.ndarray],
+              components: Optional[Union[int, list]] = None) -> None:
+        """Sets an attribute, or some of its components, of every vertex
+
+        Values of 8 bit UNORM/UINT attributes are in 0-255, float attributes take
+        the same range and are scaled to 0-1.
+        """
+        attribute = self.read(data, name)
+        if components is None:
+            attribute[:] = self.encode(name, value)
+        else:
+            attribute[:, components] = self.encode(name, value)
+
+    def __getitem__(self, name: str) -> Element:
+        if name not in self.elements:
+            raise KeyError(f'Attribute {name} not found in layout')
+        return self.elements[name]
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.elements
+
+    def __repr__(self) -> str:
+        return f'{__class__.__name__}(stride={self.stride}, {", ".join(self.elements)})'
+
+    __str__ = __repr__
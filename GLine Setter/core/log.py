@@ -0,0 +1,124 @@
+from colorama import Fore, Style
+import colorama
+
+from logging.handlers import QueueHandler, QueueListener
+from collections import Counter
+from typing import Optional
+import threading
+import logging
+import atexit
+import queue
+
+colorama.init()
+
+VERBOSITY = ('verbose', 'summary', 'quiet')
+
+_listeners = []
+
+
+class CustomFormatter(logging.Formatter):
+    magenta = Fore.LIGHTMAGENTA_EX
+    light_red = Fore.LIGHTRED_EX
+    yellow = Fore.YELLOW
+    green = Fore.GREEN
+    red = Fore.RED
+    reset = Fore.RESET
+
+    format_ = f'[{{0}}%(levelname)s{Style.RESET_ALL}] [%(filename)s:%(lineno)s] %(message)s'
+
+    FORMATS = {
+        logging.DEBUG: format_.format(magenta),
+        logging.INFO: format_.format(green),
+        logging.WARNING: format_.format(yellow),
+        logging.ERROR: format_.format(light_red),
+        logging.CRITICAL: format_.format(red)
+    }
+
+    def __init__(self) -> None:
+        super(CustomFormatter, self).__init__()
+        # Formatters are built once instead of on every record
+        self._formatters = {level: logging.Formatter(fmt) for level, fmt in self.FORMATS.items()}
+        self._default = logging.Formatter(self.format_.format(self.reset))
+
+    def format(self, record: logging.LogRecord) -> str:
+        return self._formatters.get(record.levelno, self._default).format(record)
+
+
+class SummaryFilter(logging.Filter):
+    """Counts per-file detail records instead of letting them through
+
+    Detail records are the ones logged with extra={'file': ..., 'action': ...}.
+    Filtering is done on the logger so dropped records never reach the queue.
+    """
+
+    def __init__(self) -> None:
+        super(SummaryFilter, self).__init__()
+        self.counts = Counter()
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        file = getattr(record, 'file', None)
+        action = getattr(record, 'action', None)
+        if file is None or action is None:
+            return True
+
+        with self._lock:
+            self.counts[(file, action)] += 1
+        return False
+
+    def pop(self) -> list:
+        with self._lock:
+            counts = sorted(self.counts.items())
+            self.counts.clear()
+        return counts
+
+
+def setup_logger(name: str, level: Optional[int] = logging.INFO) -> logging.Logger:
+    """Creates a logger whose handler runs on a background thread"""
+    logger = logging.Logger(name)
+    logger.setLevel(level)
+
+    stream_handler = logging.StreamHandler()
+    stream_handler.setFormatter(CustomFormatter())
+
+    log_queue = queue.SimpleQueue()
+    logger.addHandler(QueueHandler(log_queue))
+
+    listener = QueueListener(log_queue, stream_handler, respect_handler_level=True)
+    listener.start()
+    _listeners.append(listener)
+    return logger
+
+
+def set_verbosity(logger: logging.Logger, verbosity: str) -> None:
+    if verbosity not in VERBOSITY:
+        raise ValueError(f'Unknown verbosity {verbosity}')
+
+    for filter_ in logger.filters[:]:
+        if isinstance(filter_, SummaryFilter):
+            logger.removeFilter(filter_)
+
+    if verbosity == 'quiet':
+        logger.setLevel(logging.WARNING)
+        return
+    logger.setLevel(logging.INFO)
+    if verbosity == 'summary':
+        logger.addFilter(SummaryFilter())
+
+
+def summarize(logger: logging.Logger) -> None:
+    """Logs the aggregated per-file counts collected in summary verbosity"""
+    for filter_ in logger.filters:
+        if not isinstance(filter_, SummaryFilter):
+            continue
+        for (file, action), count in filter_.pop():
+            logger.info(f'{file}: {count} {action}')
+
+
+def shutdown() -> None:
+    """Stops every listener, flushing any pending record"""
+    while _listeners:
+        _listeners.pop().stop()
+
+
+atexit.register(shutdown)
@@ -0,0 +1,143 @@
+from core import buffer, layout
+
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+import numpy as np
+import logging
+import json
+
+CHANNELS = ('R', 'G', 'B', 'A')
+BLOCK = 1 << 20
+PREVIEW = ' .:-=+*#%@'
+
+
+def quantize(values: np.ndarray) -> np.ndarray:
+    """Float attributes are mapped back to 0-255 so every channel shares the same 256 bins"""
+    if values.dtype == np.uint8:
+        return values
+    elif values.dtype.kind == 'f':
+        values = values * 255
+    return np.clip(np.rint(values), 0, 255).astype(np.uint8)
+
+
+class ChannelStats(object):
+    """Min, max, mean and 256 bin histogram of a channel, all derived from the histogram"""
+
+    def __init__(self, histogram: Optional[np.ndarray] = None) -> None:
+        self.histogram = np.zeros(256, dtype=np.int64) if histogram is None else histogram
+
+    def add(self, values: np.ndarray) -> None:
+        self.histogram += np.bincount(quantize(values), minlength=256)
+
+    def merge(self, other: 'ChannelStats') -> None:
+        self.histogram += other.histogram
+
+    @property
+    def count(self) -> int:
+        return int(self.histogram.sum())
+
+    @property
+    def min(self) -> Optional[int]:
+        used = np.flatnonzero(self.histogram)
+        return int(used[0]) if len(used) else None
+
+    @property
+    def max(self) -> Optional[int]:
+        used = np.flatnonzero(self.histogram)
+        return int(used[-1]) if len(used) else None
+
+    @property
+    def mean(self) -> Optional[float]:
+        if not self.count:
+            return
+        return float(self.histogram @ np.arange(256)) / self.count
+
+    def preview(self, width: Optional[int] = 32) -> str:
+        """Histogram shrunk to width bins, each drawn with a character by its height"""
+        bins = self.histogram.reshape(width, -1).sum(axis=1)
+        if not bins.any():
+            return ' ' * width
+        levels = np.ceil(bins / bins.max() * (len(PREVIEW) - 1)).astype(int)
+        return ''.join(PREVIEW[level] for level in levels)
+
+    def to_dict(self) -> dict:
+        mean = self.mean
+        return {
+            'min': self.min,
+            'max': self.max,
+            'mean': None if mean is None else round(mean, 3),
+            'histogram': self.histogram.tolist()
+        }
+
+
+class BufferStats(object):
+    """Statistics of every COLOR channel of a buffer, or of several buffers once merged"""
+
+    def __init__(self, name: str, vertices: Optional[int] = 0) -> None:
+        self.name = name
+        self.vertices = vertices
+        self.channels = {channel: ChannelStats() for channel in CHANNELS}
+
+    @classmethod
+    def from_buffer(cls, ini: str, texcoord: str) -> 'BufferStats':
+        """Reads the buffer read-only in blocks of vertices, so bincount never copies the whole channel"""
+        vertex_layout = layout.VertexLayout.for_resource(layout.find_resource(ini, texcoord))
+        result = cls(texcoord)
+        with buffer.map_buffer(texcoord, writable=False) as data:
+            color = vertex_layout.read(data, 'COLOR')
+            result.vertices = len(color)
+            for start in range(0, len(color), BLOCK):
+                block = color[start:start + BLOCK]
+                for component, channel in zip(range(block.shape[1]), CHANNELS):
+                    result.channels[channel].add(block[:, component])
+        return result
+
+    def merge(self, other: 'BufferStats') -> None:
+        self.vertices += other.vertices
+        for channel, stats in other.channels.items():
+            self.channels[channel].merge(stats)
+
+    def to_dict(self) -> dict:
+        return {
+            'file': self.name,
+            'vertices': self.vertices,
+            'channels': {channel: stats.to_dict() for channel, stats in self.channels.items() if stats.count}
+        }
+
+
+def inspect(pairs: list, logger: logging.Logger, workers: Optional[int] = None) -> list:
+    """Returns the BufferStats of every (ini, texcoord) pair, buffers are read in parallel"""
+    def read(ini: str, texcoord: str) -> Optional[BufferStats]:
+        try:
+            return BufferStats.from_buffer(ini, texcoord)
+        except (OSError, ValueError, KeyError) as e:
+            logger.error(f'{type(e).__name__} {e} while inspecting {texcoord}')
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        results = list(executor.map(read, *zip(*pairs))) if pairs else []
+    return [stats for stats in results if stats is not None]
+
+
+def total(results: list) -> BufferStats:
+    result = BufferStats('total')
+    for stats in results:
+        result.merge(stats)
+    return result
+
+
+def dumps(results: list, format_: Optional[str] = 'text') -> str:
+    """Formats the statistics of every buffer, a total is added when there is more than one"""
+    if len(results) > 1:
+        results = results + [total(results)]
+    if format_ == 'json':
+        return json.dumps([stats.to_dict() for stats in results], indent=4)
+
+    lines = [f'{"channel":<8} {"min":>5} {"max":>5} {"mean":>8}  histogram (0-255)']
+    for stats in results:
+        lines.append(f'{stats.name} ({stats.vertices} vertices)')
+        for channel, channel_stats in stats.channels.items():
+            if not channel_stats.count:
+                continue
+            lines.append(f'{channel:<8} {channel_stats.min:>5} {channel_stats.max:>5} {channel_stats.mean:>8.2f}  '
+                         f'|{channel_stats.preview()}|')
+    return '\n'.join(lines)
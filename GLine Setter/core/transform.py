@@ -0,0 +1,87 @@
+from typing import Optional, Iterable
+import numpy as np
+import regex
+
+RESEPARATOR = regex.compile(r'[\s,;]+')
+
+DOMAIN = np.arange(256, dtype=np.float64)
+
+
+class Transform(object):
+    """Per-vertex transform of a 0-255 channel
+
+    Every transform is a 256 entry lookup table so applying one costs a single gather
+    over the strided view, no matter how many transforms were combined.
+    """
+
+    def __init__(self, lut: Iterable, name: str) -> None:
+        self.lut = np.clip(np.rint(np.asarray(lut, dtype=np.float64)), 0, 255).astype(np.uint8)
+        if self.lut.shape != (256,):
+            raise ValueError(f'Lookup table must have 256 entries, got {self.lut.size}')
+        self.name = name
+
+    @property
+    def idempotent(self) -> bool:
+        """A transform that gives the same result when applied twice, only those can be skipped on reruns"""
+        return bool(np.array_equal(self.lut[self.lut], self.lut))
+
+    @property
+    def value(self) -> Optional[int]:
+        """Value given to every vertex when the transform doesn't depend on the current one, None otherwise"""
+        if np.all(self.lut == self.lut[0]):
+            return int(self.lut[0])
+
+    @classmethod
+    def constant(cls, value: int) -> 'Transform':
+        return cls(np.full(256, value), f'set({value})')
+
+    @classmethod
+    def scale(cls, factor: float) -> 'Transform':
+        return cls(DOMAIN * factor, f'scale({factor})')
+
+    @classmethod
+    def add(cls, value: int) -> 'Transform':
+        return cls(DOMAIN + value, f'add({value})')
+
+    @classmethod
+    def clamp(cls, low: int, high: int) -> 'Transform':
+        if low > high:
+            raise ValueError(f'Invalid clamp range {low}-{high}')
+        return cls(np.clip(DOMAIN, low, high), f'clamp({low},{high})')
+
+    @classmethod
+    def table(cls, filename: str) -> 'Transform':
+        """Reads 256 values separated by whitespace or commas"""
+        with open(filename, 'r', encoding='utf-8') as file:
+            values = [int(value) for value in RESEPARATOR.split(file.read().strip()) if value]
+            file.close()
+        if any(value < 0 or value > 255 for value in values):
+            raise ValueError('Lookup table values must be between 0 and 255')
+        return cls(values, f'lut({filename})')
+
+    @classmethod
+    def curve(cls, points: str) -> 'Transform':
+        """Piecewise linear curve through 'in:out' points, eg. '0:0,128:100,255:140'"""
+        try:
+            pairs = sorted(tuple(int(value) for value in point.split(':')) for point in points.split(','))
+            x, y = zip(*pairs)
+        except ValueError:
+            raise ValueError(f'Invalid curve {points!r}, expected in:out points separated by comma')
+        return cls(np.interp(DOMAIN, x, y), f'curve({points})')
+
+    def then(self, other: 'Transform') -> 'Transform':
+        """Combines two transforms into a single lookup table"""
+        return Transform(other.lut[self.lut], f'{self.name}>{other.name}')
+
+    def apply(self, values: np.ndarray) -> np.ndarray:
+        """Returns the transformed values, float attributes are mapped from 0-1"""
+        if values.dtype == np.uint8:
+            return self.lut[values]
+        elif values.dtype.kind == 'f':
+            return (np.interp(values * 255, DOMAIN, self.lut) / 255).astype(values.dtype)
+        return np.interp(values, DOMAIN, self.lut).astype(values.dtype)
+
+    def __repr__(self) -> str:
+        return f'{__class__.__name__}({self.name})'
+
+    __str__ = __repr__
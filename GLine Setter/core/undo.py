@@ -0,0 +1,228 @@
+from core import buffer
+
+from typing import Optional, Callable
+import numpy as np
+import struct
+import zlib
+import os
+
+MAGIC = b'GLUN'
+# Version 1 records are zlib compressed with the checksum of the whole buffer, they can still be reverted
+VERSION = 2
+HEADER = struct.Struct('<4sHIIIH')
+LENGTH = struct.Struct('<I')
+
+
+def undo_path(path: str) -> str:
+    return f'{path}.undo'
+
+
+def checksum(data: buffer.Buffer) -> int:
+    return zlib.crc32(data)
+
+
+def planes(data: buffer.Buffer, stride: int, offsets: list) -> np.ndarray:
+    """Bytes at each offset of every vertex, one row per offset
+
+    The offsets are copied one at a time so numpy only does simple strided copies.
+    """
+    view = buffer.vertex_view(data, stride)
+    result = np.empty((len(offsets), len(view)), dtype=np.uint8)
+    for index, offset in enumerate(offsets):
+        result[index] = view[:, offset]
+    return result
+
+
+def plane_checksum(checksums: list) -> int:
+    """Checksum of the touched bytes from the crc32 of each offset"""
+    return zlib.crc32(struct.pack(f'<{len(checksums)}I', *checksums))
+
+
+class UndoRecord(object):
+    """Original bytes of a single edit
+
+    Only the bytes at the touched offsets of each vertex are kept, uncompressed, one offset
+    after the other. The checksum covers those bytes after the edit, a revert is refused if
+    they don't match it anymore. Neither needs the rest of the buffer, so recording costs a
+    pass over the touched bytes only.
+    """
+
+    def __init__(self, stride: int, vertices: int, offsets: list, original: bytes,
+                 result: Optional[int] = None, version: Optional[int] = VERSION) -> None:
+        self.stride = stride
+        self.vertices = vertices
+        self.offsets = list(offsets)
+        self.original = original
+        self.checksum = result
+        self.version = version
+
+    @classmethod
+    def capture(cls, data: buffer.Buffer, stride: int, offsets: list,
+                original: Optional[np.ndarray] = None) -> 'UndoRecord':
+        """Saves the bytes at offsets of every vertex, must be called before the edit
+
+        original is planes() of the buffer when the caller already read them.
+        """
+        if original is None:
+            original = planes(data, stride, offsets)
+        return cls(stride, original.shape[1], offsets, original.tobytes())
+
+    def finish(self, data: buffer.Buffer, checksums: Optional[list] = None) -> None:
+        """Stores the checksum of the edited bytes, checksums is the crc32 of each offset if already known"""
+        if checksums is None:
+            checksums = [zlib.crc32(plane) for plane in planes(data, self.stride, self.offsets)]
+        self.checksum = plane_checksum(checksums)
+
+    def apply(self, data: buffer.Buffer) -> None:
+        """Scatters the original bytes back into the buffer"""
+        view = buffer.vertex_view(data, self.stride)
+        if len(view) != self.vertices:
+            raise ValueError(f'Buffer has {len(view)} vertices, expected {self.vertices}')
+
+        if self.version == 1:
+            if checksum(data) != self.checksum:
+                raise ValueError('Buffer was modified after the edit, unable to revert')
+            original = np.frombuffer(zlib.decompress(self.original), dtype=np.uint8)
+            view[:, self.offsets] = original.reshape(self.vertices, len(self.offsets))
+            return
+
+        current = planes(data, self.stride, self.offsets)
+        if plane_checksum([zlib.crc32(plane) for plane in current]) != self.checksum:
+            raise ValueError('Buffer was modified after the edit, unable to revert')
+        original = np.frombuffer(self.original, dtype=np.uint8).reshape(len(self.offsets), self.vertices)
+        for index, offset in enumerate(self.offsets):
+            view[:, offset] = original[index]
+
+    def pack(self) -> bytes:
+        offsets = struct.pack(f'<{len(self.offsets)}H', *self.offsets)
+        header = HEADER.pack(MAGIC, self.version, self.stride, self.vertices, self.checksum, len(self.offsets))
+        return b''.join((header, offsets, LENGTH.pack(len(self.original)), self.original))
+
+    @classmethod
+    def unpack_all(cls, data: bytes) -> list:
+        records = []
+        position = 0
+        while position < len(data):
+            magic, version, stride, vertices, result, count = HEADER.unpack_from(data, position)
+            if magic != MAGIC or version not in (1, VERSION):
+                raise ValueError('Invalid undo record')
+            position += HEADER.size
+
+            offsets = struct.unpack_from(f'<{count}H', data, position)
+            position += count * 2
+            length, = LENGTH.unpack_from(data, position)
+            position += LENGTH.size
+
+            records.append(cls(stride, vertices, offsets, data[position:position + length], result, version))
+            position += length
+        return records
+
+
+class ChunkRecorder(object):
+    """Builds an UndoRecord chunk by chunk for buffers that are streamed instead of mapped
+
+    Every chunk is captured since a later chunk can still be edited, only the touched
+    bytes of each chunk are kept. They're kept per offset and joined once the buffer
+    was streamed, so the record is the same as the one of a mapped buffer.
+    """
+
+    def __init__(self, stride: int, offsets: list) -> None:
+        self.stride = stride
+        self.offsets = list(offsets)
+        self.vertices = 0
+        self._original = [[] for _ in self.offsets]
+        self._checksums = [0] * len(self.offsets)
+
+    def capture(self, chunk: buffer.Buffer) -> None:
+        """Saves the bytes at offsets of every vertex in the chunk, must be called before the edit"""
+        original = planes(chunk, self.stride, self.offsets)
+        for index, plane in enumerate(original):
+            self._original[index].append(plane.tobytes())
+        self.vertices += original.shape[1]
+
+    def update(self, chunk: buffer.Buffer) -> None:
+        """Adds the edited chunk to the checksum, chunks must be given in order"""
+        for index, plane in enumerate(planes(chunk, self.stride, self.offsets)):
+            self._checksums[index] = zlib.crc32(plane, self._checksums[index])
+
+    def record(self) -> UndoRecord:
+        original = b''.join(b''.join(chunks) for chunks in self._original)
+        return UndoRecord(self.stride, self.vertices, self.offsets, original, plane_checksum(self._checksums))
+
+
+def edit(data: buffer.Buffer, stride: int, offsets: list,
+         func: Callable[[buffer.Buffer], bool]) -> Optional[UndoRecord]:
+    """Runs func(data) on a mapped buffer while recording the edit, returns None if nothing changed"""
+    record = UndoRecord.capture(data, stride, offsets)
+    if not func(data):
+        return
+    record.finish(data)
+    return record
+
+
+def fill(data: buffer.Buffer, stride: int, offsets: list, pattern: bytes) -> Optional[UndoRecord]:
+    """Sets the bytes at offsets of every vertex to pattern while recording the edit, returns None if they already are
+
+    The touched bytes are read once for both the check and the record, and the checksum
+    is taken from the pattern instead of reading the edited bytes again.
+    """
+    original = planes(data, stride, offsets)
+    if all(np.all(plane == value) for plane, value in zip(original, pattern)):
+        return
+    record = UndoRecord.capture(data, stride, offsets, original)
+    view = buffer.vertex_view(data, stride)
+    for offset, value in zip(offsets, pattern):
+        view[:, offset] = value
+    record.finish(data, [zlib.crc32(bytes([value]) * original.shape[1]) for value in pattern])
+    return record
+
+
+def stream_edit(path: str, stride: int, offsets: list, edit: Callable[[np.ndarray], bool],
+                chunk_size: Optional[int] = buffer.DEFAULT_CHUNK_SIZE) -> Optional[UndoRecord]:
+    """Streams the buffer through edit(chunk) while recording the edit, returns None if nothing changed"""
+    recorder = ChunkRecorder(stride, offsets)
+
+    def func(chunk: np.ndarray) -> bool:
+        recorder.capture(chunk)
+        modified = edit(chunk)
+        recorder.update(chunk)
+        return modified
+
+    if not buffer.stream_buffer(path, stride, func, chunk_size):
+        return
+    return recorder.record()
+
+
+def push(path: str, record: UndoRecord) -> None:
+    """Appends a record to the undo file of the buffer"""
+    with open(undo_path(path), 'ab') as file:
+        file.write(record.pack())
+        file.close()
+
+
+def load(path: str) -> list:
+    if not os.path.exists(undo_path(path)):
+        return []
+    with open(undo_path(path), 'rb') as file:
+        data = file.read()
+        file.close()
+    return UndoRecord.unpack_all(data)
+
+
+def revert(path: str) -> int:
+    """Reverts the last edit of a buffer, returns the amount of edits left to revert"""
+    records = load(path)
+    if not records:
+        raise FileNotFoundError(f'No edit to revert for {path}')
+
+    with buffer.map_buffer(path) as data:
+        records[-1].apply(data)
+    records.pop()
+
+    if not records:
+        os.remove(undo_path(path))
+        return 0
+    with open(undo_path(path), 'wb') as file:
+        file.write(b''.join(record.pack() for record in records))
+        file.close()
+    return len(records)
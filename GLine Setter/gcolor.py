@@ -3,130 +3,118 @@
 # Original code by silent (https://github.com/SilentNightSound/GI-Model-Importer/blob/main/Tools/genshin_set_color.py)
 
 
-from colorama import Fore, Style
-import colorama
+from core import log, buffer, layout, batch, cache, undo, stats
 
-from typing import Union
-import configparser
-import logging
-import glob
+from typing import Optional
+import functools
+import argparse
+import sys
 import os
 
-colorama.init()
+logger = log.setup_logger(__name__)
 
 
-class CustomFormatter(logging.Formatter):
-    magenta = Fore.LIGHTMAGENTA_EX
-    light_red = Fore.LIGHTRED_EX
-    yellow = Fore.YELLOW
-    green = Fore.GREEN
-    red = Fore.RED
-    reset = Fore.RESET
+def apply_colors(channels: dict, vertex_layout: layout.VertexLayout, data: buffer.Buffer) -> bool:
+    if vertex_layout.matches(data, 'COLOR', list(channels.values()), components=list(channels)):
+        return False
+    vertex_layout.write(data, 'COLOR', list(channels.values()), components=list(channels))
+    return True
 
-    format_ = f'[{{0}}%(levelname)s{Style.RESET_ALL}] [%(filename)s:%(lineno)s] %(message)s'
 
-    FORMATS = {
-        logging.DEBUG: format_.format(magenta),
-        logging.INFO: format_.format(green),
-        logging.WARNING: format_.format(yellow),
-        logging.ERROR: format_.format(light_red),
-        logging.CRITICAL: format_.format(red)
-    }
-
-    def format(self, record):
-        log_fmt = self.FORMATS.get(record.levelno)
-        formatter = logging.Formatter(log_fmt)
-        return formatter.format(record)
-
-
-logger = logging.Logger(__name__)
-logger.setLevel(logging.INFO)
-
-stream_handler = logging.StreamHandler()
-stream_handler.setFormatter(CustomFormatter())
-
-logger.addHandler(stream_handler)
-
-
-def get_file(type_: str) -> Union[str, list, None]:
-    files = None
-    type_ = type_.lower()
+def start(colors: dict, ini: str, texcoord: str, buffer_cache: Optional[cache.BufferCache] = None,
+          chunk_size: Optional[int] = None) -> bool:
+    channels = {offset: value for offset, value in enumerate(colors.values()) if value is not None}
+    if not channels:
+        logger.info('No color value set, skipping')
+        return True
 
-    search = ''
-    if os.path.exists('merged.ini'):
-        search = '**/'
-
-    if type_ == 'texcoord':
-        files = glob.glob(f'{search}*Texcoord.buf', recursive=False)
-    elif type_ == 'ini':
-        files = glob.glob(f'{search}*.ini', recursive=False)
-
-    if not files:
-        logger.error(f'Unable to find {type_} file')
-        return
-    elif len(files) > 1 and not search:
-        logger.error(f'More than one {type_} file detected')
-        return
-    elif search:
-        seen = set()
-        dupes = list()
-
-        for path, _ in map(os.path.split, files):
-            if path in seen:
-                dupes.append(path)
-            else:
-                seen.add(path)
-        
-        if dupes:
-            for dupe in dupes:
-                logger.error(f'More than one {type_} file detected in {dupe}')
-            return
+    key = f'COLOR{list(channels)}={list(channels.values())}'
+    if buffer_cache is not None and buffer_cache.is_current(texcoord, key):
+        logger.info(f'Color already set, skipping {texcoord}')
+        return True
 
-    if search:
-        for file in files:
-            logger.info(f'{type_} file detected -> {file}')
-        return files
-    logger.info(f'{type_} file detected -> {files[0]}')
-    return files[0]
-
-
-def start(colors: dict, ini: str, texcoord: str) -> None:
-    config = configparser.ConfigParser()
     try:
-        config.read(ini)
-        stride = int(config.get('Resource{0}'.format(texcoord.split('\\')[-1][:-4]), 'stride'))
-        logger.info(f'Stride: {stride}')
+        resource = layout.find_resource(ini, texcoord)
+        vertex_layout = layout.VertexLayout.for_resource(resource, logger)
+        logger.info(f'Stride: {vertex_layout.stride}')
     except Exception as e:
         logger.error(e)
-        return
+        return False
 
-    with open(texcoord, 'rb+') as file:
-        logger.info('Setting Color Values...')
-        data = bytearray(file.read())
+    try:
+        if chunk_size:
+            logger.info('Streaming...')
+            record = undo.stream_edit(texcoord, vertex_layout.stride,
+                                      vertex_layout.byte_offsets('COLOR', list(channels)),
+                                      functools.partial(apply_colors, channels, vertex_layout), chunk_size)
+            modified = record is not None
+            if not modified:
+                logger.info(f'Color already set, skipping {texcoord}')
+        else:
+            with buffer.map_buffer(texcoord) as data:
+                logger.info('Setting Color Values...')
+                record = undo.fill(data, vertex_layout.stride, vertex_layout.byte_offsets('COLOR', list(channels)),
+                                   vertex_layout.encode('COLOR', list(channels.values())).tobytes())
+            modified = record is not None
+            if modified:
+                logger.info('Saving...')
+            else:
+                logger.info(f'Color already set, skipping {texcoord}')
+    except (OSError, ValueError) as e:
+        logger.error(e)
+        return False
 
-        for index in range(0, len(data), stride):
-            for offset, value in enumerate(colors.values()):
-                if value is not None:
-                    data[index + offset] = value
-        
-        logger.info('Saving...')
-        file.seek(0)
-        file.write(data)
-        file.truncate()
-        file.close()
+    if modified:
+        undo.push(texcoord, record)
+    if buffer_cache is not None:
+        buffer_cache.update(texcoord, key, modified)
+    return True
 
 
-def main() -> None:
+def revert(ini: str, texcoord: str) -> bool:
+    try:
+        left = undo.revert(texcoord)
+    except (OSError, ValueError) as e:
+        logger.error(e)
+        return False
+    logger.info(f'Reverted last edit of {texcoord}, {left} edit(s) left')
+    return True
+
+
+def parse_args(args: Optional[list] = None) -> argparse.Namespace:
+    arg_parser = argparse.ArgumentParser(description='Set the COLOR of 3DMigoto mods texcoord')
+    for color in ('red', 'green', 'blue', 'alpha'):
+        arg_parser.add_argument(f'-{color[0].upper()}', f'--{color}', metavar='VALUE',
+                                help=f'{color.capitalize()} value (0-255), every color is prompted if none is specified')
+    arg_parser.add_argument('--chunk-size', type=int, metavar='MB',
+                            help='Stream the buffer in chunks of this size instead of mapping the whole file')
+    arg_parser.add_argument('--inspect', action='store_true',
+                            help='Show the min, max, mean and histogram of each COLOR channel without editing')
+    arg_parser.add_argument('-f', '--format', choices=('text', 'json'), default='text',
+                            help='Output format of --inspect (default text)')
+    arg_parser.add_argument('--revert', action='store_true', help='Revert the last edit of the buffer')
+    arg_parser.add_argument('--batch', metavar='MODS', help='Apply to every mod in the Mods folder')
+    arg_parser.add_argument('--no-cache', action='store_true',
+                            help='Check every buffer with --batch even if it was not modified since the last run')
+    arg_parser.add_argument('-w', '--workers', type=int, default=None,
+                            help='Number of worker threads used by --batch (default cpu count)')
+    return arg_parser.parse_args(args)
+
+
+def get_colors(args: argparse.Namespace) -> Optional[dict]:
     colors = {
-        'R': None,
-        'G': None,
-        'B': None,
-        'A': None
+        'R': args.red,
+        'G': args.green,
+        'B': args.blue,
+        'A': args.alpha
     }
+    prompt = all(value is None for value in colors.values())
 
     for color in colors:
-        value = input(f'{color} color value (0 - 255, Default none): ')
-        
+        value = colors[color]
+        if prompt:
+            value = input(f'{color} color value (0 - 255, Default none): ')
+
         if not value or value.lower() == 'none':
             colors[color] = None
         else:
@@ -144,26 +132,51 @@ def main() -> None:
 
     for color, value in colors.items():
         logger.info(f'Set color {color} value: {value}')
+    return colors
+
 
-    # Separated if statement to avoid confusing log output
-    ini = get_file('ini')
-    if ini is None:
+def main(args: Optional[list] = None) -> None:
+    args = parse_args(args)
+    if args.inspect:
+        pairs = batch.find_pairs(args.batch or '.', logger, recursive=args.batch is not None)
+        print(stats.dumps(stats.inspect(pairs, logger, args.workers), args.format))
         return
-        
-    texcoord = get_file('texcoord')
-    if texcoord is None:
+
+    buffer_cache = None
+    if args.revert:
+        func = revert
+    else:
+        colors = get_colors(args)
+        if colors is None:
+            return
+        if args.batch is not None and not args.no_cache:
+            buffer_cache = cache.BufferCache()
+            buffer_cache.load()
+        func = functools.partial(start, colors, buffer_cache=buffer_cache,
+                                 chunk_size=args.chunk_size and args.chunk_size * 1024 * 1024)
+
+    pairs = batch.find_pairs(args.batch or '.', logger, recursive=args.batch is not None)
+    if not pairs:
+        logger.error('Unable to find texcoord file')
         return
 
-    if isinstance(ini, str):
-        start(colors, ini, texcoord)
-    elif isinstance(ini, list):
-        for i, t in zip(ini, texcoord):
-            logger.info(f'Processing {t}')
-            start(colors, i, t)
+    if args.batch is not None:
+        logger.info(f'Detected {len(pairs)} texcoord file(s)')
+        batch.run(pairs, func, logger, args.workers)
+        if buffer_cache is not None:
+            buffer_cache.save()
+        logger.info('Done!')
+        return
 
+    for ini, texcoord in pairs:
+        logger.info(f'{os.path.relpath(texcoord)} detected -> {os.path.relpath(ini)}')
+        func(ini, texcoord)
     logger.info('Done!')
 
 
 if __name__ == '__main__':
+    interactive = len(sys.argv) == 1
     main()
-    input()
+    log.shutdown()
+    if interactive:
+        input()
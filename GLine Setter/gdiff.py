@@ -0,0 +1,68 @@
+# 3DMigoto vertex buffer diff
+# Shows which vertices and attributes changed between two versions of a buffer
+
+
+from core import log, layout, batch, diff
+
+from typing import Optional
+import argparse
+import time
+import os
+
+logger = log.setup_logger(__name__)
+
+
+def get_layout(args: argparse.Namespace) -> Optional[layout.VertexLayout]:
+    """Layout from --fmt/--stride, --ini, or the ini loading the new buffer"""
+    try:
+        if args.fmt is not None:
+            return layout.VertexLayout.from_fmt(args.fmt, args.stride)
+        elif args.stride is not None:
+            return layout.VertexLayout.default(args.stride)
+        elif args.ini is not None:
+            return layout.VertexLayout.for_resource(layout.find_resource(args.ini, args.new), logger)
+
+        key = layout.path_key(args.new)
+        for ini, texcoord in batch.find_pairs(os.path.dirname(args.new) or '.', logger):
+            if layout.path_key(texcoord) == key:
+                return layout.VertexLayout.for_resource(layout.find_resource(ini, texcoord), logger)
+    except (OSError, ValueError, KeyError) as e:
+        logger.error(e)
+        return
+    logger.error(f'Unable to find the ini loading {args.new}, use --ini, --stride or --fmt')
+
+
+def parse_args(args: Optional[list] = None) -> argparse.Namespace:
+    arg_parser = argparse.ArgumentParser(description='Compare two versions of a 3DMigoto vertex buffer')
+    arg_parser.add_argument('old', help='Old buffer')
+    arg_parser.add_argument('new', help='New buffer')
+    arg_parser.add_argument('--ini', help='Ini loading the new buffer, found automatically if not specified')
+    arg_parser.add_argument('--stride', type=int, help='Vertex stride, instead of reading it from the ini')
+    arg_parser.add_argument('--fmt', help='.fmt file describing the vertex attributes')
+    arg_parser.add_argument('--limit', type=int, default=20,
+                            help='Number of changed ranges to show, 0 shows every range (default 20)')
+    arg_parser.add_argument('-f', '--format', choices=('text', 'json'), default='text',
+                            help='Output format (default text)')
+    return arg_parser.parse_args(args)
+
+
+def main(args: Optional[list] = None) -> None:
+    args = parse_args(args)
+    vertex_layout = get_layout(args)
+    if vertex_layout is None:
+        return
+    logger.info(f'Layout: {vertex_layout}')
+
+    start = time.perf_counter()
+    try:
+        result = diff.BufferDiff(args.old, args.new, vertex_layout).compare()
+    except (OSError, ValueError) as e:
+        logger.error(e)
+        return
+    logger.info(f'Compared in {time.perf_counter() - start:.3f}s')
+    print(result.dumps(args.format, args.limit))
+
+
+if __name__ == '__main__':
+    main()
+    log.shutdown()
@@ -2,120 +2,151 @@
 # Original code by silent (https://github.com/SilentNightSound/GI-Model-Importer/blob/main/Tools/genshin_set_outlines.py)
 
 
-from colorama import Fore, Style
-import colorama
+from core import log, buffer, layout, batch, cache, undo, stats, transform
 
-from typing import Union
-import configparser
-import logging
-import glob
+from typing import Optional
+import numpy as np
+import functools
+import argparse
+import sys
 import os
 
-colorama.init()
+logger = log.setup_logger(__name__)
 
 
-class CustomFormatter(logging.Formatter):
-    magenta = Fore.LIGHTMAGENTA_EX
-    light_red = Fore.LIGHTRED_EX
-    yellow = Fore.YELLOW
-    green = Fore.GREEN
-    red = Fore.RED
-    reset = Fore.RESET
+def apply_thickness(thickness: transform.Transform, vertex_layout: layout.VertexLayout, data: buffer.Buffer) -> bool:
+    value = thickness.value
+    if value is not None:
+        # Same thickness for every vertex, a strided assignment instead of a gather through the lookup table
+        if vertex_layout.matches(data, 'COLOR', value, 3):
+            return False
+        vertex_layout.write(data, 'COLOR', value, 3)
+        return True
 
-    format_ = f'[{{0}}%(levelname)s{Style.RESET_ALL}] [%(filename)s:%(lineno)s] %(message)s'
+    current = vertex_layout.select(data, 'COLOR', 3)
+    result = thickness.apply(current)
+    if np.array_equal(result, current):
+        return False
+    current[:] = result
+    return True
 
-    FORMATS = {
-        logging.DEBUG: format_.format(magenta),
-        logging.INFO: format_.format(green),
-        logging.WARNING: format_.format(yellow),
-        logging.ERROR: format_.format(light_red),
-        logging.CRITICAL: format_.format(red)
-    }
 
-    def format(self, record):
-        log_fmt = self.FORMATS.get(record.levelno)
-        formatter = logging.Formatter(log_fmt)
-        return formatter.format(record)
+def start(thickness: transform.Transform, ini: str, texcoord: str,
+          buffer_cache: Optional[cache.BufferCache] = None, chunk_size: Optional[int] = None) -> bool:
+    # Rerunning a transform like scale would change the buffer again, so only transforms
+    # giving the same result twice are recorded in the cache
+    key = f'COLOR[3]={thickness.name}' if thickness.idempotent else None
+    if key is not None and buffer_cache is not None and buffer_cache.is_current(texcoord, key):
+        logger.info(f'Thickness already set, skipping {texcoord}')
+        return True
 
+    try:
+        resource = layout.find_resource(ini, texcoord)
+        vertex_layout = layout.VertexLayout.for_resource(resource, logger)
+        logger.info(f'Stride: {vertex_layout.stride}')
+    except Exception as e:
+        logger.error(e)
+        return False
 
-logger = logging.Logger(__name__)
-logger.setLevel(logging.INFO)
-
-stream_handler = logging.StreamHandler()
-stream_handler.setFormatter(CustomFormatter())
-
-logger.addHandler(stream_handler)
-
-
-def get_file(type_: str) -> Union[str, list, None]:
-    files = None
-    type_ = type_.lower()
-
-    search = ''
-    if os.path.exists('merged.ini'):
-        search = '**/'
-
-    if type_ == 'texcoord':
-        files = glob.glob(f'{search}*Texcoord.buf', recursive=False)
-    elif type_ == 'ini':
-        files = glob.glob(f'{search}*.ini', recursive=False)
-
-    if not files:
-        logger.error(f'Unable to find {type_} file')
-        return
-    elif len(files) > 1 and not search:
-        logger.error(f'More than one {type_} file detected')
-        return
-    elif search:
-        seen = set()
-        dupes = list()
-
-        for path, _ in map(os.path.split, files):
-            if path in seen:
-                dupes.append(path)
+    try:
+        if chunk_size:
+            logger.info('Streaming...')
+            record = undo.stream_edit(texcoord, vertex_layout.stride, vertex_layout.byte_offsets('COLOR', 3),
+                                      functools.partial(apply_thickness, thickness, vertex_layout), chunk_size)
+            modified = record is not None
+            if not modified:
+                logger.info(f'Thickness already set, skipping {texcoord}')
+        else:
+            with buffer.map_buffer(texcoord) as data:
+                logger.info('Starting...')
+                offsets = vertex_layout.byte_offsets('COLOR', 3)
+                if thickness.value is not None:
+                    record = undo.fill(data, vertex_layout.stride, offsets,
+                                       vertex_layout.encode('COLOR', thickness.value).tobytes())
+                else:
+                    record = undo.edit(data, vertex_layout.stride, offsets,
+                                       functools.partial(apply_thickness, thickness, vertex_layout))
+            modified = record is not None
+            if modified:
+                logger.info('Saving...')
             else:
-                seen.add(path)
-        
-        if dupes:
-            for dupe in dupes:
-                logger.error(f'More than one {type_} file detected in {dupe}')
-            return
+                logger.info(f'Thickness already set, skipping {texcoord}')
+    except (OSError, ValueError) as e:
+        logger.error(e)
+        return False
 
-    if search:
-        for file in files:
-            logger.info(f'{type_} file detected -> {file}')
-        return files
-    logger.info(f'{type_} file detected -> {files[0]}')
-    return files[0]
+    if modified:
+        undo.push(texcoord, record)
+    if key is not None and buffer_cache is not None:
+        buffer_cache.update(texcoord, key, modified)
+    return True
 
 
-def start(thickness: int, ini: str, texcoord: str) -> None:
-    config = configparser.ConfigParser()
+def revert(ini: str, texcoord: str) -> bool:
     try:
-        config.read(ini)
-        stride = int(config.get('Resource{0}'.format(texcoord.split('\\')[-1][:-4]), 'stride'))
-        logger.info(f'Stride: {stride}')
-    except Exception as e:
+        left = undo.revert(texcoord)
+    except (OSError, ValueError) as e:
+        logger.error(e)
+        return False
+    logger.info(f'Reverted last edit of {texcoord}, {left} edit(s) left')
+    return True
+
+
+def parse_args(args: Optional[list] = None) -> argparse.Namespace:
+    arg_parser = argparse.ArgumentParser(description='Set the outline thickness of 3DMigoto mods')
+    arg_parser.add_argument('thickness', nargs='?', help='Outline thickness (0-255), prompted if not specified')
+    arg_parser.add_argument('--scale', type=float, help='Multiply the current thickness of every vertex')
+    arg_parser.add_argument('--add', type=int, help='Add to the current thickness of every vertex, can be negative')
+    arg_parser.add_argument('--curve', metavar='POINTS',
+                            help="Map the current thickness through a curve of in:out points, eg. '0:0,128:100'")
+    arg_parser.add_argument('--lut', metavar='FILE', help='Map the current thickness through a file of 256 values')
+    arg_parser.add_argument('--clamp', type=int, nargs=2, metavar=('MIN', 'MAX'),
+                            help='Limit the thickness of every vertex to MIN-MAX')
+    arg_parser.add_argument('--chunk-size', type=int, metavar='MB',
+                            help='Stream the buffer in chunks of this size instead of mapping the whole file')
+    arg_parser.add_argument('--inspect', action='store_true',
+                            help='Show the min, max, mean and histogram of each COLOR channel without editing')
+    arg_parser.add_argument('-f', '--format', choices=('text', 'json'), default='text',
+                            help='Output format of --inspect (default text)')
+    arg_parser.add_argument('--revert', action='store_true', help='Revert the last edit of the buffer')
+    arg_parser.add_argument('--batch', metavar='MODS', help='Apply to every mod in the Mods folder')
+    arg_parser.add_argument('--no-cache', action='store_true',
+                            help='Check every buffer with --batch even if it was not modified since the last run')
+    arg_parser.add_argument('-w', '--workers', type=int, default=None,
+                            help='Number of worker threads used by --batch (default cpu count)')
+    return arg_parser.parse_args(args)
+
+
+def get_thickness(args: argparse.Namespace) -> Optional[transform.Transform]:
+    """Builds the thickness transform, transforms are combined as curve, lut, scale, add then clamp"""
+    try:
+        transforms = []
+        if args.curve is not None:
+            transforms.append(transform.Transform.curve(args.curve))
+        if args.lut is not None:
+            transforms.append(transform.Transform.table(args.lut))
+        if args.scale is not None:
+            transforms.append(transform.Transform.scale(args.scale))
+        if args.add is not None:
+            transforms.append(transform.Transform.add(args.add))
+        if args.clamp is not None:
+            transforms.append(transform.Transform.clamp(*args.clamp))
+    except (OSError, ValueError) as e:
         logger.error(e)
         return
 
-    with open(texcoord, 'rb+') as file:
-        logger.info('Starting...')
-        data = bytearray(file.read())
-
-        for index in range(0, len(data), stride):
-            data[index + 3] = thickness
-        
-        logger.info('Saving...')
-        file.seek(0)
-        file.write(data)
-        file.truncate()
-        file.close()
-
+    if transforms:
+        if args.thickness is not None:
+            logger.error('Thickness value can\'t be combined with --scale, --add, --curve, --lut or --clamp')
+            return
+        result = functools.reduce(lambda first, second: first.then(second), transforms)
+        logger.info(f'Thickness transform: {result.name}')
+        return result
 
-def main() -> None:
+    thickness = args.thickness
     try:
-        thickness = input('Set outline thickness (0-255): ')
+        if thickness is None:
+            thickness = input('Set outline thickness (0-255): ')
         thickness = int(thickness)
     except ValueError:
         logger.error(f'Invalid thickness value of {thickness}')
@@ -124,25 +155,51 @@ def main() -> None:
         logger.error(f'Invalid thickness of {thickness}, choose between 0 and 255')
         return
     logger.info(f'Thickness set: {thickness}')
-        
-    # Separated if statement to avoid confusing log output
-    ini = get_file('ini')
-    if ini is None:
+    return transform.Transform.constant(thickness)
+
+
+def main(args: Optional[list] = None) -> None:
+    args = parse_args(args)
+    if args.inspect:
+        pairs = batch.find_pairs(args.batch or '.', logger, recursive=args.batch is not None)
+        print(stats.dumps(stats.inspect(pairs, logger, args.workers), args.format))
         return
-        
-    texcoord = get_file('texcoord')
-    if texcoord is None:
+
+    buffer_cache = None
+    if args.revert:
+        func = revert
+    else:
+        thickness = get_thickness(args)
+        if thickness is None:
+            return
+        if args.batch is not None and not args.no_cache:
+            buffer_cache = cache.BufferCache()
+            buffer_cache.load()
+        func = functools.partial(start, thickness, buffer_cache=buffer_cache,
+                                 chunk_size=args.chunk_size and args.chunk_size * 1024 * 1024)
+
+    pairs = batch.find_pairs(args.batch or '.', logger, recursive=args.batch is not None)
+    if not pairs:
+        logger.error('Unable to find texcoord file')
         return
-    
-    if isinstance(ini, str):
-        start(thickness, ini, texcoord)
-    elif isinstance(ini, list):
-        for i, t in zip(ini, texcoord):
-            logger.info(f'Processing {t}')
-            start(thickness, i, t)
+
+    if args.batch is not None:
+        logger.info(f'Detected {len(pairs)} texcoord file(s)')
+        batch.run(pairs, func, logger, args.workers)
+        if buffer_cache is not None:
+            buffer_cache.save()
+        logger.info('Done!')
+        return
+
+    for ini, texcoord in pairs:
+        logger.info(f'{os.path.relpath(texcoord)} detected -> {os.path.relpath(ini)}')
+        func(ini, texcoord)
     logger.info('Done!')
 
 
 if __name__ == '__main__':
+    interactive = len(sys.argv) == 1
     main()
-    input()
+    log.shutdown()
+    if interactive:
+        input()
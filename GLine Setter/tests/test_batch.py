@@ -0,0 +1,79 @@
+import unittest
+import tempfile
+import logging
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core import batch
+import gline
+
+logger = logging.getLogger('test_batch')
+
+
+def write_mod(folder: str, name: str, ini: str = 'mod.ini') -> str:
+    os.makedirs(folder, exist_ok=True)
+    with open(os.path.join(folder, ini), 'w', encoding='utf-8') as file:
+        file.write(f'[Resource{name}Texcoord]\nstride = 20\nfilename = {name}Texcoord.buf\n')
+        file.close()
+    texcoord = os.path.join(folder, f'{name}Texcoord.buf')
+    with open(texcoord, 'wb') as file:
+        file.write(bytes(range(20)) * 4)
+        file.close()
+    return texcoord
+
+
+class TestFindPairs(unittest.TestCase):
+    def setUp(self) -> None:
+        self.folder = tempfile.TemporaryDirectory()
+        self.mods = os.path.join(self.folder.name, 'Mods')
+        self.keqing = write_mod(os.path.join(self.mods, 'Keqing'), 'Keqing')
+        self.ganyu = write_mod(os.path.join(self.mods, 'Ganyu'), 'Ganyu')
+        self.disabled = write_mod(os.path.join(self.mods, 'DISABLEDAmber'), 'Amber')
+        merged = os.path.join(self.mods, 'Merged')
+        self.childs = [write_mod(os.path.join(merged, child), child, f'DISABLED{child}.ini') for child in ('A', 'B')]
+        with open(os.path.join(merged, 'merged.ini'), 'w', encoding='utf-8') as file:
+            file.write('[KeySwap]\n')
+            file.close()
+
+    def tearDown(self) -> None:
+        self.folder.cleanup()
+
+    def texcoords(self, root: str, recursive: bool) -> list:
+        return sorted(texcoord for _, texcoord in batch.find_pairs(root, logger, recursive))
+
+    def test_batch_finds_every_enabled_mod(self) -> None:
+        self.assertEqual(self.texcoords(self.mods, True), sorted([self.keqing, self.ganyu] + self.childs))
+
+    def test_single_mod(self) -> None:
+        self.assertEqual(self.texcoords(os.path.dirname(self.keqing), False), [self.keqing])
+        self.assertEqual(self.texcoords(os.path.join(self.mods, 'Merged'), False), self.childs)
+        self.assertEqual(self.texcoords(self.mods, False), [])
+
+    def test_single_run_from_mods_folder_edits_nothing(self) -> None:
+        cwd = os.getcwd()
+        os.chdir(self.mods)
+        try:
+            gline.main(['90'])
+        finally:
+            os.chdir(cwd)
+        for texcoord in [self.keqing, self.ganyu, self.disabled] + self.childs:
+            with open(texcoord, 'rb') as file:
+                self.assertEqual(file.read(), bytes(range(20)) * 4)
+                file.close()
+
+
+    def test_run_reports_every_pair(self) -> None:
+        def func(ini: str, texcoord: str) -> bool:
+            if texcoord == self.ganyu:
+                raise ValueError('broken buffer')
+            return texcoord != self.keqing
+
+        pairs = batch.find_pairs(self.mods, logger)
+        results = {texcoord: success for _, texcoord, success in batch.run(pairs, func, logger, 2)}
+        self.assertEqual(results, {self.keqing: False, self.ganyu: False, self.childs[0]: True, self.childs[1]: True})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,82 @@
+import unittest
+import tempfile
+import numpy as np
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core import buffer
+
+STRIDE = 20
+# Odd vertex count with a few trailing bytes that don't make up a vertex
+DATA = np.random.default_rng(0).integers(0, 256, 1001 * STRIDE + 7, dtype=np.uint8).tobytes()
+
+
+def set_thickness(chunk: np.ndarray) -> bool:
+    buffer.vertex_view(chunk, STRIDE)[:, 3] = 7
+    return True
+
+
+class TestBuffer(unittest.TestCase):
+    def setUp(self) -> None:
+        self.folder = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.folder.name, 'Texcoord.buf')
+        with open(self.path, 'wb') as file:
+            file.write(DATA)
+            file.close()
+        expected = bytearray(DATA)
+        buffer.vertex_view(expected, STRIDE)[:, 3] = 7
+        self.expected = bytes(expected)
+
+    def tearDown(self) -> None:
+        self.folder.cleanup()
+
+    def read(self) -> bytes:
+        with open(self.path, 'rb') as file:
+            data = file.read()
+            file.close()
+        return data
+
+    def test_vertex_view(self) -> None:
+        data = bytearray(DATA)
+        view = buffer.vertex_view(data, STRIDE)
+        self.assertEqual(view.shape, (1001, STRIDE))
+        view[-1, -1] = 0
+        self.assertEqual(data[1001 * STRIDE - 1], 0)
+        with self.assertRaises(ValueError):
+            buffer.vertex_view(data, 0)
+
+    def test_chunk_length(self) -> None:
+        self.assertEqual(buffer.chunk_length(STRIDE, 50), 40)
+        self.assertEqual(buffer.chunk_length(STRIDE, 7), STRIDE)
+
+    def test_map_buffer(self) -> None:
+        with buffer.map_buffer(self.path) as data:
+            set_thickness(data)
+        self.assertEqual(self.read(), self.expected)
+
+        with open(self.path, 'wb') as file:
+            file.close()
+        with self.assertRaises(ValueError):
+            with buffer.map_buffer(self.path):
+                pass
+
+    def test_stream_odd_chunk_sizes(self) -> None:
+        for chunk_size in (1, 47, 4099, len(DATA) - 1, len(DATA) * 2):
+            with open(self.path, 'wb') as file:
+                file.write(DATA)
+                file.close()
+            self.assertTrue(buffer.stream_buffer(self.path, STRIDE, set_thickness, chunk_size))
+            self.assertEqual(self.read(), self.expected, f'chunk size {chunk_size}')
+
+    def test_unchanged_chunks_are_not_written(self) -> None:
+        chunks = []
+        self.assertFalse(buffer.stream_buffer(self.path, STRIDE, lambda chunk: chunks.append(len(chunk)), 4099))
+        self.assertEqual(self.read(), DATA)
+        self.assertEqual(sum(chunks), len(DATA))
+        self.assertTrue(all(size % STRIDE == 0 for size in chunks[:-1]))
+
+
+if __name__ == '__main__':
+    unittest.main()
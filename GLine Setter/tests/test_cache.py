@@ -0,0 +1,83 @@
+import unittest
+import tempfile
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core import cache, transform, undo
+import gline
+
+DATA = bytes(range(20)) * 50
+
+
+class TestBufferCache(unittest.TestCase):
+    def setUp(self) -> None:
+        self.folder = tempfile.TemporaryDirectory()
+        self.ini = os.path.join(self.folder.name, 'mod.ini')
+        self.texcoord = os.path.join(self.folder.name, 'KeqingTexcoord.buf')
+        with open(self.ini, 'w', encoding='utf-8') as file:
+            file.write('[ResourceKeqingTexcoord]\nstride = 20\nfilename = KeqingTexcoord.buf\n')
+            file.close()
+        self.write(DATA)
+        self.cache = cache.BufferCache(os.path.join(self.folder.name, 'buffer_cache.json'))
+
+    def tearDown(self) -> None:
+        self.folder.cleanup()
+
+    def write(self, data: bytes) -> None:
+        with open(self.texcoord, 'wb') as file:
+            file.write(data)
+            file.close()
+
+    def test_entry_follows_the_file(self) -> None:
+        self.cache.update(self.texcoord, 'a')
+        self.cache.update(self.texcoord, 'b', modified=False)
+        self.assertTrue(self.cache.is_current(self.texcoord, 'a'))
+        self.assertTrue(self.cache.is_current(self.texcoord, 'b'))
+
+        # A modified buffer only keeps the setting that modified it
+        self.cache.update(self.texcoord, 'c')
+        self.assertFalse(self.cache.is_current(self.texcoord, 'a'))
+        self.assertTrue(self.cache.is_current(self.texcoord, 'c'))
+
+        self.write(DATA + bytes(20))
+        self.assertFalse(self.cache.is_current(self.texcoord, 'c'))
+        os.remove(self.texcoord)
+        self.assertFalse(self.cache.is_current(self.texcoord, 'c'))
+
+    def test_save_and_load(self) -> None:
+        self.cache.update(self.texcoord, 'a')
+        self.cache.save()
+        loaded = cache.BufferCache(self.cache.filename)
+        loaded.load()
+        self.assertTrue(loaded.is_current(self.texcoord, 'a'))
+
+        with open(self.cache.filename, 'w', encoding='utf-8') as file:
+            file.write('{"broken')
+            file.close()
+        loaded.load()
+        self.assertFalse(loaded.is_current(self.texcoord, 'a'))
+
+    def test_rerun_is_skipped(self) -> None:
+        thickness = transform.Transform.constant(90)
+        self.assertTrue(gline.start(thickness, self.ini, self.texcoord, self.cache))
+        with open(self.texcoord, 'rb') as file:
+            edited = file.read()
+            file.close()
+        self.assertTrue(self.cache.is_current(self.texcoord, f'COLOR[3]={thickness.name}'))
+
+        # Skipped without looking at the ini, a missing one would fail otherwise
+        os.remove(self.ini)
+        self.assertTrue(gline.start(thickness, self.ini, self.texcoord, self.cache))
+        self.assertEqual(len(undo.load(self.texcoord)), 1)
+
+        # A transform that changes the buffer on every run is never cached
+        self.assertFalse(gline.start(transform.Transform.scale(0.5), self.ini, self.texcoord, self.cache))
+        with open(self.texcoord, 'rb') as file:
+            self.assertEqual(file.read(), edited)
+            file.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
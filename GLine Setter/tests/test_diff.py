@@ -0,0 +1,74 @@
+import unittest
+import tempfile
+import numpy as np
+import json
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core import buffer, diff, layout
+
+STRIDE = 20
+VERTICES = 10000
+LAYOUT = layout.VertexLayout(STRIDE, [layout.Element('COLOR', 'R8G8B8A8_UNORM', 0),
+                                      layout.Element('TEXCOORD', 'R32G32_FLOAT', 4)])
+
+
+class TestBufferDiff(unittest.TestCase):
+    def setUp(self) -> None:
+        self.folder = tempfile.TemporaryDirectory()
+        self.data = np.random.default_rng(2).integers(0, 256, VERTICES * STRIDE, dtype=np.uint8).tobytes()
+        self.old = self.write('old.buf', self.data)
+
+    def tearDown(self) -> None:
+        self.folder.cleanup()
+
+    def write(self, name: str, data: bytes) -> str:
+        path = os.path.join(self.folder.name, name)
+        with open(path, 'wb') as file:
+            file.write(data)
+            file.close()
+        return path
+
+    def edited(self, edits: list, extra: bytes = b'') -> str:
+        data = bytearray(self.data)
+        view = buffer.vertex_view(data, STRIDE)
+        for vertex, offset in edits:
+            view[vertex, offset] ^= 0xff
+        return self.write('new.buf', bytes(data) + extra)
+
+    def test_find_ranges(self) -> None:
+        mask = np.array([True, True, False, True, False, False, True])
+        self.assertEqual(diff.find_ranges(mask).tolist(), [[0, 2], [3, 4], [6, 7]])
+        self.assertEqual(diff.find_ranges(np.zeros(3, dtype=bool)).tolist(), [])
+
+    def test_changed_vertices(self) -> None:
+        # Vertices in different sub-blocks, the last one at the end of the buffer
+        new = self.edited([(5, 3), (6, 3), (4100, 8), (9999, 17), (9999, 0)])
+        result = diff.BufferDiff(self.old, new, LAYOUT).compare().to_dict()
+
+        self.assertEqual(result['changed_vertices'], 4)
+        self.assertEqual(result['attributes'], {'COLOR': 3, 'TEXCOORD': 1, 'other': 1})
+        self.assertEqual(result['ranges'], [{'start': 5, 'end': 7, 'attributes': ['COLOR']},
+                                            {'start': 4100, 'end': 4101, 'attributes': ['TEXCOORD']},
+                                            {'start': 9999, 'end': 10000, 'attributes': ['COLOR', 'other']}])
+
+    def test_identical_buffers(self) -> None:
+        result = diff.BufferDiff(self.old, self.write('new.buf', self.data), LAYOUT).compare()
+        self.assertEqual(result.to_dict()['changed_vertices'], 0)
+        self.assertEqual(result.ranges.tolist(), [])
+
+    def test_vertex_count_changed(self) -> None:
+        new = self.edited([(0, 4)], bytes(STRIDE * 2))
+        result = diff.BufferDiff(self.old, new, LAYOUT).compare()
+        self.assertEqual((result.old_vertices, result.new_vertices), (VERTICES, VERTICES + 2))
+        self.assertIn(f'Vertex count changed from {VERTICES} to {VERTICES + 2}', result.dumps())
+
+        dumped = json.loads(result.dumps('json', limit=1))
+        self.assertEqual(dumped['range_count'], 1)
+        self.assertEqual(dumped['ranges'], [{'start': 0, 'end': 1, 'attributes': ['TEXCOORD']}])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,75 @@
+import unittest
+import tempfile
+import logging
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core import layout
+
+# Single slot .fmt exported by GIMI, the vertex is split in Position (40), Blend (32) and Texcoord (20) buffers
+ELEMENTS = (
+    ('POSITION', 0, 'R32G32B32_FLOAT', 0), ('NORMAL', 0, 'R32G32B32_FLOAT', 12),
+    ('TANGENT', 0, 'R32G32B32A32_FLOAT', 24), ('BLENDWEIGHTS', 0, 'R32G32B32A32_FLOAT', 40),
+    ('BLENDINDICES', 0, 'R32G32B32A32_SINT', 56), ('COLOR', 0, 'R8G8B8A8_UNORM', 72),
+    ('TEXCOORD', 0, 'R32G32_FLOAT', 76), ('TEXCOORD', 1, 'R32G32_FLOAT', 84)
+)
+
+
+def write_fmt(filename: str) -> None:
+    lines = ['stride: 92', 'topology: trianglelist', 'format: DXGI_FORMAT_R32_UINT']
+    for index, (name, semantic_index, format_, offset) in enumerate(ELEMENTS):
+        lines.extend([f'element[{index}]:', f'  SemanticName: {name}', f'  SemanticIndex: {semantic_index}',
+                      f'  Format: {format_}', '  InputSlot: 0', f'  AlignedByteOffset: {offset}',
+                      '  InputSlotClass: per-vertex', '  InstanceDataStepRate: 0'])
+    with open(filename, 'w', encoding='utf-8') as file:
+        file.write('\n'.join(lines) + '\n')
+        file.close()
+
+
+class TestFmt(unittest.TestCase):
+    def setUp(self) -> None:
+        self.folder = tempfile.TemporaryDirectory()
+        self.fmt = os.path.join(self.folder.name, 'KeqingBody.fmt')
+        write_fmt(self.fmt)
+
+    def tearDown(self) -> None:
+        self.folder.cleanup()
+
+    def offsets(self, vertex_layout: layout.VertexLayout) -> dict:
+        return {name: element.offset for name, element in vertex_layout.elements.items()}
+
+    def test_buffers_of_a_single_slot(self) -> None:
+        # BLENDINDICES + COLOR spans 20 bytes as well, but it isn't at the start or the end of the vertex
+        self.assertEqual(self.offsets(layout.VertexLayout.from_fmt(self.fmt, 20)),
+                         {'COLOR': 0, 'TEXCOORD': 4, 'TEXCOORD1': 12})
+        self.assertEqual(self.offsets(layout.VertexLayout.from_fmt(self.fmt, 40)),
+                         {'POSITION': 0, 'NORMAL': 12, 'TANGENT': 24})
+        self.assertEqual(layout.VertexLayout.from_fmt(self.fmt).stride, 92)
+
+    def test_run_with_color_is_preferred(self) -> None:
+        # POSITION, NORMAL and COLOR + TEXCOORD all span 12 bytes
+        self.assertEqual(self.offsets(layout.VertexLayout.from_fmt(self.fmt, 12)), {'COLOR': 0, 'TEXCOORD': 4})
+
+    def test_no_run_spans_stride(self) -> None:
+        with self.assertRaises(ValueError):
+            layout.VertexLayout.from_fmt(self.fmt, 18)
+
+    def test_for_resource_of_a_part_fmt(self) -> None:
+        texcoord = os.path.join(self.folder.name, 'KeqingTexcoord.buf')
+        vertex_layout = layout.VertexLayout.for_resource(layout.Resource('KeqingTexcoord', texcoord, 20))
+        self.assertEqual(vertex_layout.offset('COLOR', 3), 3)
+        self.assertEqual(vertex_layout.byte_offsets('TEXCOORD', 0), [4, 5, 6, 7])
+
+    def test_fallback_is_logged(self) -> None:
+        texcoord = os.path.join(self.folder.name, 'KeqingTexcoord.buf')
+        logger = logging.getLogger('test_layout')
+        with self.assertLogs(logger, logging.WARNING) as logs:
+            vertex_layout = layout.VertexLayout.for_resource(layout.Resource('KeqingTexcoord', texcoord, 18), logger)
+        self.assertEqual(self.offsets(vertex_layout), {'COLOR': 0})
+        self.assertTrue(any('COLOR is assumed' in line for line in logs.output))
+
+
+if __name__ == '__main__':
+    unittest.main()
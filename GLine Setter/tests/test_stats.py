@@ -0,0 +1,70 @@
+import unittest
+import tempfile
+import logging
+import numpy as np
+import json
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core import stats
+
+logger = logging.getLogger('test_stats')
+
+
+def write_mod(folder: str, name: str, colors: list) -> tuple:
+    ini = os.path.join(folder, f'{name}.ini')
+    with open(ini, 'w', encoding='utf-8') as file:
+        file.write(f'[Resource{name}Texcoord]\nstride = 12\nfilename = {name}Texcoord.buf\n')
+        file.close()
+    texcoord = os.path.join(folder, f'{name}Texcoord.buf')
+    with open(texcoord, 'wb') as file:
+        file.write(b''.join(bytes(color) + bytes(8) for color in colors))
+        file.close()
+    return ini, texcoord
+
+
+class TestStats(unittest.TestCase):
+    def setUp(self) -> None:
+        self.folder = tempfile.TemporaryDirectory()
+        self.keqing = write_mod(self.folder.name, 'Keqing', [(0, 10, 20, 0), (255, 10, 40, 128), (1, 10, 60, 0)])
+        self.ganyu = write_mod(self.folder.name, 'Ganyu', [(50, 0, 0, 255)])
+
+    def tearDown(self) -> None:
+        self.folder.cleanup()
+
+    def test_channel_stats(self) -> None:
+        channel = stats.ChannelStats()
+        self.assertIsNone(channel.min)
+        self.assertIsNone(channel.mean)
+        channel.add(np.array([0.0, 0.5, 1.0], dtype=np.float32))
+        self.assertEqual((channel.count, channel.min, channel.max), (3, 0, 255))
+        self.assertAlmostEqual(channel.mean, 383 / 3)
+        self.assertEqual(len(channel.preview()), 32)
+
+    def test_buffer_stats(self) -> None:
+        result = stats.BufferStats.from_buffer(*self.keqing)
+        self.assertEqual(result.vertices, 3)
+        self.assertEqual({channel: (value.min, value.max) for channel, value in result.channels.items()},
+                         {'R': (0, 255), 'G': (10, 10), 'B': (20, 60), 'A': (0, 128)})
+        self.assertAlmostEqual(result.channels['B'].mean, 40)
+        self.assertEqual(result.channels['A'].histogram[0], 2)
+
+    def test_inspect_and_total(self) -> None:
+        broken = os.path.join(self.folder.name, 'Broken.ini')
+        results = stats.inspect([self.keqing, self.ganyu, (broken, self.keqing[1])], logger, 2)
+        self.assertEqual([result.name for result in results], [self.keqing[1], self.ganyu[1]])
+
+        total = stats.total(results)
+        self.assertEqual(total.vertices, 4)
+        self.assertEqual((total.channels['A'].min, total.channels['A'].max), (0, 255))
+
+        dumped = json.loads(stats.dumps(results, 'json'))
+        self.assertEqual([item['file'] for item in dumped], [self.keqing[1], self.ganyu[1], 'total'])
+        self.assertEqual(dumped[-1]['channels']['R']['histogram'][50], 1)
+        self.assertIn('total (4 vertices)', stats.dumps(results))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,66 @@
+import unittest
+import tempfile
+import numpy as np
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core import transform
+
+VALUES = np.array([0, 1, 100, 128, 200, 255], dtype=np.uint8)
+
+
+class TestTransform(unittest.TestCase):
+    def test_constant(self) -> None:
+        thickness = transform.Transform.constant(90)
+        self.assertEqual(thickness.value, 90)
+        self.assertTrue(thickness.idempotent)
+        self.assertEqual(thickness.apply(VALUES).tolist(), [90] * len(VALUES))
+
+    def test_scale_add_clamp(self) -> None:
+        self.assertEqual(transform.Transform.scale(0.5).apply(VALUES).tolist(), [0, 0, 50, 64, 100, 128])
+        self.assertEqual(transform.Transform.add(-50).apply(VALUES).tolist(), [0, 0, 50, 78, 150, 205])
+        self.assertEqual(transform.Transform.clamp(10, 200).apply(VALUES).tolist(), [10, 10, 100, 128, 200, 200])
+        self.assertIsNone(transform.Transform.scale(0.5).value)
+        self.assertFalse(transform.Transform.scale(0.5).idempotent)
+        self.assertTrue(transform.Transform.clamp(10, 200).idempotent)
+        with self.assertRaises(ValueError):
+            transform.Transform.clamp(200, 10)
+
+    def test_curve(self) -> None:
+        curve = transform.Transform.curve('0:0,128:100,255:140')
+        self.assertEqual(curve.apply(np.array([0, 64, 128, 255], dtype=np.uint8)).tolist(), [0, 50, 100, 140])
+        with self.assertRaises(ValueError):
+            transform.Transform.curve('0-0')
+
+    def test_then(self) -> None:
+        combined = transform.Transform.scale(2).then(transform.Transform.add(-10))
+        self.assertEqual(combined.name, 'scale(2)>add(-10)')
+        self.assertEqual(combined.apply(VALUES).tolist(), [0, 0, 190, 245, 245, 245])
+
+    def test_table(self) -> None:
+        with tempfile.TemporaryDirectory() as folder:
+            filename = os.path.join(folder, 'lut.txt')
+            with open(filename, 'w', encoding='utf-8') as file:
+                file.write(', '.join(str(255 - value) for value in range(256)))
+                file.close()
+            self.assertEqual(transform.Transform.table(filename).apply(VALUES).tolist(), [255, 254, 155, 127, 55, 0])
+
+            with open(filename, 'w', encoding='utf-8') as file:
+                file.write(' '.join(['256'] * 256))
+                file.close()
+            with self.assertRaises(ValueError):
+                transform.Transform.table(filename)
+        with self.assertRaises(ValueError):
+            transform.Transform(range(255), 'short')
+
+    def test_float_values(self) -> None:
+        values = np.array([0.0, 0.5, 1.0], dtype=np.float32)
+        result = transform.Transform.scale(0.5).apply(values)
+        self.assertEqual(result.dtype, np.float32)
+        np.testing.assert_allclose(result, [0.0, 64 / 255, 128 / 255], atol=1e-6)
+
+
+if __name__ == '__main__':
+    unittest.main()
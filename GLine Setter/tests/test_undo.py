@@ -0,0 +1,159 @@
+import unittest
+import tempfile
+import numpy as np
+import zlib
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core import buffer, layout, transform, undo
+import gline
+
+STRIDE = 20
+OFFSETS = [0, 3]
+DATA = np.random.default_rng(1).integers(0, 256, 1001 * STRIDE + 7, dtype=np.uint8).tobytes()
+
+
+def scale(data: buffer.Buffer) -> bool:
+    view = buffer.vertex_view(data, STRIDE)
+    view[:, OFFSETS] = view[:, OFFSETS] // 2
+    return True
+
+
+class TestUndo(unittest.TestCase):
+    def setUp(self) -> None:
+        self.folder = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.folder.name, 'Texcoord.buf')
+        self.write(DATA)
+
+    def tearDown(self) -> None:
+        self.folder.cleanup()
+
+    def write(self, data: bytes) -> None:
+        with open(self.path, 'wb') as file:
+            file.write(data)
+            file.close()
+
+    def read(self) -> bytes:
+        with open(self.path, 'rb') as file:
+            data = file.read()
+            file.close()
+        return data
+
+    def test_planes(self) -> None:
+        result = undo.planes(DATA, STRIDE, OFFSETS)
+        self.assertEqual(result.shape, (2, 1001))
+        self.assertEqual(result[1].tobytes(), DATA[3:1001 * STRIDE:STRIDE])
+
+    def test_revert_every_edit(self) -> None:
+        states = [DATA]
+        for pattern in (b'\x00\x00', b'\x10\x20'):
+            with buffer.map_buffer(self.path) as data:
+                record = undo.fill(data, STRIDE, OFFSETS, pattern)
+            undo.push(self.path, record)
+            states.append(self.read())
+        with buffer.map_buffer(self.path) as data:
+            record = undo.edit(data, STRIDE, OFFSETS, scale)
+        undo.push(self.path, record)
+
+        self.assertEqual(len(undo.load(self.path)), 3)
+        for left, state in zip((2, 1, 0), reversed(states)):
+            self.assertEqual(undo.revert(self.path), left)
+            self.assertEqual(self.read(), state)
+        self.assertFalse(os.path.exists(undo.undo_path(self.path)))
+        with self.assertRaises(FileNotFoundError):
+            undo.revert(self.path)
+
+    def test_fill_already_set(self) -> None:
+        data = bytearray(DATA)
+        buffer.vertex_view(data, STRIDE)[:, OFFSETS] = [1, 2]
+        self.assertIsNone(undo.fill(data, STRIDE, OFFSETS, b'\x01\x02'))
+        self.assertIsNone(undo.edit(data, STRIDE, OFFSETS, lambda data: False))
+
+    def test_fill_matches_edit(self) -> None:
+        def set_pattern(data: buffer.Buffer) -> bool:
+            buffer.vertex_view(data, STRIDE)[:, OFFSETS] = [1, 2]
+            return True
+
+        filled = bytearray(DATA)
+        edited = bytearray(DATA)
+        filled_record = undo.fill(filled, STRIDE, OFFSETS, b'\x01\x02')
+        edited_record = undo.edit(edited, STRIDE, OFFSETS, set_pattern)
+        self.assertEqual(filled, edited)
+        self.assertEqual(filled_record.pack(), edited_record.pack())
+
+    def test_modified_buffer_is_not_reverted(self) -> None:
+        with buffer.map_buffer(self.path) as data:
+            undo.push(self.path, undo.fill(data, STRIDE, OFFSETS, b'\x00\x00'))
+            data[3] = 1
+        modified = self.read()
+        with self.assertRaises(ValueError):
+            undo.revert(self.path)
+        self.assertEqual(self.read(), modified)
+        self.assertEqual(len(undo.load(self.path)), 1)
+
+    def test_stream_matches_mapped_record(self) -> None:
+        with buffer.map_buffer(self.path) as data:
+            mapped = undo.edit(data, STRIDE, OFFSETS, scale)
+        edited = self.read()
+
+        for chunk_size in (1, 47, 4099, len(DATA) * 2):
+            self.write(DATA)
+            record = undo.stream_edit(self.path, STRIDE, OFFSETS, scale, chunk_size)
+            self.assertEqual(self.read(), edited, f'chunk size {chunk_size}')
+            self.assertEqual(record.pack(), mapped.pack(), f'chunk size {chunk_size}')
+
+            undo.push(self.path, record)
+            self.assertEqual(undo.revert(self.path), 0)
+            self.assertEqual(self.read(), DATA, f'chunk size {chunk_size}')
+
+    def test_version_1_record(self) -> None:
+        original = buffer.vertex_view(DATA, STRIDE)[:, OFFSETS].tobytes()
+        data = bytearray(DATA)
+        buffer.vertex_view(data, STRIDE)[:, OFFSETS] = 0
+        self.write(bytes(data))
+        undo.push(self.path, undo.UndoRecord(STRIDE, 1001, OFFSETS, zlib.compress(original),
+                                             undo.checksum(data), version=1))
+
+        self.assertEqual(undo.revert(self.path), 0)
+        self.assertEqual(self.read(), DATA)
+
+
+class TestGLine(unittest.TestCase):
+    def setUp(self) -> None:
+        self.folder = tempfile.TemporaryDirectory()
+        self.ini = os.path.join(self.folder.name, 'mod.ini')
+        self.texcoord = os.path.join(self.folder.name, 'KeqingTexcoord.buf')
+        with open(self.ini, 'w', encoding='utf-8') as file:
+            file.write(f'[ResourceKeqingTexcoord]\nstride = {STRIDE}\nfilename = KeqingTexcoord.buf\n')
+            file.close()
+        with open(self.texcoord, 'wb') as file:
+            file.write(DATA)
+            file.close()
+
+    def tearDown(self) -> None:
+        self.folder.cleanup()
+
+    def read(self) -> bytes:
+        with open(self.texcoord, 'rb') as file:
+            data = file.read()
+            file.close()
+        return data
+
+    def test_thickness_round_trip(self) -> None:
+        vertex_layout = layout.VertexLayout.default(STRIDE)
+        for thickness in (transform.Transform.constant(90), transform.Transform.scale(0.5)):
+            for chunk_size in (None, 47):
+                expected = bytearray(DATA)
+                gline.apply_thickness(thickness, vertex_layout, expected)
+
+                self.assertTrue(gline.start(thickness, self.ini, self.texcoord, chunk_size=chunk_size))
+                self.assertEqual(self.read(), bytes(expected), f'{thickness} chunk size {chunk_size}')
+                self.assertTrue(gline.revert(self.ini, self.texcoord))
+                self.assertEqual(self.read(), DATA, f'{thickness} chunk size {chunk_size}')
+                self.assertFalse(os.path.exists(undo.undo_path(self.texcoord)))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,98 @@
+from typing import Optional, Iterator
+import regex
+import json
+import os
+
+REWARNING = regex.compile(rb'''
+    Duplicate
+    \s+
+    (?:Texture|Shader)Override
+    \s+
+    hash
+    \s*:?\s*
+    (?P<hash>[\da-f]{8,16})
+    \b
+''', regex.VERBOSE | regex.IGNORECASE)
+
+CHUNK_SIZE = 1 << 20
+
+
+class LogIngester(object):
+    """Reads duplicate hash warnings from the 3DMigoto log
+
+    The log is read in fixed size chunks starting from the offset of the previous run,
+    so only new lines are scanned and memory use doesn't depend on the log size.
+    Offsets are kept per log file in the state file.
+    """
+
+    def __init__(self, filename: str, state_file: Optional[str] = 'log_state.json',
+                 chunk_size: Optional[int] = CHUNK_SIZE) -> None:
+        self.filename = filename
+        self.state_file = state_file
+        self.chunk_size = chunk_size
+        self.offset = 0
+        self.bytes_read = 0
+        self.load_state()
+
+    def load_state(self) -> None:
+        if not os.path.exists(self.state_file):
+            return
+        with open(self.state_file, 'r', encoding='utf-8') as file:
+            state = json.load(file)
+            file.close()
+        self.offset = state.get(os.path.abspath(self.filename), 0)
+
+    def save_state(self) -> None:
+        state = dict()
+        if os.path.exists(self.state_file):
+            with open(self.state_file, 'r', encoding='utf-8') as file:
+                state = json.load(file)
+                file.close()
+        state[os.path.abspath(self.filename)] = self.offset
+
+        with open(self.state_file, 'w', encoding='utf-8') as file:
+            json.dump(state, file, indent=4)
+            file.close()
+
+    def lines(self) -> Iterator[bytes]:
+        """Yields every complete line after the last offset, advancing the offset as it goes"""
+        if not os.path.exists(self.filename):
+            return
+
+        # Log was recreated by 3DMigoto, start over
+        if os.path.getsize(self.filename) < self.offset:
+            self.offset = 0
+
+        with open(self.filename, 'rb') as file:
+            file.seek(self.offset)
+            remainder = b''
+
+            while True:
+                chunk = file.read(self.chunk_size)
+                if not chunk:
+                    break
+                self.bytes_read += len(chunk)
+
+                chunk = remainder + chunk
+                end = chunk.rfind(b'\n')
+                if end == -1:
+                    # A line longer than the chunk size is carried over whole until its end is read
+                    remainder = chunk
+                    continue
+
+                remainder = chunk[end + 1:]
+                for line in chunk[:end].split(b'\n'):
+                    yield line
+                self.offset = file.tell() - len(remainder)
+            file.close()
+
+    def hashes(self) -> Iterator[str]:
+        for line in self.lines():
+            match = REWARNING.search(line)
+            if match is not None:
+                yield match.group('hash').decode('ascii').lower()
+
+    def ingest(self) -> set:
+        hashes = set(self.hashes())
+        self.save_state()
+        return hashes
@@ -0,0 +1,138 @@
+from typing import Optional, Iterable
+import hashlib
+import json
+import os
+
+JOURNAL_VERSION = 1
+
+
+def fingerprint(content: str) -> str:
+    return hashlib.blake2b(content.encode('utf-8'), digest_size=8).hexdigest()
+
+
+def locate_options(content: str, edits: Iterable[tuple]) -> list:
+    """Returns [line, section, option, value] for every (section, option, value) edit found in the dumped config
+
+    The lookup is done on the dumped text instead of the parser so the line number
+    matches exactly what was written to the file. Options added by the parser come last
+    in their section, so only the last line with the inserted value is taken for each
+    edit, the same option written by the mod author (eg. kept raw after an if block) is left out.
+    """
+    wanted = dict()
+    for section, option, value in edits:
+        wanted.setdefault(section, dict())[option] = value
+
+    found = dict()
+    cursect = None
+    for index, line in enumerate(content.split('\n')):
+        if line.startswith('[') and line.endswith(']'):
+            cursect = line[1:-1]
+            continue
+        if cursect not in wanted or '=' not in line:
+            continue
+
+        option, value = (part.strip() for part in line.split('=', 1))
+        if option not in wanted[cursect]:
+            continue
+        if wanted[cursect][option] is None or wanted[cursect][option] == value:
+            found[(cursect, option)] = [index, cursect, option, value]
+    return sorted(found.values())
+
+
+class EditJournal(object):
+    """Records every line inserted by fix mode so restore can undo only those lines
+
+    Journal layout:
+    {
+        "version": 1,
+        "files": {
+            "path/to/mod.ini": {"fingerprint": "...", "lines": [[line, section, option, value], ...]}
+        }
+    }
+    """
+
+    def __init__(self, filename: Optional[str] = 'hash_journal.json') -> None:
+        self.filename = filename
+        self._files = dict()
+
+    @property
+    def files(self) -> list:
+        return list(self._files)
+
+    def exists(self) -> bool:
+        return os.path.exists(self.filename)
+
+    def load(self) -> None:
+        self._files.clear()
+        if not self.exists():
+            return
+
+        with open(self.filename, 'r', encoding='utf-8') as file:
+            data = json.load(file)
+            file.close()
+        if data.get('version') != JOURNAL_VERSION:
+            raise ValueError(f'Unsupported journal version {data.get("version")!r}')
+        self._files.update(data.get('files', dict()))
+
+    def save(self) -> None:
+        if not self._files:
+            if self.exists():
+                os.remove(self.filename)
+            return
+
+        with open(self.filename, 'w', encoding='utf-8') as file:
+            json.dump({'version': JOURNAL_VERSION, 'files': self._files}, file, separators=(',', ':'))
+            file.close()
+
+    def edits(self, path: str) -> list:
+        """Journaled (section, option, value) of a file, value is None for entries of older journals"""
+        if path not in self._files:
+            return []
+        return [(entry[1], entry[2], entry[3] if len(entry) > 3 else None) for entry in self._files[path]['lines']]
+
+    def record(self, path: str, content: str, edits: Iterable[tuple]) -> None:
+        edits = set(edits)
+        journaled = set((section, option) for section, option, _ in edits)
+        edits.update(edit for edit in self.edits(path) if edit[:2] not in journaled)
+        if not edits:
+            return
+
+        self._files[path] = {
+            'fingerprint': fingerprint(content),
+            'lines': locate_options(content, edits)
+        }
+
+    def discard(self, path: str) -> None:
+        self._files.pop(path, None)
+
+    def restore(self, path: str) -> Optional[int]:
+        """Removes journaled lines from a file in reverse order
+
+        Returns the number of removed lines, or None if the file is missing or
+        was modified since it was journaled.
+        """
+        entry = self._files.get(path)
+        if entry is None or not os.path.exists(path):
+            return
+
+        with open(path, 'r', encoding='utf-8') as file:
+            content = file.read()
+            file.close()
+        if fingerprint(content) != entry['fingerprint']:
+            return
+
+        lines = content.split('\n')
+        for index in sorted((entry[0] for entry in entry['lines']), reverse=True):
+            del lines[index]
+
+        with open(path, 'w', encoding='utf-8') as file:
+            file.write('\n'.join(lines))
+            file.close()
+        self.discard(path)
+        return len(entry['lines'])
+
+    def __contains__(self, path: str) -> bool:
+        return path in self._files
+
+    def __len__(self) -> int:
+        return len(self._files)
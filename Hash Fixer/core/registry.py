@@ -0,0 +1,246 @@
+from typing import Optional, Iterable, Iterator, Union
+from array import array
+import bisect
+import struct
+import mmap
+import sys
+import os
+
+SHIPPED = 0
+AUTO = 1
+USER = 2
+
+SOURCES = {
+    SHIPPED: 'shipped',
+    AUTO: 'auto',
+    USER: 'user'
+}
+
+MAGIC = b'GIHR'
+VERSION = 1
+HEADER = struct.Struct('<4sHI')
+
+
+def parse_hash(hash_: str) -> tuple:
+    """Converts a hash string into (value, width)
+
+    The width is the amount of hex digits so hashes like 0aa762ab3bbe42c2
+    and aa762ab3bbe42c2 are kept as separate entries.
+    """
+    hash_ = hash_.strip().lower()
+    if not hash_ or len(hash_) > 16:
+        raise ValueError(f'Invalid hash {hash_!r}')
+    return int(hash_, 16), len(hash_)
+
+
+def format_hash(value: int, width: int) -> str:
+    return f'{value:0{width}x}'
+
+
+class HashRegistry(object):
+    """Sorted registry of known common hashes
+
+    Hashes are stored as three parallel columns (value, width, source) sorted by
+    (value, width), lookups are done with a binary search on the value column.
+
+    File layout (little endian):
+    header      magic, version, count
+    values      count * uint64
+    widths      count * uint8
+    sources     count * uint8
+
+    Loading a registry maps the file instead of reading it, the columns are
+    only copied into memory once the registry is modified.
+    """
+
+    def __init__(self) -> None:
+        self._values = array('Q')
+        self._widths = array('B')
+        self._sources = array('B')
+        self._mmap = None
+        self.modified = False
+
+    @classmethod
+    def load(cls, filename: str) -> 'HashRegistry':
+        registry = cls()
+        if not os.path.exists(filename) or not os.path.getsize(filename):
+            return registry
+
+        with open(filename, 'rb') as file:
+            mapped = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+            file.close()
+
+        magic, version, count = HEADER.unpack_from(mapped)
+        if magic != MAGIC:
+            mapped.close()
+            raise ValueError(f'{filename} is not a hash registry')
+        elif version != VERSION:
+            mapped.close()
+            raise ValueError(f'Unsupported hash registry version {version}')
+
+        view = memoryview(mapped)
+        offset = HEADER.size
+        values = view[offset:offset + count * 8]
+        offset += count * 8
+        widths = view[offset:offset + count]
+        offset += count
+
+        if sys.byteorder == 'little':
+            registry._values = values.cast('Q')
+        else:
+            registry._values = array('Q', values.tobytes())
+            registry._values.byteswap()
+        registry._widths = widths
+        registry._sources = view[offset:offset + count]
+        registry._mmap = mapped
+        return registry
+
+    @classmethod
+    def from_text(cls, filename: str, source: Optional[int] = USER) -> 'HashRegistry':
+        registry = cls()
+        if os.path.exists(filename):
+            registry.merge_text(filename, source)
+        return registry
+
+    def save(self, filename: str) -> None:
+        values = array('Q', self._values)
+        if sys.byteorder != 'little':
+            values.byteswap()
+
+        data = b''.join((HEADER.pack(MAGIC, VERSION, len(self)), values.tobytes(),
+                         bytes(self._widths), bytes(self._sources)))
+        self.close()
+        with open(filename, 'wb') as file:
+            file.write(data)
+            file.close()
+        self.modified = False
+
+    def close(self) -> None:
+        """Detaches the registry from its mapped file"""
+        if self._mmap is None:
+            return
+        views = (self._values, self._widths, self._sources)
+        self._materialize()
+        for view in views:
+            if isinstance(view, memoryview):
+                view.release()
+        self._mmap.close()
+        self._mmap = None
+
+    def _materialize(self) -> None:
+        if isinstance(self._values, array):
+            return
+        self._values = array('Q', self._values)
+        self._widths = array('B', self._widths)
+        self._sources = array('B', self._sources)
+
+    def _find(self, value: int, width: int) -> tuple:
+        """Returns (index, found) of the slot for (value, width)"""
+        index = bisect.bisect_left(self._values, value)
+        while index < len(self._values) and self._values[index] == value:
+            if self._widths[index] == width:
+                return index, True
+            elif self._widths[index] > width:
+                break
+            index += 1
+        return index, False
+
+    def add(self, hash_: str, source: Optional[int] = USER) -> bool:
+        """Adds a hash, existing entries keep their original source"""
+        value, width = parse_hash(hash_)
+        index, found = self._find(value, width)
+        if found:
+            return False
+
+        self.close()
+        self._materialize()
+        self._values.insert(index, value)
+        self._widths.insert(index, width)
+        self._sources.insert(index, source)
+        self.modified = True
+        return True
+
+    def merge(self, other: Union['HashRegistry', Iterable[str]], source: Optional[int] = USER) -> int:
+        """Merges another registry or iterable of hashes, returns the amount of new entries
+
+        Merging another registry is done as a single linear merge of both sorted columns.
+        """
+        if not isinstance(other, HashRegistry):
+            incoming = HashRegistry()
+            entries = set()
+            for hash_ in other:
+                try:
+                    entries.add(parse_hash(hash_))
+                except ValueError:
+                    continue
+            for value, width in sorted(entries):
+                incoming._values.append(value)
+                incoming._widths.append(width)
+                incoming._sources.append(source)
+            other = incoming
+
+        values, widths, sources = array('Q'), array('B'), array('B')
+        left, right = self.entries(), other.entries()
+        added = 0
+
+        current = next(left, None)
+        incoming = next(right, None)
+        while current is not None or incoming is not None:
+            if incoming is None or (current is not None and current[:2] <= incoming[:2]):
+                entry = current
+                if incoming is not None and current[:2] == incoming[:2]:
+                    incoming = next(right, None)
+                current = next(left, None)
+            else:
+                entry = incoming
+                incoming = next(right, None)
+                added += 1
+            values.append(entry[0])
+            widths.append(entry[1])
+            sources.append(entry[2])
+
+        if added:
+            self.close()
+            self._values, self._widths, self._sources = values, widths, sources
+            self.modified = True
+        return added
+
+    def merge_text(self, filename: str, source: Optional[int] = USER) -> int:
+        with open(filename, 'r', encoding='utf-8') as file:
+            added = self.merge(file, source)
+            file.close()
+        return added
+
+    def diff(self, other: 'HashRegistry') -> tuple:
+        """Returns (added, removed) hash strings of other compared to this registry, both sorted"""
+        mine = set(zip(self._values, self._widths))
+        theirs = set(zip(other._values, other._widths))
+        added = [format_hash(*entry) for entry in sorted(theirs - mine)]
+        removed = [format_hash(*entry) for entry in sorted(mine - theirs)]
+        return added, removed
+
+    def source(self, hash_: str) -> Optional[str]:
+        value, width = parse_hash(hash_)
+        index, found = self._find(value, width)
+        if not found:
+            return
+        return SOURCES[self._sources[index]]
+
+    def entries(self) -> Iterator:
+        return zip(self._values, self._widths, self._sources)
+
+    def dumps(self) -> str:
+        """Sorted text form, stable between runs so it can be diffed"""
+        return '\n'.join(f'{format_hash(value, width)} {SOURCES[source]}' for value, width, source in self.entries())
+
+    def __contains__(self, hash_: str) -> bool:
+        try:
+            return self._find(*parse_hash(hash_))[1]
+        except ValueError:
+            return False
+
+    def __iter__(self) -> Iterator:
+        return (format_hash(value, width) for value, width in zip(self._values, self._widths))
+
+    def __len__(self) -> int:
+        return len(self._values)
@@ -0,0 +1,269 @@
+from core import parser, journal
+
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Iterator
+import threading
+import regex
+import json
+import os
+
+REPAIR = regex.compile(r'''
+    ^
+    \s*
+    (?P<old>[\da-f]{1,16})
+    \s*(?:=|->|,|\s)\s*
+    (?P<new>[\da-f]{1,16})
+    \s*
+    (?:[;#].*)?
+    $
+''', regex.VERBOSE | regex.IGNORECASE)
+
+
+def load_table(filename: str) -> dict:
+    """Loads an old -> new hash table
+
+    Every line is a pair separated by whitespace, '=', '->' or ',',
+    lines starting with ; or # are ignored.
+    """
+    table = dict()
+    with open(filename, 'r', encoding='utf-8') as file:
+        for number, line in enumerate(file, start=1):
+            if not line.strip() or line.strip()[0] in parser.Comment.PREFIX:
+                continue
+            match = REPAIR.match(line)
+            if match is None:
+                raise parser.ParseError(f'{line.strip()} (line {number} of {filename})')
+            table[match.group('old').lower()] = match.group('new').lower()
+        file.close()
+    return table
+
+
+class RemapJournal(object):
+    """Undo journal of a remap, stores the original and remapped text of every changed line
+
+    The journal is written as json lines, a {"version"} header followed by one
+    {"path", "fingerprint", "lines"} record per remapped file. A later record of a path
+    replaces the earlier ones and a record without lines drops it. While remapping, records are
+    appended as every file is journaled, save compacts the journal once the batch is done.
+    """
+
+    def __init__(self, filename: Optional[str] = 'remap_journal.json') -> None:
+        self.filename = filename
+        self._files = dict()
+        self._append = None
+
+    @property
+    def files(self) -> list:
+        return list(self._files)
+
+    def exists(self) -> bool:
+        return os.path.exists(self.filename)
+
+    def load(self) -> None:
+        self._files.clear()
+        if not self.exists():
+            return
+        with open(self.filename, 'r', encoding='utf-8') as file:
+            for line in file:
+                if not line.strip():
+                    continue
+                data = json.loads(line)
+                if 'files' in data:
+                    # Journal written as a single json object by older versions
+                    self._files.update(data['files'])
+                elif 'path' not in data:
+                    continue
+                elif data.get('lines') is None:
+                    self._files.pop(data['path'], None)
+                else:
+                    self._files[data['path']] = {'fingerprint': data['fingerprint'], 'lines': data['lines']}
+            file.close()
+
+    def begin(self) -> None:
+        """Starts appending a record for every journaled file, until save"""
+        self.save()
+        self._append = open(self.filename, 'a', encoding='utf-8')
+        if not self._append.tell():
+            self._write({'version': journal.JOURNAL_VERSION})
+
+    def _write(self, record: dict) -> None:
+        if self._append is None:
+            return
+        # Flushed so the record is on disk before the file is rewritten, it's only synced by save
+        self._append.write(json.dumps(record, separators=(',', ':')) + '\n')
+        self._append.flush()
+
+    def save(self) -> None:
+        """Rewrites the journal with one record per file and syncs it to disk"""
+        if self._append is not None:
+            self._append.close()
+            self._append = None
+        if not self._files:
+            if self.exists():
+                os.remove(self.filename)
+            return
+
+        temp = f'{self.filename}.tmp'
+        with open(temp, 'w', encoding='utf-8') as file:
+            file.write(json.dumps({'version': journal.JOURNAL_VERSION}) + '\n')
+            for path, entry in self._files.items():
+                file.write(json.dumps({'path': path, **entry}, separators=(',', ':')) + '\n')
+            file.flush()
+            os.fsync(file.fileno())
+            file.close()
+        os.replace(temp, self.filename)
+
+    def record(self, path: str, content: str, changes: list) -> Optional[dict]:
+        """Journals the remapped lines of a file, returns the entry it replaced"""
+        previous_entry = self._files.get(path)
+        lines = [[line, old, new] for line, _, _, old, new in changes]
+        if path in self._files:
+            # Remapped again, keep the oldest text of every line
+            previous = {line: old for line, old, _ in self._files[path]['lines']}
+            lines = [[line, previous.pop(line, old), new] for line, old, new in lines]
+            lines.extend([line, old, None] for line, old in previous.items())
+            lines.sort()
+        self._files[path] = {'fingerprint': journal.fingerprint(content), 'lines': lines}
+        self._write({'path': path, **self._files[path]})
+        return previous_entry
+
+    def revert_record(self, path: str, entry: Optional[dict]) -> None:
+        """Puts back the entry replaced by record, when the file couldn't be written"""
+        if entry is None:
+            self._files.pop(path, None)
+            self._write({'path': path, 'lines': None})
+        else:
+            self._files[path] = entry
+            self._write({'path': path, **entry})
+
+    def undo(self, path: str) -> Optional[int]:
+        """Puts back the original lines, returns None if the file is missing or was modified"""
+        entry = self._files.get(path)
+        if entry is None or not os.path.exists(path):
+            return
+
+        with open(path, 'r', encoding='utf-8') as file:
+            content = file.read()
+            file.close()
+        if journal.fingerprint(content) != entry['fingerprint']:
+            return
+
+        lines = content.split('\n')
+        for index, old, _ in entry['lines']:
+            lines[index] = old
+        with open(path, 'w', encoding='utf-8') as file:
+            file.write('\n'.join(lines))
+            file.close()
+        del self._files[path]
+        return len(entry['lines'])
+
+    def __len__(self) -> int:
+        return len(self._files)
+
+
+class HashRemapper(object):
+    """Replaces hash values across every ini of the mod folder
+
+    Lines are matched with the same section and option patterns used by ModConfigParser,
+    so only 'hash' options inside a section are touched. Each candidate value is looked
+    up in the table, which keeps a single pass over the file no matter how many pairs
+    the table has.
+    """
+
+    def __init__(self, table: dict, workers: Optional[int] = 1) -> None:
+        self.table = {old.lower(): new.lower() for old, new in table.items()}
+        self.workers = workers
+        self.journal = RemapJournal()
+        self.files = 0
+        self.bytes_read = 0
+        self.bytes_written = 0
+        # (ini, exception) of every file that couldn't be remapped
+        self.errors = []
+        self._lock = threading.Lock()
+
+    def scan(self, content: str) -> Iterator[tuple]:
+        """Yields (line, section, old hash, old text, new text) of every remapped line"""
+        cursect = None
+        for index, line in enumerate(content.split('\n')):
+            section_match = parser.ModConfigParser.RESECTION.match(line.strip())
+            if section_match is not None:
+                cursect = section_match.group('section')
+                continue
+            elif cursect is None or 'hash' not in line.lower():
+                continue
+
+            option_match = parser.ModConfigParser.REOPTION.match(line)
+            if option_match is None or option_match.group('option').strip().lower() != 'hash':
+                continue
+
+            hash_ = option_match.group('value').strip().lower()
+            if hash_ not in self.table:
+                continue
+
+            start, end = option_match.span('value')
+            yield index, cursect, hash_, line, f'{line[:start]}{self.table[hash_]}{line[end:]}'
+
+    def remap_file(self, ini: str) -> Optional[tuple]:
+        with open(ini, 'r', encoding='utf-8') as file:
+            content = file.read()
+            file.close()
+        with self._lock:
+            self.files += 1
+            self.bytes_read += os.path.getsize(ini)
+
+        changes = list(self.scan(content))
+        if not changes:
+            return
+
+        lines = content.split('\n')
+        for index, _, _, _, new in changes:
+            lines[index] = new
+        content = '\n'.join(lines)
+
+        # The file is journaled before it's rewritten, so an interrupted remap can still be undone
+        with self._lock:
+            previous = self.journal.record(ini, content, changes)
+        try:
+            with open(ini, 'w', encoding='utf-8') as file:
+                file.write(content)
+                file.close()
+        except OSError:
+            with self._lock:
+                self.journal.revert_record(ini, previous)
+            raise
+        with self._lock:
+            self.bytes_written += len(content.encode('utf-8'))
+        return ini, content, changes
+
+    def _safe_remap(self, ini: str) -> Optional[tuple]:
+        try:
+            return self.remap_file(ini)
+        except Exception as e:
+            with self._lock:
+                self.errors.append((ini, e))
+
+    def remap(self, files: list) -> list:
+        """Remaps every file in parallel, returns the report entries
+
+        Files that can't be read or written are added to errors and left out.
+        """
+        self.journal.load()
+        self.journal.begin()
+        try:
+            with ThreadPoolExecutor(max_workers=self.workers) as executor:
+                results = [result for result in executor.map(self._safe_remap, files) if result is not None]
+        finally:
+            self.journal.save()
+
+        report = []
+        for ini, content, changes in results:
+            for index, section, hash_, _, _ in changes:
+                report.append({'file': ini, 'line': index + 1, 'section': section,
+                               'old': hash_, 'new': self.table[hash_]})
+        return report
+
+    @staticmethod
+    def dump_report(report: list, filename: str) -> None:
+        with open(filename, 'w', encoding='utf-8') as file:
+            json.dump(report, file, indent=4)
+            file.close()
@@ -0,0 +1,83 @@
+from typing import Optional
+import contextlib
+import threading
+import time
+import json
+
+PHASES = ('scan', 'collect', 'process', 'write')
+
+
+class RunStats(object):
+    """Collects per-phase timings and I/O counters of a single run"""
+
+    def __init__(self, mode: str, workers: Optional[int] = 1) -> None:
+        self.mode = mode
+        self.workers = workers
+        self.phases = {phase: 0.0 for phase in PHASES}
+        self.files = 0
+        self.files_changed = 0
+        self.bytes_read = 0
+        self.bytes_written = 0
+        self._lock = threading.Lock()
+        self._start = time.perf_counter()
+        self._end = None
+
+    @contextlib.contextmanager
+    def phase(self, name: str) -> None:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = self.phases.get(name, 0.0) + time.perf_counter() - start
+
+    def add_read(self, size: int) -> None:
+        with self._lock:
+            self.files += 1
+            self.bytes_read += size
+
+    def add_write(self, size: int) -> None:
+        with self._lock:
+            self.files_changed += 1
+            self.bytes_written += size
+
+    def stop(self) -> None:
+        self._end = time.perf_counter()
+
+    @property
+    def total(self) -> float:
+        end = self._end if self._end is not None else time.perf_counter()
+        return end - self._start
+
+    @property
+    def files_per_sec(self) -> float:
+        if not self.total:
+            return 0.0
+        return self.files / self.total
+
+    def to_dict(self) -> dict:
+        return {
+            'mode': self.mode,
+            'workers': self.workers,
+            'phases': {name: round(seconds, 6) for name, seconds in self.phases.items()},
+            'total': round(self.total, 6),
+            'files': self.files,
+            'files_changed': self.files_changed,
+            'files_per_sec': round(self.files_per_sec, 2),
+            'bytes_read': self.bytes_read,
+            'bytes_written': self.bytes_written
+        }
+
+    def dumps(self, format_: Optional[str] = 'text') -> str:
+        if format_ == 'json':
+            return json.dumps(self.to_dict(), indent=4)
+
+        lines = [f'{name:<8} {seconds:>10.3f}s' for name, seconds in self.phases.items()]
+        lines.append(f'{"total":<8} {self.total:>10.3f}s')
+        lines.append(f'{self.files} file(s) read, {self.files_changed} changed, {self.files_per_sec:.2f} files/sec')
+        lines.append(f'{self.bytes_read} bytes read, {self.bytes_written} bytes written')
+        return '\n'.join(lines)
+
+    def dump(self, filename: str) -> None:
+        with open(filename, 'w', encoding='utf-8') as file:
+            json.dump(self.to_dict(), file, indent=4)
+            file.close()
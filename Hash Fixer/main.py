@@ -1,84 +1,77 @@
-from core import parser
-
-from colorama import Fore, Style
-import colorama
+from core import parser, journal, stats, log, registry, ingest, remap
 
+from concurrent.futures import ThreadPoolExecutor
 from typing import Optional, Union
-import logging
+import argparse
+import fnmatch
 import regex
 import glob
 import json
+import sys
 import os
 
-colorama.init()
-
-
-class CustomFormatter(logging.Formatter):
-    magenta = Fore.LIGHTMAGENTA_EX
-    light_red = Fore.LIGHTRED_EX
-    yellow = Fore.YELLOW
-    green = Fore.GREEN
-    red = Fore.RED
-    reset = Fore.RESET
-
-    format_ = f'[{{0}}%(levelname)s{Style.RESET_ALL}] [%(filename)s:%(lineno)s] %(message)s'
+logger = log.setup_logger(__name__)
 
-    FORMATS = {
-        logging.DEBUG: format_.format(magenta),
-        logging.INFO: format_.format(green),
-        logging.WARNING: format_.format(yellow),
-        logging.ERROR: format_.format(light_red),
-        logging.CRITICAL: format_.format(red)
-    }
+REGISTRY = 'common_hash.bin'
 
-    def format(self, record):
-        log_fmt = self.FORMATS.get(record.levelno)
-        formatter = logging.Formatter(log_fmt)
-        return formatter.format(record)
+MODES = ('fix', 'restore', 'remap')
 
+DEFAULT_PATTERNS = ('TextureOverride*', 'ShaderOverride*')
 
-logger = logging.Logger(__name__)
-logger.setLevel(logging.INFO)
 
-stream_handler = logging.StreamHandler()
-stream_handler.setFormatter(CustomFormatter())
+def compile_patterns(patterns: Union[list, tuple]) -> regex.Pattern:
+    """Combines every section name pattern into a single case insensitive matcher
 
-logger.addHandler(stream_handler)
-
-RESECTION = regex.compile(r'''
-    ^
-    (Texture|Shader)
-    Override
-    .*?
-    (Cards|FaceHead|VertexLimitRaise|Card[A-C])
-    (Diffuse|LightMap|Shadow|ShadowRamp)?
-    $
-''', regex.VERBOSE | regex.IGNORECASE)
+    Patterns use wildcards (eg. TextureOverride*Hair*), a section only has to match one of them.
+    """
+    return regex.compile('|'.join(f'(?:{fnmatch.translate(pattern.strip())})' for pattern in patterns),
+                         regex.IGNORECASE)
 
 
 class HashFixer(object):
     config = parser.ModConfigParser()
     mod_config = parser.ModConfigParser(restrict=False)
 
-    def __init__(self, mode: Optional[str] = 'fix') -> None:
+    def __init__(self, mode: Optional[str] = 'fix', mod_folder: Optional[str] = None,
+                 workers: Optional[int] = 1, log_file: Optional[str] = None) -> None:
         self.mod_folder = None
+        self.log_file = None
+        self.section_patterns = list(DEFAULT_PATTERNS)
         self.suppress_no_header_err = False
         self.common_hash = None
+        self.journal = journal.EditJournal()
 
-        if mode.lower() not in ('fix', 'restore'):
+        if mode.lower() not in MODES:
             raise ValueError(f'Unknown mode {mode}')
+        if workers < 1:
+            raise ValueError(f'Invalid worker count {workers}')
         self.mode = mode.lower()
+        self.workers = workers
+        self.stats = stats.RunStats(self.mode, workers)
         self.load_config()
+        self.section_matcher = compile_patterns(self.section_patterns)
+
+        if mod_folder is not None:
+            self.mod_folder = mod_folder
+        if log_file is not None:
+            self.log_file = log_file
 
     @staticmethod
-    def load_hash() -> set:
+    def load_hash() -> registry.HashRegistry:
+        # Without a registry common_hash.txt is still the list shipped with the tool,
+        # afterwards anything new in it was added by the user
+        if os.path.exists(REGISTRY):
+            common_hash = registry.HashRegistry.load(REGISTRY)
+            source = registry.USER
+        else:
+            common_hash = registry.HashRegistry()
+            source = registry.SHIPPED
+
         if not os.path.exists('common_hash.txt'):
             open('common_hash.txt', 'w').close()
-            return set()
-
-        with open('common_hash.txt', 'r', encoding='utf-8') as file:
-            common_hash = set(line.strip() for line in file.readlines())
-            file.close()
+        added = common_hash.merge_text('common_hash.txt', source)
+        if added:
+            logger.info(f'Added {added} hash(es) from common_hash.txt')
         return common_hash
 
     def create_config(self) -> None:
@@ -88,11 +81,17 @@ class HashFixer(object):
         self.config.add_section('Path')
         self.config.add_section('Settings')
         self.config.set('Path', 'mod_folder', self.mod_folder)
+        self.config.add_comment('Optional, path to the 3DMigoto log (d3d11_log.txt)', 'Path')
+        self.config.add_comment('duplicate hash warnings in the log are added to the known hashes', 'Path')
+        self.config.set('Path', 'log_file', self.log_file)
         self.config.add_comment('On most cases this value should always be set to \'false\'', 'Settings')
         self.config.add_comment('so mod config related errors will be noticed', 'Settings')
         self.config.add_comment('except if it\'s intentionaly put outside of a header (eg. HideUID mod config)', 'Settings')
         self.config.add_comment('However this is only will skip the related config instead of parsing it', 'Settings')
         self.config.set('Settings', 'suppress_no_header_error', json.dumps(self.suppress_no_header_err))
+        self.config.add_comment('Sections checked for conflicting hashes, separated by comma', 'Settings')
+        self.config.add_comment('* matches anything (eg. TextureOverride*Hair*)', 'Settings')
+        self.config.set('Settings', 'section_patterns', ', '.join(self.section_patterns))
 
         with open('config.ini', 'w', encoding='utf-8') as file:
             self.config.write(file)
@@ -109,10 +108,16 @@ class HashFixer(object):
             return
 
         try:
+            self.config.clear()
             self.config.read('config.ini')
             self.mod_folder = self.config.get('Path', 'mod_folder')
+            if self.config.has_option('Path', 'log_file'):
+                self.log_file = self.config.get('Path', 'log_file').strip() or None
             self.suppress_no_header_err = self.config.get('Settings', 'suppress_no_header_error')
             self.suppress_no_header_err = json.loads(self.suppress_no_header_err)
+            if self.config.has_option('Settings', 'section_patterns'):
+                patterns = self.config.get('Settings', 'section_patterns').split(',')
+                self.section_patterns = [pattern.strip() for pattern in patterns if pattern.strip()]
         except parser.NoSectionError as e:
             logger.error(f'{e} from config.ini')
             logger.info(f'Recreating config.ini')
@@ -133,15 +138,21 @@ class HashFixer(object):
         ini_files = glob.glob(f'{self.mod_folder}/**/*.ini', recursive=True)
         return ini_files
 
-    def collect_hash(self) -> list:
-        files = self.get_ini_files()
-        hashes = []
+    def collect_hash(self, files: Optional[list] = None) -> registry.HashRegistry:
+        if files is None:
+            files = self.get_ini_files()
+        # Files using each hash, sections of the same mod often share a hash (eg. one IB for
+        # Head, Body and Dress) so only a hash used by several files is a conflict
+        hashes = dict()
         old_hashes = self.load_hash()
 
         for file in files:
+            if 'DISABLED' in file:
+                continue
             try:
                 self.mod_config.clear()
                 self.mod_config.read(file)
+                self.stats.add_read(os.path.getsize(file))
             except parser.NoSectionHeaderError as e:
                 if self.suppress_no_header_err:
                     logger.info(f'Skipping {file}')
@@ -153,23 +164,46 @@ class HashFixer(object):
                 continue
 
             for section in self.mod_config.sections:
-                if RESECTION.match(section) is None:
+                if self.section_matcher.match(section) is None or not self.mod_config.has_option(section, 'hash'):
                     continue
-                hashes.append(self.mod_config.get(section, 'hash'))
-        hashes = set(hash_ for hash_ in hashes if hashes.count(hash_) > 1)
-        old_hashes.update(hashes.difference(old_hashes))
-
-        with open('common_hash.txt', 'w', encoding='utf-8') as file:
-            file.write('\n'.join(old_hashes))
-            file.close()
+                hashes.setdefault(self.mod_config.get(section, 'hash'), set()).add(file)
+        hashes = [hash_ for hash_, users in hashes.items() if len(users) > 1]
+        added = old_hashes.merge(hashes, registry.AUTO)
+        if added:
+            logger.info(f'Detected {added} new common hash(es)')
+
+        if self.log_file is not None:
+            added = self.ingest_log(old_hashes)
+            if added:
+                logger.info(f'Detected {added} new common hash(es) from the 3DMigoto log')
+
+        if old_hashes.modified:
+            old_hashes.save(REGISTRY)
         return old_hashes
 
-    def process(self, ini: str) -> None:
-        self.mod_config.clear()
+    def ingest_log(self, common_hash: registry.HashRegistry) -> int:
+        if not os.path.exists(self.log_file):
+            logger.warning(f'3DMigoto log not found -> {self.log_file}')
+            return 0
+
+        ingester = ingest.LogIngester(self.log_file)
+        hashes = ingester.ingest()
+        self.stats.bytes_read += ingester.bytes_read
+        return common_hash.merge(hashes, registry.AUTO)
+
+    def process(self, ini: str) -> Optional[tuple]:
+        """Applies the mode to a single ini
+
+        Returns (ini, content, edits) if the file needs to be written, otherwise None.
+        A new parser is used for every file so this can be run from multiple workers.
+        """
+        mod_config = parser.ModConfigParser(restrict=False)
         ini_name = ini.split('\\')[-1]
+        edits = []
 
         try:
-            self.mod_config.read(ini)
+            mod_config.read(ini)
+            self.stats.add_read(os.path.getsize(ini))
         except parser.NoSectionHeaderError as e:
             if self.suppress_no_header_err:
                 logger.info(f'Skipping {ini}')
@@ -181,79 +215,230 @@ class HashFixer(object):
             logger.info(f'Skipping {ini}')
             return
 
-        for section in self.mod_config.sections:
-            if not self.mod_config.has_option(section, 'hash') or parser.identifier_check(section, 'comment'):
+        for section in mod_config.sections:
+            if not mod_config.has_option(section, 'hash') or parser.identifier_check(section, 'comment'):
                 continue
 
-            hash_ = self.mod_config.get(section, 'hash')
+            hash_ = mod_config.get(section, 'hash')
             if not hash_ in self.common_hash:
                 continue
 
-            has_match_priority = self.mod_config.has_option(section, 'match_priority')
-            has_allow_duplicate = self.mod_config.has_option(section, 'allow_duplicate_hash')
+            has_match_priority = mod_config.has_option(section, 'match_priority')
+            has_allow_duplicate = mod_config.has_option(section, 'allow_duplicate_hash')
 
             if 'shaderoverride' in section.lower():
                 if not has_allow_duplicate and self.mode == 'fix':
-                    self.mod_config.set(section, 'allow_duplicate_hash', 'true')
-                    logger.info(f"Config {ini_name}: adding option 'allow_duplicate_hash' to section -> {section}")
+                    mod_config.set(section, 'allow_duplicate_hash', 'true')
+                    edits.append((section, 'allow_duplicate_hash', 'true'))
+                    logger.info(f"Config {ini_name}: adding option 'allow_duplicate_hash' to section -> {section}",
+                                extra={'file': ini, 'action': 'option(s) added'})
 
                 elif has_allow_duplicate and self.mode == 'restore':
-                    self.mod_config.remove_option(section, 'allow_duplicate_hash')
-                    logger.info(f"Config {ini_name}: deleting 'allow_duplicate_hash' from section -> {section}")
+                    mod_config.remove_option(section, 'allow_duplicate_hash')
+                    edits.append((section, 'allow_duplicate_hash', None))
+                    logger.info(f"Config {ini_name}: deleting 'allow_duplicate_hash' from section -> {section}",
+                                extra={'file': ini, 'action': 'option(s) deleted'})
             else:
                 if not has_match_priority and self.mode == 'fix':
-                    self.mod_config.set(section, 'match_priority', '0')
-                    logger.info(f"Config {ini_name}: adding option 'match_priority' to section -> {section}")
+                    mod_config.set(section, 'match_priority', '0')
+                    edits.append((section, 'match_priority', '0'))
+                    logger.info(f"Config {ini_name}: adding option 'match_priority' to section -> {section}",
+                                extra={'file': ini, 'action': 'option(s) added'})
 
                 elif has_match_priority and self.mode == 'restore':
-                    self.mod_config.remove_option(section, 'match_priority')
-                    logger.info(f"Config {ini_name}: deleting 'match_priority' from section -> {section}")
+                    mod_config.remove_option(section, 'match_priority')
+                    edits.append((section, 'match_priority', None))
+                    logger.info(f"Config {ini_name}: deleting 'match_priority' from section -> {section}",
+                                extra={'file': ini, 'action': 'option(s) deleted'})
+
+        if not edits:
+            return
+        return ini, mod_config.dumps(include_skip=True), edits
 
+    def write(self, ini: str, content: str, edits: list) -> None:
+        data = content.encode('utf-8')
         with open(ini, 'w', encoding='utf-8') as file:
-            self.mod_config.write(file)
+            file.write(content)
             file.close()
+        self.stats.add_write(len(data))
+
+        if self.mode == 'fix':
+            self.journal.record(ini, content, edits)
+        else:
+            self.journal.discard(ini)
+
+    def _safe_call(self, func, ini: str, *args) -> Optional[tuple]:
+        try:
+            return func(ini, *args)
+        except Exception as e:
+            logger.error(f'{type(e).__name__} {e.args[0]} while processing file -> {ini}')
+
+    def restore_journal(self) -> None:
+        logger.info(f'Restoring {len(self.journal)} journaled file(s)')
+
+        with self.stats.phase('process'):
+            for ini in self.journal.files:
+                try:
+                    size = os.path.getsize(ini) if os.path.exists(ini) else 0
+                    removed = self.journal.restore(ini)
+                except Exception as e:
+                    logger.error(f'{type(e).__name__} {e.args[0]} while restoring file -> {ini}')
+                    continue
+
+                if removed is None:
+                    logger.warning(f'Skipping {ini}, file is missing or modified since it was fixed')
+                    continue
+                self.stats.add_read(size)
+                self.stats.add_write(os.path.getsize(ini))
+                logger.info('Config {0}: removed {1} option(s)'.format(ini.split('\\')[-1], removed))
+
+        with self.stats.phase('write'):
+            self.journal.save()
+        logger.info('Done!')
+
+    def remap(self, table: str, undo: Optional[bool] = False, report: Optional[str] = 'remap_report.json') -> None:
+        """Replaces old hashes with new ones across the mod folder, or undoes the last remap"""
+        remapper = remap.HashRemapper(dict(), self.workers)
+        if undo:
+            remapper.journal.load()
+            with self.stats.phase('write'):
+                for ini in remapper.journal.files:
+                    reverted = remapper.journal.undo(ini)
+                    if reverted is None:
+                        logger.warning(f'Skipping {ini}, file is missing or modified since it was remapped')
+                        continue
+                    self.stats.add_write(os.path.getsize(ini))
+                    logger.info(f'Config {ini}: reverted {reverted} hash(es)',
+                                extra={'file': ini, 'action': 'hash(es) reverted'})
+                remapper.journal.save()
+            logger.info('Done!')
+            return
+
+        if self.mod_folder is None:
+            return
+        try:
+            remapper.table = remap.load_table(table)
+        except (OSError, parser.ParseError) as e:
+            logger.error(f'{type(e).__name__} {e} while loading remap table')
+            return
+        logger.info(f'Loaded {len(remapper.table)} hash pair(s)')
+
+        with self.stats.phase('scan'):
+            ini_files = self.get_ini_files()
+        if ini_files is None:
+            return
+
+        with self.stats.phase('process'):
+            changes = remapper.remap(ini_files)
+        for ini, e in remapper.errors:
+            logger.error(f'{type(e).__name__} {e} while processing file -> {ini}')
+        self.stats.files = remapper.files
+        self.stats.files_changed = len(set(entry['file'] for entry in changes))
+        self.stats.bytes_read = remapper.bytes_read
+        self.stats.bytes_written = remapper.bytes_written
+        for entry in changes:
+            logger.info(f"Config {entry['file']}: {entry['old']} -> {entry['new']} in section -> {entry['section']}",
+                        extra={'file': entry['file'], 'action': 'hash(es) remapped'})
+
+        with self.stats.phase('write'):
+            remapper.dump_report(changes, report)
+        logger.info(f'Remapped {len(changes)} hash(es) in {self.stats.files_changed} file(s)')
+        logger.info('Done!')
 
     def start(self) -> None:
         try:
             if self.mod_folder is None:
                 return
             logger.info('Starting...')
+
+            self.journal.load()
+            if self.mode == 'restore' and self.journal.exists():
+                self.restore_journal()
+                return
+            elif self.mode == 'restore':
+                logger.warning('No edit journal found, restoring every common hash section')
+
             logger.info('Scanning...')
-            ini_files = self.get_ini_files()
+            with self.stats.phase('scan'):
+                ini_files = self.get_ini_files()
             if ini_files is None:
                 return
 
             logger.info('Collecting hashes...')
-            self.common_hash = self.collect_hash()
+            with self.stats.phase('collect'):
+                self.common_hash = self.collect_hash(ini_files)
             logger.info(f'Detected {len(ini_files)} ini file(s)')
         except Exception as e:
             logger.error(f'{type(e).__name__} {e.args[0]}')
             return
 
+        targets = []
         for ini in ini_files:
             if 'DISABLED' in ini:
                 logger.info(f'Skipping {ini}')
                 continue
             logger.info('Checking {0}'.format(ini.split('\\')[-1]))
+            targets.append(ini)
 
-            try:
-                self.process(ini=ini)
-            except Exception as e:
-                logger.error(f'{type(e).__name__} {e.args[0]} while processing file -> {ini}')
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            with self.stats.phase('process'):
+                results = list(executor.map(lambda ini: self._safe_call(self.process, ini), targets))
+                results = [result for result in results if result is not None]
+
+            with self.stats.phase('write'):
+                list(executor.map(lambda result: self._safe_call(self.write, *result), results))
+                self.journal.save()
         logger.info('Done!')
 
 
-def main() -> None:
-    mode = input('Mode (fix, restore): ')
-    
+def parse_args(args: Optional[list] = None) -> argparse.Namespace:
+    arg_parser = argparse.ArgumentParser(description='Fix hash warnings upon loading multiple mods')
+    arg_parser.add_argument('mode', nargs='?', choices=MODES,
+                            help='Mode to run, prompted if not specified')
+    arg_parser.add_argument('-m', '--mod-folder', help='Mods folder path, overrides mod_folder from config.ini')
+    arg_parser.add_argument('-l', '--log-file', help='3DMigoto log path, overrides log_file from config.ini')
+    arg_parser.add_argument('-t', '--table', help='old -> new hash table used by remap mode')
+    arg_parser.add_argument('-u', '--undo', action='store_true', help='Undo the last remap')
+    arg_parser.add_argument('-w', '--workers', type=int, default=1, help='Number of worker threads (default 1)')
+    arg_parser.add_argument('-f', '--format', choices=('text', 'json'), default='text',
+                            help='Output format of the run statistics (default text)')
+    arg_parser.add_argument('-v', '--verbosity', choices=log.VERBOSITY, default='verbose',
+                            help='verbose logs every section, summary logs per-file counts (default verbose)')
+    arg_parser.add_argument('-s', '--stats', default='hash_fixer_stats.json',
+                            help='Path of the JSON statistics file (default hash_fixer_stats.json)')
+    return arg_parser.parse_args(args)
+
+
+def main(args: Optional[list] = None) -> None:
+    args = parse_args(args)
+    log.set_verbosity(logger, args.verbosity)
+    mode = args.mode
+    if mode is None:
+        mode = input('Mode (fix, restore, remap): ')
+    if mode == 'remap' and args.table is None and not args.undo:
+        logger.error('remap mode requires a hash table (--table)')
+        return
+
     try:
-        chash = HashFixer(mode=mode)
+        chash = HashFixer(mode=mode, mod_folder=args.mod_folder, workers=args.workers,
+                          log_file=args.log_file)
     except ValueError as e:
         logger.error(e)
         return
-    chash.start()
+    if chash.mode == 'remap':
+        chash.remap(args.table, args.undo)
+    else:
+        chash.start()
+    log.summarize(logger)
+
+    chash.stats.stop()
+    log.report(logger, f'Run statistics\n{chash.stats.dumps(args.format)}')
+    chash.stats.dump(args.stats)
 
 
 if __name__ == '__main__':
+    interactive = len(sys.argv) == 1
     main()
-    input()
+    log.shutdown()
+    if interactive:
+        input()
@@ -0,0 +1,41 @@
+import unittest
+import tempfile
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core import ingest
+
+
+class TestLogIngester(unittest.TestCase):
+    def setUp(self) -> None:
+        self.folder = tempfile.TemporaryDirectory()
+        self.log = os.path.join(self.folder.name, 'd3d11_log.txt')
+        self.state = os.path.join(self.folder.name, 'log_state.json')
+
+    def tearDown(self) -> None:
+        self.folder.cleanup()
+
+    def write(self, content: str) -> None:
+        with open(self.log, 'a', encoding='utf-8') as file:
+            file.write(content)
+            file.close()
+
+    def test_line_longer_than_chunk(self) -> None:
+        padding = 'x' * 100
+        self.write(f'{padding} Duplicate TextureOverride hash: 1a2b3c4d {padding}\n'
+                   'Duplicate ShaderOverride hash 00aa11bb22cc33dd\n')
+        ingester = ingest.LogIngester(self.log, self.state, chunk_size=16)
+        self.assertEqual(ingester.ingest(), {'1a2b3c4d', '00aa11bb22cc33dd'})
+        self.assertEqual(ingester.offset, os.path.getsize(self.log))
+
+    def test_partial_line_is_read_next_run(self) -> None:
+        self.write('Duplicate TextureOverride hash: 1a2b')
+        self.assertEqual(ingest.LogIngester(self.log, self.state, chunk_size=8).ingest(), set())
+        self.write('3c4d\n')
+        self.assertEqual(ingest.LogIngester(self.log, self.state, chunk_size=8).ingest(), {'1a2b3c4d'})
+
+
+if __name__ == '__main__':
+    unittest.main()
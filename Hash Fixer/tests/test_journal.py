@@ -0,0 +1,71 @@
+import unittest
+import tempfile
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core import parser, journal
+
+CONFIG = '''[TextureOverrideBody]
+hash = 1a2b3c4d
+if $active == 1
+    ps-t0 = ResourceBody
+endif
+match_priority = 1
+handling = skip
+'''
+
+
+class TestEditJournal(unittest.TestCase):
+    def setUp(self) -> None:
+        self.folder = tempfile.TemporaryDirectory()
+        self.ini = os.path.join(self.folder.name, 'mod.ini')
+        with open(self.ini, 'w', encoding='utf-8') as file:
+            file.write(CONFIG)
+            file.close()
+
+    def tearDown(self) -> None:
+        self.folder.cleanup()
+
+    def fix(self, edit_journal: journal.EditJournal) -> str:
+        config = parser.ModConfigParser(restrict=False)
+        config.read(self.ini)
+        config.set('TextureOverrideBody', 'match_priority', '0')
+        content = config.dumps(include_skip=True)
+        with open(self.ini, 'w', encoding='utf-8') as file:
+            file.write(content)
+            file.close()
+        edit_journal.record(self.ini, content, [('TextureOverrideBody', 'match_priority', '0')])
+        return content
+
+    def test_author_line_survives_restore(self) -> None:
+        edit_journal = journal.EditJournal(os.path.join(self.folder.name, 'hash_journal.json'))
+        content = self.fix(edit_journal)
+        self.assertEqual(content.count('match_priority'), 2)
+
+        lines = edit_journal._files[self.ini]['lines']
+        self.assertEqual(len(lines), 1)
+        self.assertEqual(content.split('\n')[lines[0][0]], 'match_priority = 0')
+
+        self.assertEqual(edit_journal.restore(self.ini), 1)
+        with open(self.ini, 'r', encoding='utf-8') as file:
+            restored = file.read()
+            file.close()
+        self.assertIn('match_priority = 1', restored)
+        self.assertNotIn('match_priority = 0', restored)
+
+    def test_journal_round_trip(self) -> None:
+        filename = os.path.join(self.folder.name, 'hash_journal.json')
+        edit_journal = journal.EditJournal(filename)
+        self.fix(edit_journal)
+        edit_journal.save()
+
+        loaded = journal.EditJournal(filename)
+        loaded.load()
+        self.assertEqual(loaded.edits(self.ini), [('TextureOverrideBody', 'match_priority', '0')])
+        self.assertEqual(loaded.restore(self.ini), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,129 @@
+import itertools
+import unittest
+import tempfile
+import logging
+import regex
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core import log
+import main
+
+
+# Sections checked before section_patterns was added to config.ini
+RESECTION = regex.compile(r'''
+    ^
+    (Texture|Shader)
+    Override
+    .*?
+    (Cards|FaceHead|VertexLimitRaise|Card[A-C])
+    (Diffuse|LightMap|Shadow|ShadowRamp)?
+    $
+''', regex.VERBOSE | regex.IGNORECASE)
+
+SECTIONS = ('TextureOverrideKeqingFaceHeadDiffuse', 'textureoverrideayakacards', 'ShaderOverrideVertexLimitRaise',
+            'TextureOverrideAmberCardBLightMap', 'TextureOverrideAmberCardD', 'TextureOverrideKeqingBody',
+            'TextureOverrideKeqingFaceHeadNormal', 'ShaderOverrideOutline', 'ResourceKeqingFaceHead',
+            'CommandListFaceHead', 'KeyTextureOverride', 'Present')
+
+
+class Records(logging.Handler):
+    def __init__(self) -> None:
+        super(Records, self).__init__()
+        self.messages = []
+
+    def emit(self, record: logging.LogRecord) -> None:
+        self.messages.append(record.getMessage())
+
+
+class TestRunStats(unittest.TestCase):
+    def setUp(self) -> None:
+        self.folder = tempfile.TemporaryDirectory()
+        self.cwd = os.getcwd()
+        os.chdir(self.folder.name)
+        self.mods = os.path.join(self.folder.name, 'Mods')
+        for name in ('A', 'B'):
+            self.write(os.path.join(self.mods, name, f'{name}.ini'), f'[TextureOverride{name}]\nhash = 1a2b3c4d\n')
+        self.write('config.ini', f'[Path]\nmod_folder = {self.mods}\n\n[Settings]\nsuppress_no_header_error = false\n')
+
+    def tearDown(self) -> None:
+        os.chdir(self.cwd)
+        self.folder.cleanup()
+
+    @staticmethod
+    def write(path: str, content: str) -> None:
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as file:
+            file.write(content)
+            file.close()
+
+    def test_collect_reads_are_counted(self) -> None:
+        inis = [os.path.join(self.mods, name, f'{name}.ini') for name in ('A', 'B')]
+        size = sum(os.path.getsize(ini) for ini in inis)
+        fixer = main.HashFixer('fix')
+        fixer.start()
+
+        # Each ini is read once to collect the hashes and once more to fix it
+        self.assertEqual(fixer.stats.files, 4)
+        self.assertEqual(fixer.stats.bytes_read, 2 * size)
+        self.assertEqual(fixer.stats.files_changed, 2)
+
+    def test_report_is_logged_when_quiet(self) -> None:
+        logger = log.setup_logger('quiet')
+        records = Records()
+        logger.addHandler(records)
+        log.set_verbosity(logger, 'quiet')
+        logger.info('Checking A.ini')
+        log.report(logger, 'Run statistics')
+        self.assertEqual(records.messages, ['Run statistics'])
+
+
+
+class TestSectionPatterns(unittest.TestCase):
+    def matched(self, patterns: list) -> list:
+        matcher = main.compile_patterns(patterns)
+        return [section for section in SECTIONS if matcher.match(section) is not None]
+
+    def test_default_covers_old_sections(self) -> None:
+        old = [section for section in SECTIONS if RESECTION.match(section) is not None]
+        default = self.matched(main.DEFAULT_PATTERNS)
+        self.assertTrue(set(old) < set(default))
+        self.assertEqual(default, [section for section in SECTIONS
+                                   if section.lower().startswith(('textureoverride', 'shaderoverride'))])
+
+    def test_patterns_of_old_sections(self) -> None:
+        patterns = [f'{prefix}Override*{name}{suffix}' for prefix, name, suffix in itertools.product(
+            ('Texture', 'Shader'), ('Cards', 'FaceHead', 'VertexLimitRaise', 'Card[A-C]'),
+            ('', 'Diffuse', 'LightMap', 'Shadow', 'ShadowRamp'))]
+        self.assertEqual(self.matched(patterns), [section for section in SECTIONS if RESECTION.match(section)])
+
+    def test_regex_metacharacters_are_literal(self) -> None:
+        matcher = main.compile_patterns([' TextureOverride(Hair)+ ', 'Shader.Override|Present', 'Resource$*'])
+        for section in ('TextureOverride(Hair)+', 'textureoverride(hair)+', 'Shader.Override|Present', 'Resource$A'):
+            self.assertIsNotNone(matcher.match(section), section)
+        for section in ('TextureOverrideHairHair', 'TextureOverride(Hair)+Body', 'ShaderXOverride|Present',
+                        'Present', 'ResourceA'):
+            self.assertIsNone(matcher.match(section), section)
+
+    def test_patterns_from_config(self) -> None:
+        with tempfile.TemporaryDirectory() as folder:
+            cwd = os.getcwd()
+            os.chdir(folder)
+            try:
+                with open('config.ini', 'w', encoding='utf-8') as file:
+                    file.write('[Path]\nmod_folder = Mods\n\n[Settings]\nsuppress_no_header_error = false\n'
+                               'section_patterns = TextureOverride*FaceHead*, ,ShaderOverride*\n')
+                    file.close()
+                fixer = main.HashFixer('fix')
+            finally:
+                os.chdir(cwd)
+        self.assertEqual(fixer.section_patterns, ['TextureOverride*FaceHead*', 'ShaderOverride*'])
+        self.assertEqual([section for section in SECTIONS if fixer.section_matcher.match(section)],
+                         ['TextureOverrideKeqingFaceHeadDiffuse', 'ShaderOverrideVertexLimitRaise',
+                          'TextureOverrideKeqingFaceHeadNormal', 'ShaderOverrideOutline'])
+
+
+if __name__ == '__main__':
+    unittest.main()
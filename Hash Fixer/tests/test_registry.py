@@ -0,0 +1,109 @@
+import unittest
+import tempfile
+import random
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core import registry
+
+
+class TestHashRegistry(unittest.TestCase):
+    def setUp(self) -> None:
+        self.folder = tempfile.TemporaryDirectory()
+        self.filename = os.path.join(self.folder.name, 'common_hash.bin')
+
+    def tearDown(self) -> None:
+        self.folder.cleanup()
+
+    def write_text(self, name: str, hashes: list) -> str:
+        path = os.path.join(self.folder.name, name)
+        with open(path, 'w', encoding='utf-8') as file:
+            file.write('\n'.join(hashes) + '\n')
+            file.close()
+        return path
+
+    def test_load_maps_the_file(self) -> None:
+        saved = registry.HashRegistry()
+        saved.merge(['1a2b3c4d', '00aa11bb22cc33dd', 'ff'], registry.SHIPPED)
+        saved.save(self.filename)
+
+        loaded = registry.HashRegistry.load(self.filename)
+        self.assertIsInstance(loaded._values, memoryview)
+        self.assertEqual(list(loaded), ['ff', '1a2b3c4d', '00aa11bb22cc33dd'])
+        self.assertEqual(loaded.source('1a2b3c4d'), 'shipped')
+        self.assertFalse(loaded.modified)
+
+        # Adding copies the columns out of the map so the file can be rewritten
+        self.assertTrue(loaded.add('2b3c4d5e', registry.AUTO))
+        self.assertIsNone(loaded._mmap)
+        loaded.save(self.filename)
+        reloaded = registry.HashRegistry.load(self.filename)
+        self.assertEqual(reloaded.dumps(), loaded.dumps())
+        reloaded.close()
+
+    def test_lookup_keeps_widths_apart(self) -> None:
+        hashes = registry.HashRegistry()
+        hashes.merge(['0aa762ab3bbe42c2', 'aa762ab3bbe42c2', '00000001', '1'])
+        self.assertEqual(len(hashes), 4)
+        for hash_ in ('0aa762ab3bbe42c2', 'AA762AB3BBE42C2', '00000001', '1'):
+            self.assertIn(hash_, hashes)
+        for hash_ in ('00aa762ab3bbe42c2', '0001', 'zz', ''):
+            self.assertNotIn(hash_, hashes)
+        self.assertFalse(hashes.add('aa762ab3bbe42c2'))
+
+    def test_merge_matches_sorted_union(self) -> None:
+        rng = random.Random(3)
+        first = [f'{rng.getrandbits(32):08x}' for _ in range(500)]
+        second = [f'{rng.getrandbits(32):08x}' for _ in range(500)] + first[:100]
+
+        hashes = registry.HashRegistry()
+        self.assertEqual(hashes.merge(first), len(set(first)))
+        other = registry.HashRegistry()
+        other.merge(second, registry.AUTO)
+        added = hashes.merge(other)
+
+        expected = sorted(set(first) | set(second), key=registry.parse_hash)
+        self.assertEqual(added, len(expected) - len(set(first)))
+        self.assertEqual(list(hashes), expected)
+        values = list(hashes._values)
+        self.assertEqual(values, sorted(values))
+
+    def test_duplicate_keeps_first_source(self) -> None:
+        shipped = self.write_text('shipped.txt', ['1a2b3c4d', 'bad hash', '2b3c4d5e'])
+        user = self.write_text('user.txt', ['2B3C4D5E', '3c4d5e6f', '3c4d5e6f'])
+        hashes = registry.HashRegistry.from_text(shipped, registry.SHIPPED)
+        self.assertEqual(hashes.merge_text(user, registry.USER), 1)
+        self.assertEqual(hashes.merge(['1a2b3c4d', '3c4d5e6f'], registry.AUTO), 0)
+
+        self.assertEqual(hashes.dumps(), '1a2b3c4d shipped\n2b3c4d5e shipped\n3c4d5e6f user')
+        self.assertEqual(hashes.diff(registry.HashRegistry.from_text(user)), ([], ['1a2b3c4d']))
+
+    def test_empty_registry(self) -> None:
+        self.assertEqual(len(registry.HashRegistry.load(self.filename)), 0)
+        open(self.filename, 'wb').close()
+        empty = registry.HashRegistry.load(self.filename)
+        self.assertEqual(len(empty), 0)
+        self.assertNotIn('1a2b3c4d', empty)
+        self.assertIsNone(empty.source('1a2b3c4d'))
+        self.assertEqual(empty.dumps(), '')
+        self.assertEqual(empty.merge([]), 0)
+        self.assertFalse(empty.modified)
+
+        empty.save(self.filename)
+        loaded = registry.HashRegistry.load(self.filename)
+        self.assertEqual(list(loaded), [])
+        self.assertEqual(loaded.merge(['1a2b3c4d']), 1)
+        self.assertEqual(list(loaded), ['1a2b3c4d'])
+
+    def test_invalid_file(self) -> None:
+        with open(self.filename, 'wb') as file:
+            file.write(b'NOPE' + bytes(6))
+            file.close()
+        with self.assertRaises(ValueError):
+            registry.HashRegistry.load(self.filename)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,97 @@
+import unittest
+import tempfile
+import json
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core import remap
+
+
+class TestHashRemapper(unittest.TestCase):
+    def setUp(self) -> None:
+        self.folder = tempfile.TemporaryDirectory()
+        self.files = []
+        for name, data in (('a.ini', b'[TextureOverrideA]\nhash = aaaa1111\n'),
+                           ('b.ini', b'[TextureOverrideB]\nhash = aaaa1111\n; \xff\xfe\n')):
+            path = os.path.join(self.folder.name, name)
+            with open(path, 'wb') as file:
+                file.write(data)
+                file.close()
+            self.files.append(path)
+
+    def tearDown(self) -> None:
+        self.folder.cleanup()
+
+    def test_unreadable_file_is_skipped_and_undo_works(self) -> None:
+        remapper = remap.HashRemapper({'aaaa1111': 'bbbb2222'}, workers=2)
+        remapper.journal.filename = os.path.join(self.folder.name, 'remap_journal.json')
+        report = remapper.remap(self.files)
+
+        self.assertEqual([entry['file'] for entry in report], [self.files[0]])
+        self.assertEqual([ini for ini, _ in remapper.errors], [self.files[1]])
+        self.assertTrue(remapper.journal.exists())
+
+        undo = remap.RemapJournal(remapper.journal.filename)
+        undo.load()
+        self.assertEqual(undo.undo(self.files[0]), 1)
+        with open(self.files[0], 'r', encoding='utf-8') as file:
+            self.assertIn('hash = aaaa1111', file.read())
+            file.close()
+
+
+    def test_bytes_are_counted_on_disk(self) -> None:
+        with open(self.files[1], 'wb') as file:
+            file.write('[TextureOverrideB]\nhash = aaaa1111\n; café\n'.encode('utf-8'))
+            file.close()
+        size = sum(os.path.getsize(ini) for ini in self.files)
+        remapper = remap.HashRemapper({'aaaa1111': 'bbbb2222'})
+        remapper.journal.filename = os.path.join(self.folder.name, 'remap_journal.json')
+        remapper.remap(self.files)
+
+        self.assertEqual(remapper.bytes_read, size)
+        self.assertEqual(remapper.bytes_written, sum(os.path.getsize(ini) for ini in self.files))
+
+
+class TestRemapJournal(unittest.TestCase):
+    def setUp(self) -> None:
+        self.folder = tempfile.TemporaryDirectory()
+        self.filename = os.path.join(self.folder.name, 'remap_journal.json')
+
+    def tearDown(self) -> None:
+        self.folder.cleanup()
+
+    def read_lines(self) -> list:
+        with open(self.filename, 'r', encoding='utf-8') as file:
+            lines = [json.loads(line) for line in file]
+            file.close()
+        return lines
+
+    def test_records_are_appended_until_saved(self) -> None:
+        journal_ = remap.RemapJournal(self.filename)
+        journal_.begin()
+        journal_.record('a.ini', 'hash = bbbb2222', [(0, 'A', 'aaaa1111', 'hash = aaaa1111', 'hash = bbbb2222')])
+        journal_.record('b.ini', 'hash = bbbb2222', [(0, 'B', 'aaaa1111', 'hash = aaaa1111', 'hash = bbbb2222')])
+        journal_.revert_record('b.ini', None)
+        self.assertEqual([line.get('path') for line in self.read_lines()], [None, 'a.ini', 'b.ini', 'b.ini'])
+
+        # Interrupted before save, the appended records are still read back
+        interrupted = remap.RemapJournal(self.filename)
+        interrupted.load()
+        self.assertEqual(interrupted.files, ['a.ini'])
+
+        journal_.save()
+        self.assertEqual([line.get('path') for line in self.read_lines()], [None, 'a.ini'])
+
+    def test_single_object_journal_is_loaded(self) -> None:
+        with open(self.filename, 'w', encoding='utf-8') as file:
+            json.dump({'version': 1, 'files': {'a.ini': {'fingerprint': '00', 'lines': [[0, 'old', 'new']]}}}, file)
+            file.close()
+        journal_ = remap.RemapJournal(self.filename)
+        journal_.load()
+        self.assertEqual(journal_.files, ['a.ini'])
+
+
+if __name__ == '__main__':
+    unittest.main()
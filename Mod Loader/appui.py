@@ -1,6 +1,11 @@
-from PySide2.QtCore import (QMetaObject, QRect, QSize)
+from main import ModLoader
+from workers import Worker
+import loading
+
+from PySide2.QtCore import (QCoreApplication, QMetaObject, QRect, QSize, QThreadPool)
 from PySide2.QtGui import QFont
 from PySide2.QtWidgets import *
+from typing import Optional
 
 
 class ModLoaderUI(QMainWindow):
@@ -171,9 +176,89 @@ class ModLoaderUI(QMainWindow):
         self.save_button.setObjectName('save_button')
         self.save_button.setGeometry(QRect(390, 510, 221, 31))
 
+        self.loader = None
+        self.pool = None
+        self.workers = []
+        self.progress = loading.LoadProgress()
+
         self.retranslate_ui()
         QMetaObject.connectSlotsByName(self)
 
+    def load(self, loader: ModLoader, pool: Optional[QThreadPool] = None) -> None:
+        """Loads the library and the slots on the thread pool
+
+        The slots list and the mod counts are filled batch by batch while the window stays
+        responsive, the keys of merged mods are read once the library is loaded.
+        """
+        self.loader = loader
+        self.pool = pool if pool is not None else QThreadPool.globalInstance()
+        self.progress = loading.LoadProgress()
+        self.update_counts()
+        self.slots.clear()
+
+        library = Worker(loading.library_items(loader))
+        library.signals.batch.connect(self.add_mods)
+        library.signals.finished.connect(self.library_loaded)
+        slots = Worker(loading.slot_items(loader))
+        slots.signals.batch.connect(self.add_slots)
+        for worker in (library, slots):
+            self.start_worker(worker)
+
+    def start_worker(self, worker: Worker) -> None:
+        worker.signals.failed.connect(self.show_error)
+        worker.signals.finished.connect(self.worker_finished)
+        self.workers.append(worker)
+        self.pool.start(worker)
+
+    def worker_finished(self) -> None:
+        signals = self.sender()
+        self.workers = [worker for worker in self.workers if worker.signals is not signals]
+
+    def wait(self, msecs: Optional[int] = -1) -> bool:
+        """Waits until every worker finished and their signals were handled
+
+        Meant for running without an event loop, like with the offscreen platform.
+        """
+        while self.workers:
+            if not self.pool.waitForDone(msecs):
+                return False
+            QCoreApplication.processEvents()
+        return True
+
+    def add_mods(self, mods: list) -> None:
+        self.progress.add_mods(mods)
+        self.update_counts()
+
+    def add_slots(self, names: list) -> None:
+        self.progress.add_slots(names)
+        self.slots.addItems(names)
+
+    def library_loaded(self, success: bool) -> None:
+        pending = self.progress.library_loaded(self.loader, success)
+        self.update_counts()
+        message = loading.conflicts_message(self.loader) if success else None
+        if message is not None:
+            self.show_error(message)
+        if not pending:
+            return
+
+        keys = Worker(loading.key_items(pending))
+        keys.signals.batch.connect(self.save_keys)
+        self.start_worker(keys)
+
+    def save_keys(self, mods: list) -> None:
+        loading.save_keys(self.loader, mods)
+
+    def update_counts(self) -> None:
+        self.normal_mod_count.setText(f'Normal mods: {self.progress.normal_count}')
+        self.merged_mod_count.setText(f'Merged mods: {self.progress.merged_count}')
+
+    def show_error(self, message: str) -> None:
+        self.progress.add_error(message)
+        box = QMessageBox(QMessageBox.Warning, 'Mod Loader', message, QMessageBox.Ok, self)
+        # Window modal, the workers still running keep filling the window
+        box.open()
+
     def retranslate_ui(self):
         self.setWindowTitle('Mod Loader')
 
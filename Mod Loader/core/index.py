@@ -0,0 +1,275 @@
+from core import scan, planner
+
+from typing import Optional
+import sqlite3
+import os
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE IF NOT EXISTS dirs (path TEXT PRIMARY KEY, parent TEXT, mtime INTEGER);
+CREATE TABLE IF NOT EXISTS files (dir TEXT, name TEXT, size INTEGER, PRIMARY KEY (dir, name));
+CREATE TABLE IF NOT EXISTS mods (
+    id INTEGER PRIMARY KEY, name TEXT, type INTEGER, path TEXT UNIQUE,
+    parent INTEGER, size INTEGER, active INTEGER
+);
+CREATE TABLE IF NOT EXISTS configs (mod INTEGER, path TEXT);
+CREATE TABLE IF NOT EXISTS keys (path TEXT, mtime INTEGER, section TEXT, key TEXT);
+CREATE INDEX IF NOT EXISTS files_dir ON files (dir);
+CREATE INDEX IF NOT EXISTS configs_mod ON configs (mod);
+'''
+VERSION = '2'
+
+
+class LibraryIndex(object):
+    """Persistent index of the Mods folder stored in SQLite
+
+    Every directory is stored with its mtime, so the index is validated with a single stat
+    per directory and only the subtrees that changed are scanned again. Adding, removing or
+    renaming a file changes the mtime of its directory, a file edited in place does not.
+    Mods keep their id for as long as their path doesn't change.
+    """
+
+    def __init__(self, filename: Optional[str] = 'library.db') -> None:
+        self.filename = filename
+        self.connection = None
+
+    def open(self) -> None:
+        # The library can be loaded by a worker thread, the connection is only used by one thread at a time
+        self.connection = sqlite3.connect(self.filename, check_same_thread=False)
+        self.connection.executescript(SCHEMA)
+        if self.get_meta('version') != VERSION:
+            self.clear()
+            self.set_meta('version', VERSION)
+
+    def close(self) -> None:
+        if self.connection is not None:
+            self.connection.close()
+            self.connection = None
+
+    def get_meta(self, key: str) -> Optional[str]:
+        row = self.connection.execute('SELECT value FROM meta WHERE key = ?', (key,)).fetchone()
+        return row[0] if row else None
+
+    def set_meta(self, key: str, value: str) -> None:
+        with self.connection:
+            self.connection.execute('INSERT OR REPLACE INTO meta VALUES (?, ?)', (key, value))
+
+    def clear(self) -> None:
+        with self.connection:
+            for table in ('meta', 'dirs', 'files', 'mods', 'configs', 'keys'):
+                self.connection.execute(f'DELETE FROM {table}')
+
+    def load_tree(self) -> Optional[scan.DirNode]:
+        """Rebuilds the directory tree of the last scan without touching the disk"""
+        root = self.get_meta('root')
+        nodes = dict()
+        for path, parent, mtime in self.connection.execute('SELECT path, parent, mtime FROM dirs'):
+            nodes[path] = (scan.DirNode(path, mtime), parent)
+        if root not in nodes:
+            return
+
+        for path, (node, parent) in nodes.items():
+            if parent is not None and parent in nodes:
+                nodes[parent][0].dirs.append(node)
+        for directory, name, size in self.connection.execute('SELECT dir, name, size FROM files'):
+            if directory in nodes:
+                nodes[directory][0].files[name] = size
+
+        for node, _ in nodes.values():
+            node.dirs.sort(key=lambda child: child.name.lower())
+            node.files = dict(sorted(node.files.items(), key=lambda item: item[0].lower()))
+        tree = nodes[root][0]
+        scan.update_sizes(tree)
+        return tree
+
+    def changed_dirs(self) -> list:
+        """Directories that were modified or removed since they were indexed, parents first"""
+        changed = []
+        for path, mtime in self.connection.execute('SELECT path, mtime FROM dirs ORDER BY length(path)'):
+            if any(is_below(path, parent) for parent in changed):
+                continue
+            try:
+                if os.stat(path).st_mtime_ns == mtime:
+                    continue
+            except OSError:
+                pass
+            changed.append(path)
+        return changed
+
+    def refresh(self, root: str) -> Optional[scan.DirNode]:
+        """Brings the index up to date with the disk
+
+        Returns the updated tree, or None if nothing changed since the last refresh.
+        """
+        if not self.indexed(root):
+            tree = scan.scan_tree(root)
+            self.store(tree)
+            return tree
+
+        changed = self.changed_dirs()
+        if not changed:
+            return
+        tree = self.load_tree()
+        nodes = {node.path: (node, parent) for node, parent in walk_parents(tree)}
+
+        with self.connection:
+            for path in changed:
+                node, parent = nodes[path]
+                self._delete(path)
+                if not os.path.isdir(path):
+                    if parent is None:
+                        raise FileNotFoundError(f'Unable to find {path}')
+                    parent.dirs.remove(node)
+                    continue
+
+                rescanned = scan.scan_tree(path)
+                if parent is None:
+                    tree = rescanned
+                else:
+                    parent.dirs[parent.dirs.index(node)] = rescanned
+                self._insert(rescanned, parent.path if parent is not None else None)
+        scan.update_sizes(tree)
+        return tree
+
+    def indexed(self, root: str) -> bool:
+        indexed = self.connection.execute('SELECT 1 FROM dirs WHERE path = ?', (root,)).fetchone()
+        return self.get_meta('root') == root and indexed is not None
+
+    def store(self, tree: scan.DirNode) -> None:
+        """Replaces the indexed directories with a tree scanned from scratch"""
+        with self.connection:
+            self.connection.execute('DELETE FROM dirs')
+            self.connection.execute('DELETE FROM files')
+            self._insert(tree, None)
+            self.connection.execute('INSERT OR REPLACE INTO meta VALUES (?, ?)', ('root', tree.path))
+
+    def _insert(self, tree: scan.DirNode, parent: Optional[str]) -> None:
+        dirs = []
+        files = []
+        for node, node_parent in walk_parents(tree):
+            dirs.append((node.path, node_parent.path if node_parent is not None else parent, node.mtime))
+            files.extend((node.path, name, size) for name, size in node.files.items())
+        self.connection.executemany('INSERT OR REPLACE INTO dirs VALUES (?, ?, ?)', dirs)
+        self.connection.executemany('INSERT OR REPLACE INTO files VALUES (?, ?, ?)', files)
+
+    def _delete(self, path: str) -> None:
+        prefix = os.path.join(path, '')
+        for table, column in (('dirs', 'path'), ('files', 'dir')):
+            self.connection.execute(f'DELETE FROM {table} WHERE {column} = ? OR substr({column}, 1, ?) = ?',
+                                    (path, len(prefix), prefix))
+
+    def renamed(self, renames: list) -> None:
+        """Follows the renames of an activation without scanning again
+
+        Paths below a renamed folder are moved with it, and the mtime of the folders holding
+        the renamed paths is updated since the rename changed it.
+        """
+        columns = (('dirs', 'path'), ('dirs', 'parent'), ('files', 'dir'), ('mods', 'path'),
+                   ('configs', 'path'), ('keys', 'path'))
+        touched = set()
+        with self.connection:
+            for source, target in renames:
+                folder, name = os.path.split(source)
+                self.connection.execute('UPDATE files SET name = ? WHERE dir = ? AND name = ?',
+                                        (os.path.basename(target), folder, name))
+                prefix = os.path.join(source, '')
+                for table, column in columns:
+                    self.connection.execute(f'UPDATE {table} SET {column} = ? || substr({column}, ?) '
+                                            f'WHERE {column} = ? OR substr({column}, 1, ?) = ?',
+                                            (target, len(source) + 1, source, len(prefix), prefix))
+                touched.update((os.path.dirname(source), source))
+
+            for path in set(planner.follow(path, renames) for path in touched):
+                try:
+                    mtime = os.stat(path).st_mtime_ns
+                except OSError:
+                    continue
+                self.connection.execute('UPDATE dirs SET mtime = ? WHERE path = ?', (mtime, path))
+
+    def set_active(self, rows: list) -> None:
+        """Updates the active state of the mods given as (active, id)"""
+        with self.connection:
+            self.connection.executemany('UPDATE mods SET active = ? WHERE id = ?', rows)
+
+    def load_mods(self) -> list:
+        """Returns every indexed mod as a dict, childs of merged mods have the id of the merged mod as parent
+
+        A child can come before its merged mod, mods that are merged later keep their older id.
+        """
+        configs = dict()
+        for mod, path in self.connection.execute('SELECT mod, path FROM configs'):
+            configs.setdefault(mod, []).append(path)
+
+        keys = dict()
+        for path, section, key in self.connection.execute('SELECT path, section, key FROM keys'):
+            keys.setdefault(path, [])
+            if section is not None:
+                keys[path].append((section, key))
+
+        mods = []
+        query = 'SELECT id, name, type, path, parent, size, active FROM mods ORDER BY id'
+        for id_, name, type_, path, parent, size, active in self.connection.execute(query):
+            mods.append({'id': id_, 'name': name, 'type': type_, 'path': path, 'parent': parent, 'size': size,
+                         'active': active, 'configs': configs.get(id_, []), 'keys': keys.get(path, [])})
+        return mods
+
+    def save_mods(self, mods: list) -> dict:
+        """Stores the mods, parents must come before their childs
+
+        Each mod is a dict like the ones from load_mods with parent being the path of the merged mod.
+        Returns {path: id}, mods that are already indexed keep their id.
+        """
+        ids = dict(self.connection.execute('SELECT path, id FROM mods'))
+        paths = set(mod['path'] for mod in mods)
+
+        with self.connection:
+            removed = [(id_,) for path, id_ in ids.items() if path not in paths]
+            self.connection.executemany('DELETE FROM mods WHERE id = ?', removed)
+            self.connection.execute('DELETE FROM configs')
+            for mod in mods:
+                parent = ids.get(mod['parent']) if mod['parent'] is not None else None
+                values = (mod['name'], mod['type'], parent, mod['size'], mod['active'])
+                if mod['path'] in ids:
+                    self.connection.execute('UPDATE mods SET name = ?, type = ?, parent = ?, size = ?, active = ? '
+                                            'WHERE id = ?', values + (ids[mod['path']],))
+                else:
+                    cursor = self.connection.execute('INSERT INTO mods (name, type, parent, size, active, path) '
+                                                     'VALUES (?, ?, ?, ?, ?, ?)', values + (mod['path'],))
+                    ids[mod['path']] = cursor.lastrowid
+                self.connection.executemany('INSERT INTO configs VALUES (?, ?)',
+                                            [(ids[mod['path']], config) for config in mod['configs']])
+        return {path: id_ for path, id_ in ids.items() if path in paths}
+
+    def cached_keys(self, path: str) -> Optional[list]:
+        """Keys of an ini as [(section, key)], None if the ini changed since they were stored"""
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except OSError:
+            return
+        rows = self.connection.execute('SELECT mtime, section, key FROM keys WHERE path = ?', (path,)).fetchall()
+        if not rows or rows[0][0] != mtime:
+            return
+        return [(section, key) for _, section, key in rows if section is not None]
+
+    def save_keys(self, path: str, keys: list) -> None:
+        """Stores the keys of an ini with its mtime, an ini without key is stored as well"""
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except OSError:
+            return
+        with self.connection:
+            self.connection.execute('DELETE FROM keys WHERE path = ?', (path,))
+            rows = [(path, mtime, section, key) for section, key in keys] or [(path, mtime, None, None)]
+            self.connection.executemany('INSERT INTO keys VALUES (?, ?, ?, ?)', rows)
+
+
+def is_below(path: str, parent: str) -> bool:
+    return path.startswith(os.path.join(parent, ''))
+
+
+def walk_parents(tree: scan.DirNode, parent: Optional[scan.DirNode] = None) -> list:
+    """Returns (node, parent) of every directory of the tree"""
+    result = [(tree, parent)]
+    for node in tree.dirs:
+        result.extend(walk_parents(node, tree))
+    return result
@@ -12,6 +12,10 @@ def identifier_check(name: str, type_: str) -> bool:
     return False
 
 
+RESWAPSECTION = regex.compile(r'^key', regex.IGNORECASE)
+REBODYSECTION = regex.compile(r'^(?:TextureOverride|ShaderOverride|Resource)', regex.IGNORECASE)
+
+
 class NoSectionError(Exception):
     """Raised when trying to get non-existent section"""
 
@@ -444,3 +448,34 @@ class ModConfigParser(MutableMapping):
 
     def __len__(self) -> int:
         return len(self._sections)
+
+
+def read_keys(filename: str) -> list:
+    """Returns (section, key) of every key option in the Key* sections (KeySwap, KeySwap2, Key...)
+
+    Only section headers and the options of key sections are matched, and reading stops at
+    the first override or resource section once a key is found, since those make up the
+    bulk of a merged.ini and come after its keys.
+    """
+    keys = []
+    section = None
+    # utf-8-sig so a BOM written by the editor doesn't hide the first section
+    with open(filename, 'r', encoding='utf-8-sig', errors='replace') as file:
+        for line in file:
+            line = line.strip()
+            if not line or line[0] in Comment.PREFIX:
+                continue
+            section_match = ModConfigParser.RESECTION.match(line)
+            if section_match:
+                section = section_match.group('section')
+                if keys and REBODYSECTION.match(section):
+                    break
+                continue
+            if section is None or not RESWAPSECTION.match(section):
+                continue
+
+            option_match = ModConfigParser.REOPTION.match(line)
+            if option_match and option_match.group('option').lower() == 'key':
+                keys.append((section, option_match.group('value')))
+        file.close()
+    return keys
@@ -0,0 +1,115 @@
+from typing import Optional
+import regex
+import json
+import os
+
+JOURNAL_VERSION = 1
+TOGGLE_CONFIGS = 'configs'
+TOGGLE_FOLDERS = 'folders'
+TOGGLES = (TOGGLE_CONFIGS, TOGGLE_FOLDERS)
+REDISABLED = regex.compile(r'^disabled', regex.IGNORECASE)
+
+
+def is_enabled(path: str) -> bool:
+    return REDISABLED.match(os.path.basename(path)) is None
+
+
+def toggled(path: str, enable: bool) -> str:
+    """Path of the file once enabled (DISABLED prefix removed) or disabled (prefix added)"""
+    folder, name = os.path.split(path)
+    if enable:
+        return os.path.join(folder, REDISABLED.sub('', name))
+    return os.path.join(folder, f'DISABLED{name}')
+
+
+def canonical(path: str) -> str:
+    """Path with the DISABLED prefix removed from every part, it doesn't change when the mods are toggled"""
+    return os.sep.join(REDISABLED.sub('', part) for part in path.split(os.sep))
+
+
+def plan(states: dict) -> list:
+    """Returns the renames needed to reach the {path: enable} states of files and folders
+
+    Paths that already have the requested state are left out, so switching between two
+    similar slots only renames what differs. The deepest paths are renamed first, so every
+    source path is still valid when a folder around it is renamed after.
+    """
+    renames = []
+    for path, enable in states.items():
+        if is_enabled(path) != enable:
+            renames.append((path, toggled(path, enable)))
+    renames.sort(key=lambda rename: rename[0].count(os.sep), reverse=True)
+    return renames
+
+
+def follow(path: str, renames: list) -> str:
+    """Path of a file or folder after the renames, including renames of the folders around it"""
+    for source, target in renames:
+        if path == source:
+            path = target
+        elif path.startswith(os.path.join(source, '')):
+            path = os.path.join(target, path[len(source) + 1:])
+    return path
+
+
+class RenameJournal(object):
+    """Executes a batch of renames with a journal to roll them back
+
+    The whole batch is written before the first rename. If a rename fails the renames done
+    so far are reverted, if the tool is closed in the middle the journal is left behind and
+    recover() reverts it on the next start.
+    """
+
+    def __init__(self, filename: Optional[str] = 'rename_journal.json') -> None:
+        self.filename = filename
+
+    def exists(self) -> bool:
+        return os.path.exists(self.filename)
+
+    def execute(self, renames: list) -> None:
+        if not renames:
+            return
+        for source, target in renames:
+            if not os.path.exists(source):
+                raise FileNotFoundError(f'Unable to find {source}')
+            if os.path.exists(target):
+                raise FileExistsError(f'Unable to rename {source}, {target} already exists')
+
+        with open(self.filename, 'w', encoding='utf-8') as file:
+            json.dump({'version': JOURNAL_VERSION, 'renames': renames}, file, separators=(',', ':'))
+            file.close()
+
+        done = []
+        try:
+            for source, target in renames:
+                os.rename(source, target)
+                done.append((source, target))
+        except OSError:
+            self._revert(done)
+            raise
+        os.remove(self.filename)
+
+    def recover(self) -> int:
+        """Reverts the renames of an interrupted batch, returns the amount of renames reverted"""
+        if not self.exists():
+            return 0
+        with open(self.filename, 'r', encoding='utf-8') as file:
+            data = json.load(file)
+            file.close()
+        if data.get('version') != JOURNAL_VERSION:
+            raise ValueError(f'Unsupported journal version {data.get("version")}')
+
+        # Renames are reverted last to first and checked one at a time: once the renames after one are
+        # reverted, the folders around it have the names it was done with again
+        reverted = 0
+        for source, target in reversed(data['renames']):
+            if os.path.exists(target) and not os.path.exists(source):
+                os.rename(target, source)
+                reverted += 1
+        os.remove(self.filename)
+        return reverted
+
+    @staticmethod
+    def _revert(done: list) -> None:
+        for source, target in reversed(done):
+            os.rename(target, source)
@@ -0,0 +1,82 @@
+from typing import Optional, Iterator
+import os
+
+
+class DirNode(object):
+    """Directory of the mods tree
+
+    Holds the size of every file and the recursive size of the directory, all taken
+    from the DirEntry.stat() results of a single scandir walk.
+    """
+
+    def __init__(self, path: str, mtime: Optional[int] = 0) -> None:
+        self.path = path
+        self.name = os.path.basename(path)
+        self.mtime = mtime
+        self.files = dict()
+        self.dirs = []
+        self.size = 0
+
+    @property
+    def inis(self) -> list:
+        return [name for name in self.files if name.lower().endswith('.ini')]
+
+    def walk(self) -> Iterator['DirNode']:
+        """Yields the directory and every directory below it, parents first"""
+        yield self
+        for node in self.dirs:
+            yield from node.walk()
+
+    def configs(self) -> list:
+        """Path of every ini in the directory and below it"""
+        return [os.path.join(node.path, name) for node in self.walk() for name in node.inis]
+
+    def __repr__(self) -> str:
+        return f'{__class__.__name__}({self.path}, files={len(self.files)}, dirs={len(self.dirs)}, size={self.size})'
+
+    __str__ = __repr__
+
+
+def scan_tree(path: str, mtime: Optional[int] = None) -> DirNode:
+    """Walks the directory once with os.scandir, the time taken is linear in the number of entries"""
+    nodes = iter_tree(path, mtime)
+    node = next(nodes)
+    for _ in nodes:
+        pass
+    return node
+
+
+def iter_tree(path: str, mtime: Optional[int] = None) -> Iterator[DirNode]:
+    """Scans the directory like scan_tree, yielding each directory directly below it once it's scanned
+
+    The directory itself is yielded first, its files, dirs and size are filled as the scan goes.
+    """
+    if mtime is None:
+        mtime = os.stat(path).st_mtime_ns
+    node = DirNode(path, mtime)
+    yield node
+
+    with os.scandir(path) as entries:
+        entries = sorted(entries, key=lambda entry: entry.name.lower())
+    for entry in entries:
+        child = None
+        try:
+            stat = entry.stat(follow_symlinks=False)
+            if entry.is_dir(follow_symlinks=False):
+                child = scan_tree(entry.path, stat.st_mtime_ns)
+                node.dirs.append(child)
+                node.size += child.size
+            elif entry.is_file(follow_symlinks=False):
+                node.files[entry.name] = stat.st_size
+                node.size += stat.st_size
+        except OSError:
+            # Files removed or locked while scanning are left out
+            continue
+        if child is not None:
+            yield child
+
+
+def update_sizes(node: DirNode) -> int:
+    """Recomputes the recursive size of every directory, after a subtree was replaced"""
+    node.size = sum(node.files.values()) + sum(update_sizes(child) for child in node.dirs)
+    return node.size
@@ -0,0 +1,140 @@
+from typing import Optional, Iterable, Iterator
+import json
+import os
+
+SLOTS_VERSION = 1
+
+
+class Slot(object):
+    """Mods active in a slot, as ids of the library index
+
+    childs maps the id of a merged mod to the id of the child that is bypassed,
+    a merged mod without child keeps merged.ini active. revision is bumped by every edit so
+    the cached activation of the slot goes stale with it.
+    """
+
+    def __init__(self, name: str, mods: Optional[Iterable[int]] = None, childs: Optional[dict] = None) -> None:
+        self.name = name
+        self.mods = set(mods) if mods is not None else set()
+        self.childs = dict(childs) if childs is not None else dict()
+        self.revision = 0
+
+    def add(self, mod: int, child: Optional[int] = None) -> None:
+        self.revision += 1
+        self.mods.add(mod)
+        if child is not None:
+            self.childs[mod] = child
+        else:
+            self.childs.pop(mod, None)
+
+    def remove(self, mod: int) -> None:
+        self.revision += 1
+        self.mods.discard(mod)
+        self.childs.pop(mod, None)
+
+    def duplicate(self, name: str) -> 'Slot':
+        return Slot(name, self.mods, self.childs)
+
+    def diff(self, other: 'Slot') -> tuple:
+        """Returns (added, removed, changed) going from this slot to other
+
+        changed are the merged mods in both slots with a different child selected.
+        """
+        common = self.mods & other.mods
+        changed = set(mod for mod in common if self.childs.get(mod) != other.childs.get(mod))
+        return other.mods - self.mods, self.mods - other.mods, changed
+
+    def to_dict(self) -> dict:
+        return {'mods': sorted(self.mods), 'childs': {str(mod): child for mod, child in sorted(self.childs.items())}}
+
+    @classmethod
+    def from_dict(cls, name: str, data: dict) -> 'Slot':
+        return cls(name, data.get('mods', []), {int(mod): child for mod, child in data.get('childs', {}).items()})
+
+    def __eq__(self, other: 'Slot') -> bool:
+        return isinstance(other, Slot) and self.mods == other.mods and self.childs == other.childs
+
+    def __repr__(self) -> str:
+        return f'{__class__.__name__}({self.name}, mods={len(self.mods)})'
+
+    __str__ = __repr__
+
+
+class SlotStore(object):
+    """Every slot of the library, stored as compact json
+
+    The resolved activation of each slot is cached in memory with the generation of the library
+    and the revision of the slot it was resolved against, it stays valid until either changes.
+    """
+
+    def __init__(self, filename: Optional[str] = 'slots.json') -> None:
+        self.filename = filename
+        self._slots = dict()
+        self._resolved = dict()
+
+    def load(self) -> None:
+        self._slots.clear()
+        self._resolved.clear()
+        if not os.path.exists(self.filename):
+            return
+        with open(self.filename, 'r', encoding='utf-8') as file:
+            data = json.load(file)
+            file.close()
+        if data.get('version') != SLOTS_VERSION:
+            raise ValueError(f'Unsupported slots version {data.get("version")}')
+        for name, slot in data['slots'].items():
+            self._slots[name] = Slot.from_dict(name, slot)
+
+    def save(self) -> None:
+        slots = {name: slot.to_dict() for name, slot in self._slots.items()}
+        with open(self.filename, 'w', encoding='utf-8') as file:
+            json.dump({'version': SLOTS_VERSION, 'slots': slots}, file, separators=(',', ':'))
+            file.close()
+
+    def add(self, slot: Slot) -> None:
+        self._slots[slot.name] = slot
+        self._resolved.pop(slot.name, None)
+
+    def remove(self, name: str) -> None:
+        del self._slots[name]
+        self._resolved.pop(name, None)
+
+    def duplicate(self, name: str, new_name: str) -> Slot:
+        if new_name in self._slots:
+            raise KeyError(f'Slot {new_name!r} already exists')
+        source = self._slots[name]
+        slot = source.duplicate(new_name)
+        self.add(slot)
+        cached = self._resolved.get(name)
+        if cached is not None and cached[1] == source.revision:
+            self._resolved[new_name] = (cached[0], slot.revision, cached[2])
+        return slot
+
+    def diff(self, name: str, other: str) -> tuple:
+        return self._slots[name].diff(self._slots[other])
+
+    def changed(self, name: str) -> None:
+        """Drops the cached activation of a slot after it was edited"""
+        self._resolved.pop(name, None)
+
+    def resolved(self, name: str, generation: int) -> Optional[dict]:
+        """Cached {path: enable} of the slot, None if it was resolved against other mods or edited since"""
+        cached = self._resolved.get(name)
+        if cached is None or cached[0] != generation or cached[1] != self._slots[name].revision:
+            return
+        return cached[2]
+
+    def cache(self, name: str, generation: int, states: dict) -> None:
+        self._resolved[name] = (generation, self._slots[name].revision, states)
+
+    def __getitem__(self, name: str) -> Slot:
+        return self._slots[name]
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._slots
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._slots)
+
+    def __len__(self) -> int:
+        return len(self._slots)
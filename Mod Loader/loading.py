@@ -0,0 +1,93 @@
+from main import ModLoader, MergedMod
+
+from typing import Optional, Iterable, Iterator
+import time
+
+BATCH_SIZE = 64
+BATCH_INTERVAL = 0.1
+
+
+def batches(items: Iterable, size: Optional[int] = BATCH_SIZE,
+            interval: Optional[float] = BATCH_INTERVAL) -> Iterator[list]:
+    """Groups the items in lists of up to size items, a list is also given once interval seconds passed
+
+    Items that come slowly are still shown in time, items that come fast don't flood the event loop
+    with one signal each.
+    """
+    batch = []
+    last = time.perf_counter()
+    for item in items:
+        batch.append(item)
+        if len(batch) >= size or time.perf_counter() - last >= interval:
+            yield batch
+            batch = []
+            last = time.perf_counter()
+    if batch:
+        yield batch
+
+
+def library_items(loader: ModLoader) -> Iterator:
+    """Loads the library, scanning and sizing the mods that aren't indexed"""
+    for mods in loader.iter_library():
+        yield from mods
+
+
+def slot_items(loader: ModLoader) -> Iterator[str]:
+    loader.load_slots()
+    yield from loader.slots
+
+
+def key_items(mods: list) -> Iterator[MergedMod]:
+    """Reads the keys of merged mods, storing them in the index is left to the thread owning it"""
+    for mod in mods:
+        mod.swap_keys  # Reads merged.ini once, the keys are kept by the mod
+        yield mod
+
+
+def save_keys(loader: ModLoader, mods: list) -> None:
+    if loader.index.connection is None:
+        return
+    for mod in mods:
+        loader.index.save_keys(str(mod.path), mod.swap_keys)
+
+
+def conflicts_message(loader: ModLoader) -> Optional[str]:
+    """Lists the mod folders that can't be toggled, None if there are none"""
+    if not loader.conflicts:
+        return
+    lines = [' and '.join(paths) for paths in loader.conflicts]
+    return 'These mods have the same name once DISABLED is removed, they are left as they are:\n' + '\n'.join(lines)
+
+
+class LoadProgress(object):
+    """State of a background load, kept out of the widgets so it can be followed without Qt"""
+
+    def __init__(self) -> None:
+        self.normal_count = 0
+        self.merged_count = 0
+        self.slots = []
+        self.loaded = False
+        self.errors = []
+
+    def add_mods(self, mods: list) -> None:
+        merged = sum(isinstance(mod, MergedMod) for mod in mods)
+        self.merged_count += merged
+        self.normal_count += len(mods) - merged
+
+    def add_slots(self, names: list) -> None:
+        self.slots.extend(names)
+
+    def add_error(self, message: str) -> None:
+        self.errors.append(message)
+
+    def library_loaded(self, loader: ModLoader, success: bool) -> list:
+        """Returns the merged mods whose keys still have to be read, none if the library failed to load
+
+        The counts are taken from the final mods, the ones of an outdated index were replaced.
+        """
+        if not success:
+            return []
+        self.loaded = True
+        self.merged_count = sum(isinstance(mod, MergedMod) for mod in loader.mods.values())
+        self.normal_count = len(loader.mods) - self.merged_count
+        return [mod for mod in loader.mods.values() if isinstance(mod, MergedMod) and not mod.swap_keys_read]
@@ -1,8 +1,9 @@
-from core import parser
+from core import parser, scan, index, planner, slots
 
 from typing import Union, Optional, Iterator
 from collections.abc import MutableMapping
 import pathlib
+import bisect
 import regex
 import glob
 import json
@@ -36,23 +37,39 @@ def get_size(path: str) -> int:
     return size
 
 
+def is_merged(name: str) -> bool:
+    return regex.match(r'^(?:disabled)?merged\.ini$', name, flags=regex.IGNORECASE) is not None
+
+
 class BasicMod(object):
-    def __init__(self, path: Union[str, pathlib.Path]) -> None:
+    def __init__(self, path: Union[str, pathlib.Path], size: Optional[int] = None,
+                 configs: Optional[list] = None) -> None:
+        # size and configs are given by the scan, otherwise they're read from the disk
         self.path = path
         if isinstance(path, str):
             self.path = pathlib.Path(path)
         if self.path.name.endswith('.ini'):
             self.path = self.path.parent
-        self.name = self.path.name
-        self.size = get_size(self.path)
+        self.name = planner.REDISABLED.sub('', self.path.name)
+        self.size = size if size is not None else get_size(self.path)
+
+        # Id of the mod in the library index
+        self.id = None
 
         # False flags since one of the config might be disabled/enabled
         self.active = 0
         self.configs = []
-        self.get_configs()
+        if configs is not None:
+            self.configs = [pathlib.Path(config) for config in configs]
+        else:
+            self.get_configs()
+
+    @classmethod
+    def from_node(cls, node: scan.DirNode) -> 'BasicMod':
+        return cls(node.path, size=node.size, configs=node.configs())
 
     def get_configs(self) -> None:
-        configs = glob.glob(f'{self.path}\\**\\*.ini', recursive=True)
+        configs = glob.glob(os.path.join(self.path, '**', '*.ini'), recursive=True)
         self.configs = [pathlib.Path(config) for config in configs]
 
     def activate(self):
@@ -69,6 +86,25 @@ class BasicMod(object):
             if 'disabled' in config.name.lower():
                 continue
             config.rename(f'{config.parent}\\DISABLED{config.name}')
+
+    def states(self, enable: bool, folders: Optional[bool] = False) -> dict:
+        """Target {path: enabled} of the folder and configs of the mod
+
+        An active mod needs both its folder and configs enabled. An inactive mod is disabled
+        by its folder when toggling folders, by its configs otherwise.
+        """
+        if enable:
+            return {str(self.path): True, **{str(config): True for config in self.configs}}
+        elif folders:
+            return {str(self.path): False}
+        return {str(config): False for config in self.configs}
+
+    def renamed(self, renames: list) -> None:
+        """Follows the renames of an activation"""
+        self.path = pathlib.Path(planner.follow(str(self.path), renames))
+        self.configs = [pathlib.Path(planner.follow(str(config), renames)) for config in self.configs]
+        self.active = int(planner.is_enabled(str(self.path))
+                          and any(planner.is_enabled(str(config)) for config in self.configs))
     
     def __repr__(self) -> str:
         return f'{__class__.__name__}({self.name})'
@@ -77,34 +113,48 @@ class BasicMod(object):
 
 
 class MergedMod(MutableMapping):
-    def __init__(self, path: Union[str, pathlib.Path], childs: Optional[dict] = None) -> None:
+    def __init__(self, path: Union[str, pathlib.Path], childs: Optional[dict] = None,
+                 size: Optional[int] = None, swap_keys: Optional[list] = None) -> None:
         self.path = path
         if isinstance(path, str):
             self.path = pathlib.Path(path)
         
-        self.size = get_size(self.path.parent)
-        self.name = self.path.parts[-2]
+        self.size = size if size is not None else get_size(self.path.parent)
+        self.name = planner.REDISABLED.sub('', self.path.parts[-2])
 
-        self.active = 1
-        if 'disabled' in self.path.name.lower():
-            self.active = 0
+        self.active = int(planner.is_enabled(str(self.path)) and planner.is_enabled(str(self.path.parent)))
 
+        self.id = None
         self._childs = dict()
         if childs is not None:
             self._childs = childs
-        self.swap_key = self.get_key()
+        # (section, key) of the key sections, read from merged.ini the first time they're needed
+        self._swap_keys = swap_keys
 
     @property
     def childs(self) -> list:
         return list(self)
 
-    def get_key(self) -> str:
-        config = parser.ModConfigParser()
-        config.read(str(self.path))
-        return config.get('KeySwap', 'key')
+    @property
+    def swap_keys_read(self) -> bool:
+        return self._swap_keys is not None
+
+    @property
+    def swap_keys(self) -> list:
+        if self._swap_keys is None:
+            self._swap_keys = parser.read_keys(str(self.path))
+        return self._swap_keys
+
+    @property
+    def swap_key(self) -> Optional[str]:
+        return self.swap_keys[0][1] if self.swap_keys else None
+
+    def get_key(self) -> Optional[str]:
+        return self.swap_key
 
     def add_child(self, mod: BasicMod):
-        self.update({mod.name: mod})
+        # A child named like another once DISABLED is removed keeps its folder name, see ModLoader.conflicts
+        self.update({mod.name if mod.name not in self else mod.path.name: mod})
 
     def add_child_by_path(self, path: Union[str, pathlib.Path]):
         self.add_child(BasicMod(path))
@@ -136,6 +186,37 @@ class MergedMod(MutableMapping):
                 continue
             mobj.deactivate()
 
+    def states(self, enable: bool, child: Optional[str] = None, folders: Optional[bool] = False) -> dict:
+        """Target {path: enabled} of the folder, merged.ini and the configs of every child
+
+        Without child merged.ini is enabled and switches between the childs, with a child
+        only that child is enabled, like bypass_active. The folders of the childs stay
+        enabled while the merged mod is active since merged.ini loads them.
+        """
+        if child is not None and child not in self:
+            raise KeyError(child)
+
+        folder = str(self.path.parent)
+        if not enable:
+            if folders:
+                return {folder: False}
+            states = {str(self.path): False}
+            for _, mod in self.items():
+                states.update(mod.states(False))
+            return states
+
+        states = {folder: True, str(self.path): child is None}
+        for name, mod in self.items():
+            states.update(mod.states(name == child))
+            states[str(mod.path)] = True
+        return states
+
+    def renamed(self, renames: list) -> None:
+        self.path = pathlib.Path(planner.follow(str(self.path), renames))
+        self.active = int(planner.is_enabled(str(self.path)) and planner.is_enabled(str(self.path.parent)))
+        for _, mod in self.items():
+            mod.renamed(renames)
+
     def __setitem__(self, key, value) -> None:
         if key in self._childs and value == self._childs[key]:
             return
@@ -171,7 +252,22 @@ class ModLoader(object):
         self.migoto_path = None
         self.mod_folder = None
         self.migoto_auto_launch = False
+        # Mods by id in the library index, names aren't unique once DISABLED is removed
         self.mods = dict()
+        # Mod folders that have the same path once DISABLED is removed, they can't be toggled
+        self.conflicts = []
+        self.index = index.LibraryIndex()
+        self.journal = planner.RenameJournal()
+        self.toggle = planner.TOGGLE_CONFIGS
+        self.slots = slots.SlotStore()
+
+        # Bumped whenever the mods are rebuilt, the resolved slots of older generations are stale
+        self.generation = 0
+        # Actual path of every path of the resolved slots, by canonical path
+        self.paths = dict()
+        # Mods by folder, with the folders sorted to find the mods below a renamed folder
+        self.folders = dict()
+        self.folder_keys = []
 
     def load_config(self) -> None:
         if not os.path.exists('config.ini'):
@@ -201,43 +297,350 @@ class ModLoader(object):
         self.migoto_auto_launch = self.config.get('3DMigoto', 'auto_launch')
 
     def load_slots(self) -> None:
-        pass
+        self.slots.load()
 
-    def scan_mods(self) -> None:
-        mods = glob.glob(f'{self.mod_folder}/**/*.ini', recursive=True)
-        mods = map(pathlib.Path, mods)
+    def save_slots(self) -> None:
+        self.slots.save()
 
-        lastmod = None
-        parindex = None
-        curmerged = None
+    def scan_mods(self) -> None:
+        """Scans the whole Mods folder again without using the index"""
+        if self.index.connection is None:
+            self.index.open()
+        tree = scan.scan_tree(self.mod_folder)
+        self.index.store(tree)
+        self.set_mods(self.build_library(tree))
+
+    def set_mods(self, mods: list) -> None:
+        """Stores the mods in the index and uses them as the library"""
+        self.save_library(mods)
+        self.mods = {mod.id: mod for mod in mods}
+        self.library_changed()
+
+    def library_changed(self) -> None:
+        self.generation += 1
+        self.paths.clear()
+        self.folders = {mod_path(mod): mod for mod in self.mods.values()}
+        self.folder_keys = sorted(self.folders)
+
+        folders = dict()
+        for mod in self.mods.values():
+            for folder in [mod] + (list(mod.values()) if isinstance(mod, MergedMod) else []):
+                folders.setdefault(planner.canonical(mod_path(folder)), []).append(mod_path(folder))
+        self.conflicts = sorted(sorted(paths) for paths in folders.values() if len(paths) > 1)
+
+    def conflicted(self, mod: Union[BasicMod, MergedMod]) -> bool:
+        """Checks if the mod, or one of its childs, has a conflict"""
+        paths = set(path for conflict in self.conflicts for path in conflict)
+        return any(path in paths for path in mod_paths(mod))
+
+    def build_library(self, root: scan.DirNode) -> list:
+        """Builds the mods of every folder in the Mods folder, the Mods folder itself isn't a mod"""
+        mods = []
+        for node in root.dirs:
+            mods.extend(self.build_mods(node))
+        return mods
+
+    def build_mods(self, root: scan.DirNode) -> list:
+        """Builds the mods from the directory tree without reading the disk again
+
+        Every folder with an ini is a mod, a folder with merged.ini is a merged mod and every
+        folder with an ini below it is one of its childs. Keys of merged mods are reused
+        from the index while their merged.ini is unchanged.
+        """
+        mods = []
+        pending = [root]
+        while pending:
+            node = pending.pop()
+            merged = [name for name in node.files if is_merged(name)]
+            if merged:
+                path = os.path.join(node.path, merged[0])
+                keys = self.index.cached_keys(path) if self.index.connection is not None else None
+                mod = MergedMod(path, size=node.size, swap_keys=keys)
+                for child in node.walk():
+                    if child is not node and child.inis:
+                        mod.add_child(BasicMod.from_node(child))
+                mods.append(mod)
+                continue
 
-        for file in mods:
-            parent = file.parts[-2]
+            if node.inis:
+                mods.append(BasicMod.from_node(node))
+            pending.extend(reversed(node.dirs))
+        return mods
+
+    def load_library(self) -> None:
+        """Loads the mods from the library index, then scans the folders that changed since the last run
+
+        An activation that was interrupted is rolled back first.
+        """
+        for _ in self.iter_library():
+            pass
+
+    def iter_library(self) -> Iterator[list]:
+        """Loads the library like load_library, yielding lists of the mods as they're found
+
+        An indexed library is refreshed at once since only the folders that changed are scanned.
+        Otherwise the Mods folder is scanned folder by folder, yielding the mods of each.
+        The ids of the mods are set once every mod was yielded.
+        """
+        self.journal.recover()
+        self.index.open()
+        self.toggle = self.index.get_meta('toggle') or planner.TOGGLE_CONFIGS
+
+        if self.index.indexed(self.mod_folder):
+            mods = self.mods_from_index(self.index.load_mods())
+            tree = self.index.refresh(self.mod_folder)
+            if tree is not None:
+                self.set_mods(self.build_library(tree))
+            else:
+                self.mods = {mod.id: mod for mod in mods}
+                self.library_changed()
+            yield list(self.mods.values())
+            return
 
-            if file.name == 'merged.ini':
-                parindex = len(file.parts) - 2
-                curmerged = MergedMod(file)
-                self.mods.update({curmerged.name: curmerged})
+        self.mods = dict()
+        found = []
+        nodes = scan.iter_tree(self.mod_folder)
+        root = next(nodes)
+        for node in nodes:
+            mods = self.build_mods(node)
+            found.extend(mods)
+            yield mods
+        self.index.store(root)
+        self.set_mods(found)
+
+    def save_library(self, mods: list) -> None:
+        rows = []
+        for mod in mods:
+            rows.append(mod_row(mod))
+            if isinstance(mod, MergedMod):
+                rows.extend(mod_row(child, parent=mod_path(mod)) for child in mod.values())
+                if mod.swap_keys_read:
+                    self.index.save_keys(str(mod.path), mod.swap_keys)
+
+        ids = self.index.save_mods(rows)
+        for mod in mods:
+            mod.id = ids[mod_path(mod)]
+            if isinstance(mod, MergedMod):
+                for child in mod.values():
+                    child.id = ids[mod_path(child)]
+
+    def swap_keys(self, mod: MergedMod) -> list:
+        """Keys of a merged mod, stored in the index the first time they're read"""
+        if not mod.swap_keys_read and self.index.connection is not None:
+            self.index.save_keys(str(mod.path), mod.swap_keys)
+        return mod.swap_keys
+
+    def set_toggle(self, toggle: str) -> None:
+        """Selects how mods are deactivated for this library
+
+        'configs' renames every ini of the mod, 'folders' renames the folder of the mod once,
+        3DMigoto skips folders starting with DISABLED as well.
+        """
+        if toggle not in planner.TOGGLES:
+            raise ValueError(f'Invalid toggle {toggle!r}, choose from {", ".join(planner.TOGGLES)}')
+        self.toggle = toggle
+        self.library_changed()
+        if self.index.connection is not None:
+            self.index.set_meta('toggle', toggle)
+
+    def resolve_slot(self, slot: dict) -> dict:
+        """Target {path: enable} of every mod for a slot of {mod id: child name or None}
+
+        Every mod that isn't in the slot is deactivated, for a merged mod the child selects
+        which child is active (None keeps merged.ini active). Mods with a conflict are left as they are.
+        The folders around an active mod are enabled too, when toggling folders an inactive mod
+        around an active one is deactivated by its configs instead, like when toggling configs.
+        """
+        folders = self.toggle == planner.TOGGLE_FOLDERS
+        states = dict()
+        inactive = []
+        for id_, mod in self.mods.items():
+            if self.conflicts and self.conflicted(mod):
                 continue
-
-            if curmerged is None:
-                if lastmod is not None and parent == lastmod:
-                    continue
-                lastmod = parent
-                mod = BasicMod(file)
-                self.mods.update({mod.name: mod})
+            if isinstance(mod, MergedMod):
+                mod_states = mod.states(id_ in slot, slot.get(id_), folders=folders)
             else:
-                if file.parts[parindex] != curmerged.name:
-                    curmerged = parindex = None
-                    lastmod = parent
-                    mod = BasicMod(file)
-                    self.mods.update({mod.name: mod})
+                mod_states = mod.states(id_ in slot, folders=folders)
+            if id_ not in slot:
+                inactive.append(mod)
+            # A path of a nested mod also belongs to the mod around it, it stays enabled if either is active
+            for path, enable in mod_states.items():
+                states[path] = states.get(path, False) or enable
+
+        root = os.path.join(self.mod_folder or '', '')
+        for path in [path for path, enable in states.items() if enable]:
+            folder = os.path.dirname(path)
+            while folder.startswith(root) and states.get(folder) is not True:
+                states[folder] = True
+                folder = os.path.dirname(folder)
+
+        if folders:
+            for mod in inactive:
+                if not states.get(mod_path(mod)):
                     continue
+                for path, enable in mod.states(False).items():
+                    states[path] = states.get(path, False) or enable
+        return states
+
+    def plan_slot(self, slot: dict) -> list:
+        """Renames needed to activate a slot of {mod id: child name or None}"""
+        return planner.plan(self.resolve_slot(slot))
+
+    def activate_slot(self, slot: dict) -> int:
+        """Activates a slot with the least renames possible, returns the amount of renames
+
+        The renames are done as one batch, if any of them fails every rename is reverted.
+        """
+        return self.execute(self.plan_slot(slot))
+
+    def slot_targets(self, slot: slots.Slot) -> dict:
+        """{mod id: child name or None} of a stored slot, ids that left the library are skipped"""
+        targets = dict()
+        for id_, mod in self.mods.items():
+            if id_ not in slot.mods:
+                continue
+            child = None
+            if isinstance(mod, MergedMod) and mod.id in slot.childs:
+                child = next((child_name for child_name, child_mod in mod.items()
+                              if child_mod.id == slot.childs[mod.id]), None)
+            targets[id_] = child
+        return targets
+
+    def slot_states(self, name: str) -> dict:
+        """Target {canonical path: enable} of a stored slot
+
+        Slots are resolved against the mods once per generation of the library. Canonical paths
+        don't change when the mods are toggled, so the result stays valid across activations.
+        """
+        states = self.slots.resolved(name, self.generation)
+        if states is not None:
+            return states
+
+        states = dict()
+        for path, enable in self.resolve_slot(self.slot_targets(self.slots[name])).items():
+            key = planner.canonical(path)
+            self.paths[key] = path
+            states[key] = enable
+        self.slots.cache(name, self.generation, states)
+        return states
+
+    def activate_stored_slot(self, name: str) -> int:
+        """Activates a stored slot from its resolved states, returns the amount of renames"""
+        states = self.slot_states(name)
+        return self.execute(planner.plan({self.paths[key]: enable for key, enable in states.items()}))
+
+    def execute(self, renames: list) -> int:
+        self.journal.execute(renames)
+        if not renames:
+            return 0
+
+        # Only the mods holding a renamed path are updated, the rest of the library is left as is
+        touched = self.touched_mods(renames)
+        for mod in touched:
+            self.remove_folder(mod_path(mod))
+            mod.renamed(renames)
+            self.add_folder(mod)
+            for path in mod_paths(mod):
+                key = planner.canonical(path)
+                if key in self.paths:
+                    self.paths[key] = path
+
+        if self.index.connection is not None:
+            self.index.renamed(renames)
+            rows = []
+            for mod in touched:
+                rows.append((mod.active, mod.id))
+                if isinstance(mod, MergedMod):
+                    rows.extend((child.active, child.id) for child in mod.values())
+            self.index.set_active(rows)
+        return len(renames)
+
+    def touched_mods(self, renames: list) -> list:
+        """Mods around or below the renamed paths, the mods of a nested folder are part of the mods around it"""
+        touched = dict()
+        for source, _ in renames:
+            path = source
+            while True:
+                if path in self.folders:
+                    touched[path] = self.folders[path]
+                parent = os.path.dirname(path)
+                if parent == path:
+                    break
+                path = parent
+
+            prefix = os.path.join(source, '')
+            index_ = bisect.bisect_left(self.folder_keys, prefix)
+            while index_ < len(self.folder_keys) and self.folder_keys[index_].startswith(prefix):
+                touched[self.folder_keys[index_]] = self.folders[self.folder_keys[index_]]
+                index_ += 1
+        return list(touched.values())
+
+    def add_folder(self, mod: Union[BasicMod, MergedMod]) -> None:
+        path = mod_path(mod)
+        self.folders[path] = mod
+        bisect.insort(self.folder_keys, path)
+
+    def remove_folder(self, path: str) -> None:
+        del self.folders[path]
+        del self.folder_keys[bisect.bisect_left(self.folder_keys, path)]
+
+    def mods_from_index(self, rows: list) -> list:
+        """Rebuilds the mods from the index rows
+
+        Every row is built before the childs are attached, a mod merged after it was indexed
+        has a lower id than its merged mod.
+        """
+        built = []
+        merged = dict()
+        for row in rows:
+            if row['type'] == MERGED:
+                # merged.ini can be edited without changing the mtime of its folder
+                path = row['configs'][0]
+                mod = MergedMod(path, size=row['size'], swap_keys=self.index.cached_keys(path))
+                merged[row['id']] = mod
+            else:
+                mod = BasicMod(row['path'], size=row['size'], configs=row['configs'])
+            mod.id = row['id']
+            mod.active = row['active']
+            built.append((row['parent'], mod))
+
+        mods = []
+        for parent, mod in built:
+            if parent in merged:
+                merged[parent].add_child(mod)
+            else:
+                mods.append(mod)
+        return mods
+
+
+def mod_path(mod: Union[BasicMod, MergedMod]) -> str:
+    """Folder of the mod, merged mods are indexed by their folder so renaming merged.ini keeps the id"""
+    if isinstance(mod, MergedMod):
+        return str(mod.path.parent)
+    return str(mod.path)
+
+
+def mod_paths(mod: Union[BasicMod, MergedMod]) -> list:
+    """Every path of the mod that an activation can rename"""
+    if isinstance(mod, MergedMod):
+        paths = [str(mod.path.parent), str(mod.path)]
+        for child in mod.values():
+            paths.extend(mod_paths(child))
+        return paths
+    return [str(mod.path)] + [str(config) for config in mod.configs]
+
+
+def mod_row(mod: Union[BasicMod, MergedMod], parent: Optional[str] = None) -> dict:
+    return {
+        'name': mod.name,
+        'type': MERGED if isinstance(mod, MergedMod) else BASIC,
+        'path': mod_path(mod),
+        'parent': parent,
+        'size': mod.size,
+        'active': mod.active,
+        'configs': [str(mod.path)] if isinstance(mod, MergedMod) else [str(config) for config in mod.configs]
+    }
 
-                if lastmod is None or parent != lastmod:
-                    lastmod = parent
-                    curmerged.add_child_by_path(file)
-                    
 
 def main():
     pass
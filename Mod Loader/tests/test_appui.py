@@ -0,0 +1,52 @@
+import unittest
+import tempfile
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+try:
+    from PySide2.QtWidgets import QApplication
+except ImportError:
+    QApplication = None
+
+from test_loading import make_loader, make_mods
+
+
+@unittest.skipIf(QApplication is None, 'PySide2 is not installed')
+class TestModLoaderUI(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls.app = QApplication.instance() or QApplication([])
+
+    def setUp(self) -> None:
+        import appui
+        self.folder = tempfile.TemporaryDirectory()
+        self.loader = make_loader(self.folder.name)
+        self.window = appui.ModLoaderUI()
+
+    def tearDown(self) -> None:
+        self.loader.index.close()
+        self.window.close()
+        self.folder.cleanup()
+
+    def test_load_fills_counts_and_keys(self) -> None:
+        make_mods(self.folder.name, 100)
+        self.window.load(self.loader)
+        self.assertTrue(self.window.wait(10000))
+
+        self.assertEqual(self.window.normal_mod_count.text(), 'Normal mods: 100')
+        self.assertEqual(self.window.merged_mod_count.text(), 'Merged mods: 1')
+        path = str(next(mod for mod in self.loader.mods.values() if mod.name == 'Merged').path)
+        self.assertEqual(len(self.loader.index.cached_keys(path)), 2)
+
+    def test_failed_load_skips_keys(self) -> None:
+        self.window.load(self.loader)
+        self.assertTrue(self.window.wait(10000))
+        self.assertFalse(self.window.progress.loaded)
+        self.assertEqual(len(self.window.progress.errors), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
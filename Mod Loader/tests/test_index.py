@@ -0,0 +1,132 @@
+from unittest import mock
+import unittest
+import tempfile
+import shutil
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core import index, scan
+import main
+
+FILES = {
+    ('Amber', 'amber.ini'): '[TextureOverrideAmber]\n',
+    ('Ganyu', 'ganyu.ini'): '[TextureOverrideGanyu]\n',
+    ('Keqing', 'keqing.ini'): '[TextureOverrideKeqing]\n',
+    ('Keqing', 'Textures', 'body.dds'): 'dds',
+    ('Merged', 'merged.ini'): '[KeySwap]\nkey = VK_DOWN\n',
+    ('Merged', '0 - A', 'DISABLEDa.ini'): '[TextureOverrideA]\n',
+    ('Merged', '1 - B', 'DISABLEDb.ini'): '[TextureOverrideB]\n',
+}
+
+
+class TestRefresh(unittest.TestCase):
+    def setUp(self) -> None:
+        self.folder = tempfile.TemporaryDirectory()
+        self.mods = os.path.join(self.folder.name, 'Mods')
+        for parts, content in FILES.items():
+            self.write(content, *parts)
+        self.loader = self.load()
+        self.ids = self.mod_ids(self.loader)
+
+    def tearDown(self) -> None:
+        self.loader.index.close()
+        self.folder.cleanup()
+
+    def path(self, *parts: str) -> str:
+        return os.path.join(self.mods, *parts)
+
+    def write(self, content: str, *parts: str) -> None:
+        path = self.path(*parts)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as file:
+            file.write(content)
+            file.close()
+
+    def touch(self, *parts: str) -> None:
+        # A second later, the edit could land within the timestamp granularity of the scan
+        mtime = os.stat(self.path(*parts)).st_mtime_ns + 1000000000
+        os.utime(self.path(*parts), ns=(mtime, mtime))
+
+    def load(self) -> main.ModLoader:
+        loader = main.ModLoader()
+        loader.mod_folder = self.mods
+        loader.index.filename = os.path.join(self.folder.name, 'library.db')
+        loader.journal.filename = os.path.join(self.folder.name, 'rename_journal.json')
+        loader.load_library()
+        return loader
+
+    def reload(self) -> main.ModLoader:
+        self.loader.index.close()
+        self.loader = self.load()
+        return self.loader
+
+    @staticmethod
+    def mod_ids(loader: main.ModLoader) -> dict:
+        ids = dict()
+        for mod in loader.mods.values():
+            ids[mod.name] = mod.id
+            if isinstance(mod, main.MergedMod):
+                ids.update((f'{mod.name}/{name}', child.id) for name, child in mod.items())
+        return ids
+
+    def rows(self, *names: str) -> list:
+        """Indexed dirs and files of the given mod folders"""
+        rows = []
+        for name in names:
+            path = self.path(name)
+            prefix = os.path.join(path, '')
+            for table, column in (('dirs', 'path'), ('files', 'dir')):
+                rows.extend(self.loader.index.connection.execute(
+                    f'SELECT * FROM {table} WHERE {column} = ? OR substr({column}, 1, ?) = ? ORDER BY 1, 2',
+                    (path, len(prefix), prefix)).fetchall())
+        return rows
+
+    def test_single_mod_edited(self) -> None:
+        others = self.rows('Amber', 'Ganyu', 'Merged')
+        self.write('[TextureOverrideExtra]\n', 'Keqing', 'extra.ini')
+        self.touch('Keqing')
+        self.assertEqual(self.loader.index.changed_dirs(), [self.path('Keqing')])
+
+        with mock.patch.object(index.scan, 'scan_tree', wraps=scan.scan_tree) as scan_tree:
+            loader = self.reload()
+        # Only the edited mod folder is scanned again
+        self.assertEqual(scan_tree.call_args_list[0], mock.call(self.path('Keqing')))
+        self.assertTrue(all(index.is_below(call.args[0], self.path('Keqing')) or call.args[0] == self.path('Keqing')
+                            for call in scan_tree.call_args_list))
+
+        self.assertEqual(self.mod_ids(loader), self.ids)
+        self.assertEqual(self.rows('Amber', 'Ganyu', 'Merged'), others)
+        keqing = next(mod for mod in loader.mods.values() if mod.name == 'Keqing')
+        self.assertIn(self.path('Keqing', 'extra.ini'), [str(config) for config in keqing.configs])
+        self.assertIn((self.path('Keqing'), 'extra.ini', len('[TextureOverrideExtra]\n')), self.rows('Keqing'))
+        self.assertEqual(loader.index.changed_dirs(), [])
+
+    def test_deleted_folders_are_pruned(self) -> None:
+        shutil.rmtree(self.path('Merged', '1 - B'))
+        shutil.rmtree(self.path('Keqing', 'Textures'))
+        self.touch('Merged')
+        self.touch('Keqing')
+        self.assertEqual(self.loader.index.changed_dirs(), [self.path('Keqing'), self.path('Merged')])
+
+        loader = self.reload()
+        ids = dict(self.ids)
+        del ids['Merged/1 - B']
+        self.assertEqual(self.mod_ids(loader), ids)
+        self.assertEqual(self.rows(os.path.join('Merged', '1 - B')) + self.rows(os.path.join('Keqing', 'Textures')),
+                         [])
+
+        # A removed mod folder changes the Mods folder itself, every other mod keeps its id
+        shutil.rmtree(self.path('Amber'))
+        self.touch()
+        self.assertEqual(self.loader.index.changed_dirs(), [self.mods])
+        loader = self.reload()
+        del ids['Amber']
+        self.assertEqual(self.mod_ids(loader), ids)
+        self.assertEqual(self.rows('Amber'), [])
+        self.assertEqual(loader.index.connection.execute('SELECT count(*) FROM mods').fetchone()[0], len(ids))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,239 @@
+import unittest
+import tempfile
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core import planner, slots
+import main
+
+
+def find(loader: main.ModLoader, name: str):
+    return next(mod for mod in loader.mods.values() if mod.name == name)
+
+
+def slot_of(loader: main.ModLoader, **targets) -> dict:
+    return {find(loader, name).id: child for name, child in targets.items()}
+
+
+FILES = {
+    ('Ganyu', 'DISABLEDGanyu.ini'): '[TextureOverrideGanyu]\n',
+    ('Keqing', 'Keqing.ini'): '[TextureOverrideKeqing]\n',
+    ('Keqing', 'Inner', 'inner.ini'): '[TextureOverrideInner]\n',
+    ('Merged', 'merged.ini'): '[KeySwap]\nkey = VK_DOWN\n',
+    ('Merged', '0 - A', 'DISABLEDa.ini'): '[TextureOverrideA]\n',
+    ('Merged', '1 - B', 'DISABLEDb.ini'): '[TextureOverrideB]\n',
+}
+
+
+class TestActivation(unittest.TestCase):
+    def setUp(self) -> None:
+        self.folder = tempfile.TemporaryDirectory()
+        self.mods = os.path.join(self.folder.name, 'Mods')
+        for parts, content in FILES.items():
+            path = os.path.join(self.mods, *parts)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'w', encoding='utf-8') as file:
+                file.write(content)
+                file.close()
+        self.loader = self.load()
+
+    def tearDown(self) -> None:
+        self.loader.index.close()
+        self.folder.cleanup()
+
+    def load(self) -> main.ModLoader:
+        loader = main.ModLoader()
+        loader.mod_folder = self.mods
+        loader.index.filename = os.path.join(self.folder.name, 'library.db')
+        loader.journal.filename = os.path.join(self.folder.name, 'rename_journal.json')
+        loader.slots.filename = os.path.join(self.folder.name, 'slots.json')
+        loader.load_library()
+        return loader
+
+    @staticmethod
+    def snapshot(loader: main.ModLoader) -> list:
+        return sorted((mod.id, main.mod_path(mod), mod.active, sorted(main.mod_paths(mod)))
+                      for mod in loader.mods.values())
+
+    def test_only_touched_mods_are_updated(self) -> None:
+        self.loader.activate_slot(slot_of(self.loader, Keqing=None, Merged=None))
+        ganyu = find(self.loader, 'Ganyu')
+        renamed = ganyu.renamed
+        calls = []
+        ganyu.renamed = lambda renames: (calls.append(renames), renamed(renames))
+
+        self.assertEqual(self.loader.activate_slot(slot_of(self.loader, Keqing=None, Merged=None, Ganyu=None)), 1)
+        self.assertEqual(len(calls), 1)
+        self.assertGreater(self.loader.activate_slot(slot_of(self.loader, Keqing=None, Merged='0 - A', Ganyu=None)), 0)
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(ganyu.active, 1)
+
+    def test_index_matches_disk_after_activation(self) -> None:
+        merged = find(self.loader, 'Merged')
+        slot = slots.Slot('slot', [find(self.loader, 'Keqing').id, merged.id], {merged.id: merged['1 - B'].id})
+        self.loader.slots.add(slot)
+
+        for toggle in planner.TOGGLES:
+            self.loader.set_toggle(toggle)
+            self.loader.activate_stored_slot('slot')
+            fresh = self.load()
+            self.assertEqual(self.snapshot(fresh), self.snapshot(self.loader))
+            self.assertEqual(self.loader.folder_keys, sorted(self.loader.folders))
+            fresh.index.close()
+
+        self.assertTrue(os.path.exists(os.path.join(self.mods, 'Merged', '1 - B', 'b.ini')))
+        self.assertTrue(os.path.exists(os.path.join(self.mods, 'Merged', 'DISABLEDmerged.ini')))
+
+
+    def test_stored_slot_edited_in_place(self) -> None:
+        keqing = find(self.loader, 'Keqing')
+        ganyu = find(self.loader, 'Ganyu')
+        slot = slots.Slot('slot', [keqing.id])
+        self.loader.slots.add(slot)
+        self.loader.activate_stored_slot('slot')
+        self.assertEqual(ganyu.active, 0)
+
+        slot.add(ganyu.id)
+        self.assertGreater(self.loader.activate_stored_slot('slot'), 0)
+        self.assertEqual(ganyu.active, 1)
+        slot.remove(ganyu.id)
+        self.assertGreater(self.loader.activate_stored_slot('slot'), 0)
+        self.assertEqual(ganyu.active, 0)
+
+class TestIndexOrder(unittest.TestCase):
+    def setUp(self) -> None:
+        self.folder = tempfile.TemporaryDirectory()
+        self.mods = os.path.join(self.folder.name, 'Mods')
+
+    def tearDown(self) -> None:
+        self.folder.cleanup()
+
+    def write(self, *parts: str) -> None:
+        path = os.path.join(self.mods, *parts)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as file:
+            file.write('[TextureOverride]\n')
+            file.close()
+
+    def load(self) -> dict:
+        loader = main.ModLoader()
+        loader.mod_folder = self.mods
+        loader.index.filename = os.path.join(self.folder.name, 'library.db')
+        loader.journal.filename = os.path.join(self.folder.name, 'rename_journal.json')
+        loader.load_library()
+        loader.index.close()
+        return {mod.name: (type(mod).__name__, mod.id, sorted((child, mod[child].id) for child in mod)
+                           if isinstance(mod, main.MergedMod) else [])
+                for mod in loader.mods.values()}
+
+    def test_mods_merged_after_they_were_indexed(self) -> None:
+        self.write('Pack', 'A', 'a.ini')
+        self.write('Pack', 'B', 'b.ini')
+        before = self.load()
+        self.assertEqual(set(before), {'A', 'B'})
+
+        self.write('Pack', 'merged.ini')
+        merged = self.load()
+        pack = merged['Pack']
+        self.assertEqual(list(merged), ['Pack'])
+        self.assertEqual(pack[0], 'MergedMod')
+        self.assertGreater(pack[1], max(before['A'][1], before['B'][1]))
+        self.assertEqual(pack[2], [('A', before['A'][1]), ('B', before['B'][1])])
+        # Loaded from the index, the childs come before the merged mod
+        self.assertEqual(self.load(), merged)
+
+
+class TestConflicts(unittest.TestCase):
+    def setUp(self) -> None:
+        self.folder = tempfile.TemporaryDirectory()
+        self.mods = os.path.join(self.folder.name, 'Mods')
+        for parts in (('Foo', 'foo.ini'), ('DISABLEDFoo', 'foo.ini'), ('Bar', 'DISABLEDbar.ini')):
+            path = os.path.join(self.mods, *parts)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'w', encoding='utf-8') as file:
+                file.write('[TextureOverride]\n')
+                file.close()
+
+    def tearDown(self) -> None:
+        self.folder.cleanup()
+
+    def load(self) -> main.ModLoader:
+        loader = main.ModLoader()
+        loader.mod_folder = self.mods
+        loader.index.filename = os.path.join(self.folder.name, 'library.db')
+        loader.journal.filename = os.path.join(self.folder.name, 'rename_journal.json')
+        loader.load_library()
+        return loader
+
+    def test_same_name_once_enabled(self) -> None:
+        loader = self.load()
+        foo = [os.path.join(self.mods, 'DISABLEDFoo'), os.path.join(self.mods, 'Foo')]
+        self.assertEqual(sorted(main.mod_path(mod) for mod in loader.mods.values() if mod.name == 'Foo'), foo)
+        self.assertEqual(loader.conflicts, [foo])
+
+        loader.set_toggle(planner.TOGGLE_FOLDERS)
+        ids = [mod.id for mod in loader.mods.values()]
+        self.assertEqual(loader.activate_slot(dict.fromkeys(ids)), 1)
+        self.assertEqual(sorted(os.listdir(self.mods)), ['Bar', 'DISABLEDFoo', 'Foo'])
+        self.assertEqual(loader.activate_slot({}), 1)
+        self.assertEqual(sorted(os.listdir(self.mods)), ['DISABLEDBar', 'DISABLEDFoo', 'Foo'])
+        loader.index.close()
+
+        fresh = self.load()
+        self.assertEqual(fresh.conflicts, [foo])
+        self.assertEqual(len(fresh.mods), 3)
+        fresh.index.close()
+
+
+class TestNestedMods(unittest.TestCase):
+    def setUp(self) -> None:
+        self.folder = tempfile.TemporaryDirectory()
+        self.mods = os.path.join(self.folder.name, 'Mods')
+        for parts in (('A', 'a.ini'), ('A', 'Sub', 'sub.ini'), ('B', 'b.ini')):
+            path = os.path.join(self.mods, *parts)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'w', encoding='utf-8') as file:
+                file.write('[TextureOverride]\n')
+                file.close()
+        self.loader = main.ModLoader()
+        self.loader.mod_folder = self.mods
+        self.loader.index.filename = os.path.join(self.folder.name, 'library.db')
+        self.loader.journal.filename = os.path.join(self.folder.name, 'rename_journal.json')
+        self.loader.load_library()
+
+    def tearDown(self) -> None:
+        self.loader.index.close()
+        self.folder.cleanup()
+
+    def loaded(self) -> list:
+        """Inis 3DMigoto would load, folders and files starting with DISABLED are skipped"""
+        inis = []
+        for path, dirs, files in os.walk(self.mods):
+            dirs[:] = [name for name in dirs if planner.is_enabled(name)]
+            inis.extend(os.path.relpath(os.path.join(path, name), self.mods) for name in files
+                        if name.endswith('.ini') and planner.is_enabled(name))
+        return sorted(inis)
+
+    def test_modes_load_the_same_inis(self) -> None:
+        a = os.path.join('A', 'a.ini')
+        sub = os.path.join('A', 'Sub', 'sub.ini')
+        b = os.path.join('B', 'b.ini')
+        expected = [({'A'}, [a, sub]), ({'Sub'}, [sub]), ({'A', 'B'}, [a, sub, b]), ({'Sub', 'B'}, [sub, b]),
+                    (set(), [])]
+        for toggle in (planner.TOGGLE_FOLDERS, planner.TOGGLE_CONFIGS, planner.TOGGLE_FOLDERS):
+            self.loader.set_toggle(toggle)
+            for names, inis in expected:
+                self.loader.activate_slot({find(self.loader, name).id: None for name in names})
+                self.assertEqual(self.loaded(), sorted(inis), (toggle, names))
+
+    def test_active_mod_keeps_nested_folder(self) -> None:
+        self.loader.set_toggle(planner.TOGGLE_FOLDERS)
+        self.loader.activate_slot({find(self.loader, 'A').id: None})
+        self.assertEqual(sorted(os.listdir(os.path.join(self.mods, 'A'))), ['Sub', 'a.ini'])
+        self.assertEqual(sorted(os.listdir(self.mods)), ['A', 'DISABLEDB'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,93 @@
+import unittest
+import tempfile
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core import slots
+import loading
+import main
+
+
+def make_loader(folder: str) -> main.ModLoader:
+    loader = main.ModLoader()
+    loader.mod_folder = os.path.join(folder, 'Mods')
+    loader.index.filename = os.path.join(folder, 'library.db')
+    loader.journal.filename = os.path.join(folder, 'rename_journal.json')
+    loader.slots.filename = os.path.join(folder, 'slots.json')
+    return loader
+
+
+def make_mods(folder: str, count: int) -> None:
+    files = {(f'Mod{index:03}', 'mod.ini'): '[TextureOverrideMod]\n' for index in range(count)}
+    files[('Merged', 'merged.ini')] = '[KeySwap]\nkey = VK_DOWN\n[KeySwapHair]\nkey = VK_UP\n'
+    files[('Merged', '0 - A', 'DISABLEDa.ini')] = '[TextureOverrideA]\n'
+    for parts, content in files.items():
+        path = os.path.join(folder, 'Mods', *parts)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as file:
+            file.write(content)
+            file.close()
+
+
+class TestBatches(unittest.TestCase):
+    def test_size(self) -> None:
+        self.assertEqual([len(batch) for batch in loading.batches(range(150), size=64, interval=60)], [64, 64, 22])
+
+    def test_interval(self) -> None:
+        self.assertEqual([len(batch) for batch in loading.batches(range(3), size=64, interval=0)], [1, 1, 1])
+
+
+class TestLoadProgress(unittest.TestCase):
+    def setUp(self) -> None:
+        self.folder = tempfile.TemporaryDirectory()
+        self.loader = make_loader(self.folder.name)
+
+    def tearDown(self) -> None:
+        self.loader.index.close()
+        self.folder.cleanup()
+
+    def test_library_is_loaded_progressively(self) -> None:
+        make_mods(self.folder.name, 100)
+        progress = loading.LoadProgress()
+        counts = []
+        for batch in loading.batches(loading.library_items(self.loader), size=16, interval=60):
+            progress.add_mods(batch)
+            counts.append(progress.normal_count + progress.merged_count)
+        self.assertEqual(counts, [16, 32, 48, 64, 80, 96, 101])
+
+        pending = progress.library_loaded(self.loader, True)
+        self.assertEqual((progress.normal_count, progress.merged_count), (100, 1))
+        self.assertEqual([mod.name for mod in pending], ['Merged'])
+
+        read = list(loading.key_items(pending))
+        loading.save_keys(self.loader, read)
+        path = str(next(mod for mod in self.loader.mods.values() if mod.name == 'Merged').path)
+        self.assertEqual(self.loader.index.cached_keys(path), [('KeySwap', 'VK_DOWN'), ('KeySwapHair', 'VK_UP')])
+
+    def test_failed_load_starts_nothing(self) -> None:
+        progress = loading.LoadProgress()
+        with self.assertRaises(OSError):
+            list(loading.library_items(self.loader))
+        self.assertEqual(progress.library_loaded(self.loader, False), [])
+        self.assertFalse(progress.loaded)
+
+    def test_conflicts_message(self) -> None:
+        make_mods(self.folder.name, 1)
+        self.loader.load_library()
+        self.assertIsNone(loading.conflicts_message(self.loader))
+        mods = os.path.join(self.folder.name, 'Mods')
+        os.rename(os.path.join(mods, 'Mod000'), os.path.join(mods, 'DISABLEDMerged'))
+        self.loader.load_library()
+        self.assertIn('DISABLEDMerged', loading.conflicts_message(self.loader))
+
+    def test_slot_items(self) -> None:
+        self.loader.slots.add(slots.Slot('Summer', [1]))
+        self.loader.slots.add(slots.Slot('Winter', [2]))
+        self.loader.save_slots()
+        self.assertEqual(list(loading.slot_items(make_loader(self.folder.name))), ['Summer', 'Winter'])
+
+
+if __name__ == '__main__':
+    unittest.main()
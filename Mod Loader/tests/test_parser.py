@@ -0,0 +1,83 @@
+import unittest
+import tempfile
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core import parser
+
+MERGED = '''; Merged Mod: .\\0 - A, .\\1 - B
+; Constants -------------------------
+
+[Constants]
+global persist $swapvar = 0
+global $active
+
+[KeySwap]
+condition = $active == 1
+key = VK_UP ; next skin
+# key = VK_NUMPAD1
+type = cycle
+$swapvar = 0,1
+
+[KeySwapOutline]
+Key = ctrl VK_DOWN
+type = cycle
+
+[KeyHelp]
+key=h
+  key = j
+
+[Present]
+post $active = 0
+
+[TextureOverrideA]
+hash = 1a2b3c4d
+
+[KeyLate]
+key = VK_LEFT
+'''
+
+
+class TestReadKeys(unittest.TestCase):
+    def setUp(self) -> None:
+        self.folder = tempfile.TemporaryDirectory()
+        self.merged = os.path.join(self.folder.name, 'merged.ini')
+
+    def tearDown(self) -> None:
+        self.folder.cleanup()
+
+    def write(self, content: str, encoding: str = 'utf-8') -> None:
+        with open(self.merged, 'w', encoding=encoding) as file:
+            file.write(content)
+            file.close()
+
+    def test_key_sections(self) -> None:
+        self.write(MERGED)
+        # Commented keys are left out, reading stops at the first override section
+        self.assertEqual(parser.read_keys(self.merged), [('KeySwap', 'VK_UP'), ('KeySwapOutline', 'ctrl VK_DOWN'),
+                                                         ('KeyHelp', 'h'), ('KeyHelp', 'j')])
+
+    def test_bom(self) -> None:
+        self.write(MERGED, 'utf-8-sig')
+        self.assertEqual(parser.read_keys(self.merged)[0], ('KeySwap', 'VK_UP'))
+        self.write('[KeySwap]\nkey = x\n', 'utf-8-sig')
+        self.assertEqual(parser.read_keys(self.merged), [('KeySwap', 'x')])
+
+    def test_no_keys(self) -> None:
+        self.write('[TextureOverrideA]\nhash = 1a2b3c4d\n\n[KeyLate]\nkey = VK_LEFT\n')
+        # Without a key before them, override sections don't stop the search
+        self.assertEqual(parser.read_keys(self.merged), [('KeyLate', 'VK_LEFT')])
+        self.write('; only a comment\n')
+        self.assertEqual(parser.read_keys(self.merged), [])
+
+    def test_invalid_utf8(self) -> None:
+        with open(self.merged, 'wb') as file:
+            file.write(b'; \xff\xfe\n[KeySwap]\nkey = VK_UP\n')
+            file.close()
+        self.assertEqual(parser.read_keys(self.merged), [('KeySwap', 'VK_UP')])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,68 @@
+import unittest
+import tempfile
+import json
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core import planner
+
+
+class TestRenameJournal(unittest.TestCase):
+    def setUp(self) -> None:
+        self.folder = tempfile.TemporaryDirectory()
+        self.mods = os.path.join(self.folder.name, 'Mods')
+        os.makedirs(os.path.join(self.mods, 'DISABLEDF'))
+        self.config = os.path.join(self.mods, 'DISABLEDF', 'DISABLEDa.ini')
+        with open(self.config, 'w', encoding='utf-8') as file:
+            file.write('[TextureOverrideA]\n')
+            file.close()
+        self.journal = planner.RenameJournal(os.path.join(self.folder.name, 'rename_journal.json'))
+
+    def tearDown(self) -> None:
+        self.folder.cleanup()
+
+    def interrupt(self, renames: list, done: int) -> None:
+        """Leaves the journal behind like a batch stopped after done renames"""
+        with open(self.journal.filename, 'w', encoding='utf-8') as file:
+            json.dump({'version': planner.JOURNAL_VERSION, 'renames': renames}, file)
+            file.close()
+        for source, target in renames[:done]:
+            os.rename(source, target)
+
+    def nested_renames(self) -> list:
+        states = {os.path.join(self.mods, 'DISABLEDF'): True, self.config: True}
+        return planner.plan(states)
+
+    def test_plan_renames_configs_before_folder(self) -> None:
+        renames = self.nested_renames()
+        self.assertEqual(renames, [(self.config, os.path.join(self.mods, 'DISABLEDF', 'a.ini')),
+                                   (os.path.join(self.mods, 'DISABLEDF'), os.path.join(self.mods, 'F'))])
+
+    def test_recover_nested_folder_and_config(self) -> None:
+        renames = self.nested_renames()
+        self.interrupt(renames, len(renames))
+        self.assertTrue(os.path.exists(os.path.join(self.mods, 'F', 'a.ini')))
+
+        self.assertEqual(self.journal.recover(), 2)
+        self.assertTrue(os.path.exists(self.config))
+        self.assertFalse(self.journal.exists())
+
+    def test_recover_partial_batch(self) -> None:
+        renames = self.nested_renames()
+        self.interrupt(renames, 1)
+
+        self.assertEqual(self.journal.recover(), 1)
+        self.assertTrue(os.path.exists(self.config))
+
+    def test_execute_reverts_on_failure(self) -> None:
+        renames = self.nested_renames() + [(os.path.join(self.mods, 'missing'), os.path.join(self.mods, 'x'))]
+        with self.assertRaises(FileNotFoundError):
+            self.journal.execute(renames)
+        self.assertTrue(os.path.exists(self.config))
+        self.assertFalse(self.journal.exists())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,37 @@
+from loading import batches
+
+from PySide2.QtCore import (QObject, QRunnable, Signal)
+from typing import Iterator
+
+
+class WorkerSignals(QObject):
+    batch = Signal(object)
+    failed = Signal(str)
+    # True if every item was produced
+    finished = Signal(bool)
+
+
+class Worker(QRunnable):
+    """Runs a task of the loading pipeline (see loading.py) on the thread pool
+
+    Results are emitted in batches, the receivers live in the UI thread so the signals are
+    queued and handled by its event loop.
+    """
+
+    def __init__(self, items: Iterator) -> None:
+        super().__init__()
+        # Deleted by the UI once finished, the signals must outlive run()
+        self.setAutoDelete(False)
+        self.items = items
+        self.signals = WorkerSignals()
+
+    def run(self) -> None:
+        success = False
+        try:
+            for batch in batches(self.items):
+                self.signals.batch.emit(batch)
+            success = True
+        except Exception as error:
+            self.signals.failed.emit(f'{type(error).__name__} {error}')
+        finally:
+            self.signals.finished.emit(success)